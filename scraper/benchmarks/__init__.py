@@ -0,0 +1,4 @@
+"""
+KaziLink benchmarks
+Run from the scraper directory, e.g. `python -m benchmarks.bench_storage`
+"""
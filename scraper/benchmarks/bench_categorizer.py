@@ -0,0 +1,84 @@
+"""
+Categorizer benchmark: sequential, concurrent and packed categorization against a fake LLM
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from categorizer import OpportunityCategorizer
+from models import Opportunity
+from benchmarks.fakes import FakeChatClient
+
+TITLES = [
+    'Industrial Attachment - Engineering',
+    'Graduate Trainee Program',
+    'Senior Software Engineer',
+    'Accounts Assistant',
+    'Marketing Intern',
+]
+
+
+def make_opportunities(n: int):
+    return [
+        Opportunity(
+            title=TITLES[i % len(TITLES)],
+            company=f'Company {i}',
+            location='Nairobi',
+            description=f'Posting number {i} with a short description.',
+            source_url=f'https://example.com/jobs/{i}',
+            source_platform='fuzu'
+        )
+        for i in range(n)
+    ]
+
+
+def report(label: str, n: int, elapsed: float, categorizer: OpportunityCategorizer):
+    usage = categorizer.usage
+    tokens = usage['prompt_tokens'] + usage['completion_tokens']
+    print(
+        f"{label:>22}: {elapsed:7.2f}s  {n / elapsed:8.1f} postings/s  "
+        f"{usage['requests'] / n:5.2f} requests/posting  {tokens / n:7.1f} tokens/posting"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark opportunity categorization')
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Fake LLM latency (default: 50ms)')
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--malformed-rate', type=float, default=0.02, help='Items dropped from packed answers')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--pack-size', type=int, default=10)
+    parser.add_argument('--skip-sequential', action='store_true')
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"📦 {args.jobs} postings, {args.latency_ms}ms latency, {args.error_rate:.0%} errors\n")
+
+    def categorizer():
+        client = FakeChatClient(latency=latency, error_rate=args.error_rate, malformed_rate=args.malformed_rate)
+        return OpportunityCategorizer(client=client)
+
+    if not args.skip_sequential:
+        sequential = categorizer()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sequential.batch_categorize(make_opportunities(args.jobs))
+        report('sequential', args.jobs, time.perf_counter() - start, sequential)
+
+    for pack_size in sorted({1, args.pack_size}):
+        concurrent = categorizer()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(concurrent.abatch_categorize(
+                make_opportunities(args.jobs), max_concurrency=args.concurrency, pack_size=pack_size
+            ))
+        label = f'x{args.concurrency}, pack={pack_size}'
+        report(label, args.jobs, time.perf_counter() - start, concurrent)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Near-duplicate benchmark: time and accuracy of NearDuplicateIndex on synthetic postings
+
+Each batch mixes distinct postings with lightly edited copies of some of
+them, as a vacancy cross-posted on another board would be (reworded
+title, different platform and URL, a sentence added or dropped). Pairs
+sharing a template but with different details (other roles at the same
+company) must stay distinct. Precision and recall are counted over the
+copies, whose originals are known; recall is also given over just the
+copies whose exact shingle similarity reaches the threshold, the ones
+MinHash is meant to find.
+"""
+
+import argparse
+import random
+import time
+
+from dedupe import NearDuplicateIndex, DEFAULT_SIMILARITY_THRESHOLD, _words
+from models import Opportunity
+
+ROLES = ['Accountant', 'Software Engineer', 'Sales Executive', 'Nurse', 'Data Analyst',
+         'Marketing Officer', 'Procurement Officer', 'HR Assistant', 'Driver', 'Teacher']
+PLATFORMS = ['fuzu', 'myjobmag', 'brightermonday']
+WORDS = ('manage support develop report team client budget field office data system project '
+         'customer quality safety training stock supply finance audit policy research design '
+         'network service account market brand sales school patient clinic vehicle route').split()
+BOILERPLATE = 'Interested candidates should send their CV and cover letter before the deadline.'
+
+
+def posting(rng: random.Random, i: int) -> Opportunity:
+    sentences = [' '.join(rng.choices(WORDS, k=12)).capitalize() + '.' for _ in range(6)]
+    return Opportunity(
+        title=f"{rng.choice(ROLES)} {rng.choice(['I', 'II', 'Senior', 'Junior', 'Lead'])}",
+        company=f"Company {rng.randrange(2000)}",
+        location='Nairobi',
+        description=' '.join(sentences + [BOILERPLATE]),
+        source_url=f"https://www.fuzu.com/ke/jobs/{i}",
+        source_platform=PLATFORMS[i % 3]
+    )
+
+
+def copy_of(rng: random.Random, original: Opportunity, i: int) -> Opportunity:
+    sentences = original.description.split('. ')
+    if rng.random() < 0.5:
+        sentences.pop(rng.randrange(len(sentences)))
+    else:
+        sentences.insert(rng.randrange(len(sentences)), 'Apply early')
+    return Opportunity(
+        title=f"{original.title} - {original.location}" if rng.random() < 0.5 else original.title.upper(),
+        company=original.company,
+        location=original.location,
+        description='. '.join(sentences),
+        source_url=f"https://www.myjobmag.co.ke/job/{i}",
+        source_platform=PLATFORMS[(PLATFORMS.index(original.source_platform) + 1) % 3]
+    )
+
+
+def batch(n: int, duplicate_rate: float, seed: int):
+    """`n` postings, about `duplicate_rate` of them copies; returns them and each copy's original"""
+    rng = random.Random(seed)
+    postings, originals = [], {}
+    for i in range(n):
+        if postings and rng.random() < duplicate_rate:
+            original = rng.choice(postings)
+            while original.source_url in originals:
+                original = originals[original.source_url]
+            copy = copy_of(rng, original, i)
+            originals[copy.source_url] = original
+            postings.append(copy)
+        else:
+            postings.append(posting(rng, i))
+    return postings, originals
+
+
+def shingles(index: NearDuplicateIndex, opp: Opportunity) -> set:
+    """The exact shingle set a signature summarizes"""
+    words, _ = _words(opp)
+    size = index.shingle_size
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate detection')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    parser.add_argument('--duplicate-rate', type=float, default=0.2)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    index = NearDuplicateIndex(args.threshold)
+    print(f"Threshold {args.threshold}: {index.bands} bands of {index.rows} rows")
+    for n in args.sizes:
+        postings, originals = batch(n, args.duplicate_rate, args.seed)
+        by_url = {opp.source_url: opp for opp in postings}
+        index = NearDuplicateIndex(args.threshold)
+
+        start = time.perf_counter()
+        found = {opp.source_url: index.add(opp) for opp in postings}
+        elapsed = time.perf_counter() - start
+
+        # A copy may be matched to an earlier copy of the same vacancy, which is just as right
+        def vacancy(opp: Opportunity) -> Opportunity:
+            return originals.get(opp.source_url, opp)
+
+        flagged = {url: canonical for url, canonical in found.items() if canonical is not None}
+        correct = {url for url, canonical in flagged.items() if vacancy(canonical) is vacancy(by_url[url])}
+        # Copies edited past the threshold are not expected to be found
+        alike = {
+            url for url, original in originals.items()
+            if jaccard(shingles(index, by_url[url]), shingles(index, original)) >= args.threshold
+        }
+        precision = len(correct) / len(flagged) if flagged else 1.0
+        recall = len(correct) / len(originals) if originals else 1.0
+        recall_alike = len(correct & alike) / len(alike) if alike else 1.0
+        print(
+            f"{n:>7} postings: {elapsed:6.2f}s  {n / elapsed:8.0f}/s  "
+            f"{len(originals)} copies ({len(alike)} above threshold), {len(flagged)} flagged  "
+            f"precision {precision:.3f}  recall {recall:.3f} ({recall_alike:.3f} above threshold)  "
+            f"{index.comparisons / n:.2f} comparisons/posting"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+End-to-end benchmark: KaziLinkScraper.run() fully offline, at several sizes
+
+Every external dependency is replaced by a local fake: the three job
+boards by fixture servers (in a child process), the browser by
+FakeBrowserPool, the OpenAI API by FakeChatClient (configurable latency
+and error rate) and Supabase by InMemoryStore. Each size runs the real
+pipeline from the first listing request to the last stored row.
+
+Results go to a JSON file; given a baseline from an earlier run
+(--baseline), the throughput of each size is compared with it, so a
+regression shows up as a negative change.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from typing import Dict, Optional
+
+from benchmarks.fakes import FakeBrowserPool, FakeChatClient
+from benchmarks.fixture_server import FixtureProcess, SITES
+from cache import CategoryCache
+from categorizer import OpportunityCategorizer
+from http_cache import ResponseCache
+from metrics import metrics
+from preclassifier import PreClassifier
+from scraper import KaziLinkScraper
+from scrapers.fuzu import FuzuScraper
+from scrapers.myjobmag import MyJobMagScraper
+from scrapers.brightermonday import BrighterMondayScraper
+from storage import InMemoryStore
+
+SCRAPERS = {
+    'fuzu': FuzuScraper,
+    'myjobmag': MyJobMagScraper,
+    'brightermonday': BrighterMondayScraper,
+}
+
+DEFAULT_OUTPUT = '.cache/benchmarks/end_to_end.json'
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'results', 'end_to_end.json')
+
+
+def _histogram(snapshot: Dict, prefix: str, field: str) -> float:
+    """Largest `field` among the histograms whose key starts with `prefix`"""
+    values = [h[field] for key, h in snapshot['histograms'].items() if key.startswith(prefix)]
+    return max(values, default=0.0)
+
+
+async def run_once(args, postings: int) -> Dict:
+    per_site = -(-postings // len(SITES))
+    with FixtureProcess(total_jobs=per_site, per_page=args.per_page, latency=args.page_latency) as servers:
+        metrics.reset()
+        client = FakeChatClient(latency=args.llm_latency, error_rate=args.llm_error_rate)
+        store = InMemoryStore(latency=args.store_latency)
+        scraper = KaziLinkScraper(
+            store=store,
+            parse_workers=args.parse_workers,
+            categorizer=OpportunityCategorizer(
+                client=client,
+                requests_per_minute=args.llm_rpm,
+                cache=CategoryCache(':memory:'),
+                preclassifier=PreClassifier()
+            ),
+            scrapers={site: cls(base_url=servers.urls[site]) for site, cls in SCRAPERS.items()},
+            response_cache=ResponseCache(':memory:'),
+            browser_pool=FakeBrowserPool(),
+            requests_per_minute=args.rate_limit
+        )
+        max_pages = max(servers.pages.values())
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = await scraper.run(max_pages=max_pages, similarity_threshold=args.similarity_threshold)
+        elapsed = time.perf_counter() - start
+
+    snapshot = report['metrics']
+    round_trips = sum(
+        h['count'] for key, h in snapshot['histograms'].items() if key.startswith('db_seconds')
+    )
+    return {
+        'postings': per_site * len(SITES),
+        'elapsed_seconds': elapsed,
+        'postings_per_second': per_site * len(SITES) / elapsed,
+        'counts': report['counts'],
+        'stored_rows': len(store.rows),
+        'llm_calls': client.calls,
+        'llm_tokens': client.prompt_tokens + client.completion_tokens,
+        'db_round_trips': round_trips,
+        'fetch_p95_seconds': _histogram(snapshot, 'fetch_seconds', 'p95'),
+        'parse_p95_seconds': _histogram(snapshot, 'parse_seconds', 'p95'),
+        'llm_p95_seconds': _histogram(snapshot, 'llm_request_seconds', 'p95'),
+        'event_loop': report['event_loop'],
+        'stages': report['stages'],
+    }
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results: Dict, baseline: Optional[Dict]):
+    print(f"\n{'postings':>9} {'seconds':>9} {'per sec':>9} {'saved':>7} {'errors':>7} {'LLM calls':>10} {'DB trips':>9}  vs baseline")
+    before = {run['postings']: run for run in (baseline or {}).get('runs', [])}
+    for run in results['runs']:
+        old = before.get(run['postings'])
+        change = (
+            f"{run['postings_per_second'] / old['postings_per_second'] - 1:+.1%}"
+            if old else '-'
+        )
+        print(
+            f"{run['postings']:>9} {run['elapsed_seconds']:>9.2f} {run['postings_per_second']:>9.1f} "
+            f"{run['counts']['saved']:>7} {run['counts']['errors']:>7} {run['llm_calls']:>10} "
+            f"{run['db_round_trips']:>9}  {change}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark a full offline run at several sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1_000, 10_000],
+                        help='Postings per run, split across the three boards')
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--page-latency', type=float, default=0.0, help='Seconds per fixture page')
+    parser.add_argument('--rate-limit', type=float, default=600_000.0, help='Requests per minute per site')
+    parser.add_argument('--parse-workers', type=int, default=0)
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Seconds per fake model request')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='Share of model requests failing with 429/5xx')
+    parser.add_argument('--llm-rpm', type=float, default=None, help='Model requests per minute (default: unlimited)')
+    parser.add_argument('--store-latency', type=float, default=0.01, help='Seconds per store round trip')
+    parser.add_argument('--similarity-threshold', type=float, default=0.8)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'Results file (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Earlier results to compare with (default: benchmarks/results/end_to_end.json)')
+    args = parser.parse_args()
+
+    # Fetch strategies and the search index stay in memory, like the caches
+    os.environ['FETCH_STRATEGY_PATH'] = ''
+    os.environ['SEARCH_INDEX_PATH'] = ':memory:'
+
+    settings = {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')}
+    results = {'environment': environment(), 'settings': settings, 'runs': []}
+    # The crawl journal goes to a scratch directory, never over a real run's
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ['CHECKPOINT_PATH'] = os.path.join(scratch, 'crawl.journal')
+        for postings in args.sizes:
+            results['runs'].append(asyncio.run(run_once(args, postings)))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and os.path.abspath(args.baseline) != os.path.abspath(args.output):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    compare(results, baseline)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Field extraction benchmark: accuracy on labeled postings and throughput on a synthetic batch
+
+The labeled postings in benchmarks/fixtures/extraction.json give the
+value expected for every field (null where the posting does not say);
+a field counts as correct only on an exact match. Throughput is measured
+on the fixture server's generated postings, which carry a deadline and
+an experience requirement in every description.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.fixture_server import posting
+from extractor import FieldExtractor
+from models import Opportunity
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'extraction.json')
+
+FIELDS = ('application_deadline', 'salary_range', 'experience_required', 'education_level', 'industry', 'is_remote')
+
+
+def load_fixtures(path: str = FIXTURES):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def accuracy(extractor: FieldExtractor, fixtures, verbose: bool = False):
+    jobs = [
+        Opportunity(
+            title=case['title'],
+            company='Bench Ltd',
+            location=case['location'],
+            description=case['description'],
+            source_url=f'https://example.com/jobs/{i}',
+            source_platform='fuzu'
+        )
+        for i, case in enumerate(fixtures)
+    ]
+    extractor.apply(jobs)
+
+    correct = {field: 0 for field in FIELDS}
+    for job, case in zip(jobs, fixtures):
+        for field in FIELDS:
+            got, expected = getattr(job, field), case['expected'][field]
+            if got == expected:
+                correct[field] += 1
+            elif verbose:
+                print(f"   ✗ {case['title']}: {field} = {got!r}, expected {expected!r}")
+    return correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rule-based field extraction')
+    parser.add_argument('--jobs', type=int, default=50_000)
+    parser.add_argument('--batch-size', type=int, default=500, help='Postings per extraction call')
+    parser.add_argument('--verbose', action='store_true', help='List every wrong field')
+    args = parser.parse_args()
+
+    extractor = FieldExtractor()
+    fixtures = load_fixtures()
+    correct = accuracy(extractor, fixtures, args.verbose)
+    total = sum(correct.values())
+    print(f"🎯 Accuracy on {len(fixtures)} labeled postings: {total}/{len(fixtures) * len(FIELDS)} fields")
+    for field in FIELDS:
+        print(f"   {field:<22} {correct[field]:>3}/{len(fixtures)} ({correct[field] / len(fixtures):.0%})")
+
+    jobs = []
+    for i in range(args.jobs):
+        data = posting(i)
+        jobs.append(Opportunity(
+            title=data['title'],
+            company=data['company'],
+            location=data['location'],
+            description=data['description'],
+            source_url=f'https://example.com/jobs/{i}',
+            source_platform='fuzu'
+        ))
+    chars = sum(len(job.description) for job in jobs)
+
+    start = time.perf_counter()
+    filled = 0
+    for offset in range(0, len(jobs), args.batch_size):
+        filled += extractor.apply(jobs[offset:offset + args.batch_size])
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"📦 {args.jobs} postings ({chars / args.jobs:,.0f} chars each) in {elapsed:.2f}s "
+        f"({args.jobs / elapsed:,.0f} postings/s, {chars / elapsed / 1e6:.1f} MB/s)"
+    )
+    print(f"🧩 Fields filled: {filled} ({filled / args.jobs:.1f} per posting)")
+
+
+if __name__ == "__main__":
+    main()
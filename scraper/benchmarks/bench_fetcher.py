@@ -0,0 +1,65 @@
+"""
+Fetch benchmark: scrape the local fixture boards through PageFetcher
+
+Static fixture pages should be served entirely over HTTP, without ever
+launching Chromium. A second pass with the response cache committed
+should skip every listing page as not modified.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.fixture_server import FixtureServer
+from fetcher import PageFetcher
+from http_cache import ResponseCache
+from scrapers.fuzu import FuzuScraper
+from scrapers.myjobmag import MyJobMagScraper
+from scrapers.brightermonday import BrighterMondayScraper
+
+SCRAPERS = {
+    'fuzu': FuzuScraper,
+    'myjobmag': MyJobMagScraper,
+    'brightermonday': BrighterMondayScraper,
+}
+
+
+async def scrape_site(site: str, args) -> None:
+    with FixtureServer(site, total_jobs=args.jobs, per_page=args.per_page, latency=args.latency_ms / 1000) as server:
+        cache = ResponseCache(':memory:')
+        for run in ('cold', 'repeat'):
+            fetcher = PageFetcher(strategy_path=None, default_rate_limit=args.rate_limit, response_cache=cache)
+            scraper = SCRAPERS[site](base_url=server.url)
+            requests = server.requests
+            start = time.perf_counter()
+            async with fetcher:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    jobs = await scraper.scrape(max_pages=server.pages, fetcher=fetcher)
+                browser = 'launched' if fetcher.pool._browser is not None else 'not launched'
+            elapsed = time.perf_counter() - start
+            cache.commit()
+            stats = cache.stats
+            print(
+                f"{site:>15} {run:>6}: {len(jobs):5d} jobs  {server.requests - requests:5d} requests  "
+                f"{elapsed:6.2f}s  browser {browser}  skipped {stats['pages_skipped']} pages "
+                f"({stats['bytes_saved'] / 1024:.0f} KB saved)"
+            )
+            stats.update(pages_skipped=0, not_modified=0, bytes_saved=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTTP-first fetching against local fixtures')
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--rate-limit', type=float, default=6000.0, help='Requests per minute per site')
+    args = parser.parse_args()
+
+    for site in SCRAPERS:
+        asyncio.run(scrape_site(site, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Memory benchmark: 100k postings as Opportunity records vs the dicts they replace
+
+Field values are built fresh per record, as parsing would, except
+source_platform (a literal in each scraper). `type` values are built
+fresh too, as a JSON answer or cache read returns them; Opportunity
+interns them.
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from models import Opportunity
+
+PLATFORMS = ['fuzu', 'myjobmag', 'brightermonday']
+TYPES = ['attachment', 'internship', 'job']
+
+
+def fields(i: int) -> dict:
+    return {
+        'title': f"Graduate Trainee Program #{i}",
+        'company': f"Company {i % 500}",
+        'location': f"Nairobi {i % 7}",
+        'description': f"Posting {i}: " + 'Applicants should have a degree in a relevant field. ' * 4,
+        'source_url': f"https://www.fuzu.com/ke/jobs/graduate-trainee-{i}",
+        'source_platform': PLATFORMS[i % 3],
+        'type': ''.join(TYPES[i % 3]),
+    }
+
+
+def measure(build, n: int) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    records = [build(fields(i)) for i in range(n)]
+    total, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    containers = sum(sys.getsizeof(record) for record in records)
+    return total, containers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory of Opportunity records and dicts')
+    parser.add_argument('--records', type=int, default=100_000)
+    args = parser.parse_args()
+
+    results = {
+        'dict': measure(dict, args.records),
+        'Opportunity': measure(lambda values: Opportunity(**values), args.records),
+    }
+    for name, (total, containers) in results.items():
+        print(
+            f"{name:>12}: {total / 2**20:7.1f} MiB total  {total / args.records:6.0f} B/record  "
+            f"containers {containers / 2**20:6.1f} MiB"
+        )
+    saved = results['dict'][0] - results['Opportunity'][0]
+    print(f"\nOpportunity saves {saved / 2**20:.1f} MiB ({saved / results['dict'][0]:.0%}) for {args.records} records")
+
+
+if __name__ == "__main__":
+    main()
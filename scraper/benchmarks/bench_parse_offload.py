@@ -0,0 +1,77 @@
+"""
+Parse offload benchmark: event-loop stall with pages parsed inline vs in worker processes
+
+All three fixture boards are scraped concurrently on one fetcher, as in a
+real run, while a LoopMonitor records how long the event loop was blocked.
+Large listing pages make parsing the dominant cost. The fixture servers
+run in a separate process (FixtureProcess).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+from benchmarks.fixture_server import FixtureProcess
+from fetcher import PageFetcher
+from loop_monitor import LoopMonitor
+from parsing import BACKENDS, DEFAULT_BACKEND
+from scrapers.fuzu import FuzuScraper
+from scrapers.myjobmag import MyJobMagScraper
+from scrapers.brightermonday import BrighterMondayScraper
+
+SCRAPERS = {
+    'fuzu': FuzuScraper,
+    'myjobmag': MyJobMagScraper,
+    'brightermonday': BrighterMondayScraper,
+}
+
+
+async def scrape_all(args, servers: FixtureProcess, parse_workers: int) -> None:
+    fetcher = PageFetcher(strategy_path=None, default_rate_limit=args.rate_limit, parse_workers=parse_workers)
+    async with fetcher:
+        if parse_workers:
+            # Start the workers up front so their start-up is not counted as parsing
+            await asyncio.gather(*(fetcher._parse(str.strip, '') for _ in range(parse_workers)))
+
+        start = time.perf_counter()
+        async with LoopMonitor() as monitor:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = await asyncio.gather(*(
+                    cls(base_url=servers.urls[site], parser_backend=args.backend).scrape(
+                        max_pages=servers.pages[site], fetcher=fetcher
+                    )
+                    for site, cls in SCRAPERS.items()
+                ))
+        elapsed = time.perf_counter() - start
+
+    stalls = monitor.summary()
+    mode = f"{parse_workers} workers" if parse_workers else 'inline'
+    print(
+        f"{mode:>10}: {sum(len(jobs) for jobs in results):5d} jobs  {elapsed:6.2f}s  "
+        f"loop stalled {stalls['stalled_seconds']:6.2f}s ({stalls['stalled_fraction']:4.0%})  "
+        f"longest stall {stalls['max_stall_seconds'] * 1000:6.1f} ms  stalls {stalls['stalls']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark event-loop stall with and without parser processes')
+    parser.add_argument('--jobs', type=int, default=600, help='Postings per site')
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument('--rate-limit', type=float, default=60000.0, help='Requests per minute per site')
+    args = parser.parse_args()
+
+    with FixtureProcess(total_jobs=args.jobs, per_page=args.per_page) as servers:
+        # Workers only add parallelism with spare cores; on one core they
+        # still shorten the longest stalls, but compete with the loop for CPU
+        print(f"Parser backend: {args.backend}, {os.cpu_count()} CPU(s)")
+        for parse_workers in (0, args.workers):
+            asyncio.run(scrape_all(args, servers, parse_workers))
+
+
+if __name__ == "__main__":
+    main()
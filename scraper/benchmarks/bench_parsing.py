@@ -0,0 +1,61 @@
+"""
+Parsing micro-benchmark: listing and detail pages saved under benchmarks/fixtures
+
+Each page is parsed repeatedly with every parser backend. Backends must
+agree on the records they extract, and each listing must yield exactly one
+record per posting (no wrapper duplicates).
+"""
+
+import argparse
+import os
+import time
+
+from parsing import BACKENDS, compile_selectors
+from scrapers import fuzu, myjobmag, brightermonday
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+PAGES = [
+    ('fuzu', 'fuzu_listing.html', fuzu.SELECTORS, 'listing'),
+    ('fuzu', 'fuzu_detail.html', fuzu.SELECTORS, 'detail'),
+    ('myjobmag', 'myjobmag_listing.html', myjobmag.SELECTORS, 'listing'),
+    ('brightermonday', 'brightermonday_listing.html', brightermonday.SELECTORS, 'listing'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML parser backends on saved pages')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--expected-cards', type=int, default=20, help='Postings on each saved listing page')
+    args = parser.parse_args()
+
+    for site, filename, selectors, kind in PAGES:
+        with open(os.path.join(FIXTURES, filename), encoding='utf-8') as f:
+            content = f.read()
+
+        results = {}
+        timings = {}
+        for backend in BACKENDS:
+            site_parser = compile_selectors(selectors, backend)
+            parse = site_parser.parse_listing if kind == 'listing' else site_parser.parse_detail
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                result = parse(content)
+            timings[backend] = (time.perf_counter() - start) / args.repeat
+            results[backend] = result
+
+        first, *others = results.values()
+        agree = all(result == first for result in others)
+        cards = f"{len(first[0]):3d} cards" if kind == 'listing' else '  detail '
+        speed = '  '.join(f"{backend} {seconds * 1000:7.3f} ms" for backend, seconds in timings.items())
+        fastest = min(timings.values())
+        print(
+            f"{filename:>28} ({len(content) / 1024:4.0f} KB): {cards}  {speed}  "
+            f"speedup {max(timings.values()) / fastest:4.1f}x  backends agree: {agree}"
+        )
+        if kind == 'listing' and len(first[0]) != args.expected_cards:
+            print(f"   ⚠️  expected {args.expected_cards} cards")
+
+
+if __name__ == "__main__":
+    main()
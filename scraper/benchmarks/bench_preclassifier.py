@@ -0,0 +1,52 @@
+"""
+Pre-classifier benchmark: throughput and LLM calls avoided on a synthetic batch
+"""
+
+import argparse
+import time
+
+from models import Opportunity
+from preclassifier import PreClassifier
+
+SAMPLES = [
+    ('Industrial Attachment - Engineering', 'University students on industrial attachment. Introduction letter required.'),
+    ('Graduate Trainee Program', 'Fresh graduates join our 12-month graduate trainee programme.'),
+    ('Senior Software Engineer', 'At least 5 years of experience in Python. Permanent position.'),
+    ('Marketing Intern', 'Support the marketing team for six months.'),
+    ('Accounts Assistant', 'Handle invoices and reconciliations.'),
+    ('Sales Manager', 'Lead a team of interns and sales staff.'),
+    ('Data Analyst', 'Analyse data for the business.'),
+    ('Finance Manager', 'Minimum 7 years experience in finance. Full-time role.'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rule-based pre-classifier')
+    parser.add_argument('--jobs', type=int, default=100_000)
+    parser.add_argument('--threshold', type=float, default=None)
+    args = parser.parse_args()
+
+    opportunities = [
+        Opportunity(
+            title=SAMPLES[i % len(SAMPLES)][0],
+            company='Bench Ltd',
+            location='Nairobi',
+            description=SAMPLES[i % len(SAMPLES)][1] * 5,
+            source_url=f'https://example.com/jobs/{i}',
+            source_platform='fuzu'
+        )
+        for i in range(args.jobs)
+    ]
+    classifier = PreClassifier() if args.threshold is None else PreClassifier(threshold=args.threshold)
+
+    start = time.perf_counter()
+    remaining = classifier.split(opportunities)
+    elapsed = time.perf_counter() - start
+
+    avoided = args.jobs - len(remaining)
+    print(f"📦 {args.jobs} postings in {elapsed:.2f}s ({args.jobs / elapsed:,.0f} postings/s)")
+    print(f"⚡ Labeled locally: {avoided} ({avoided / args.jobs:.0%}), {len(remaining)} left for the LLM")
+
+
+if __name__ == "__main__":
+    main()
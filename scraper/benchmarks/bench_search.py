@@ -0,0 +1,133 @@
+"""
+Search index benchmark: indexing throughput and query latency of SearchIndex
+
+Postings come from the fixture server's generator (titles, companies,
+locations and duties text), with types assigned as the categorizer
+would. For each size the index is built in storage-sized batches, fed
+the same batches again (the no-change case every run hits) and a few
+changed postings; then a mix of queries is timed, each with its facet
+counts, next to the substring scan the frontend runs against the main
+table today (title ILIKE %text%), done here on the index's own table.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.fixture_server import posting
+from models import Opportunity
+from search_index import SearchIndex
+from storage import DEFAULT_BATCH_SIZE
+
+TYPES = ('attachment', 'internship', 'job')
+
+# (label, search arguments)
+QUERIES = [
+    ('rare word', {'text': '4242'}),
+    ('one word', {'text': 'engineer'}),
+    ('two words', {'text': 'data analyst'}),
+    ('prefix', {'text': 'procure'}),
+    ('word + type', {'text': 'trainee', 'type': 'job'}),
+    ('word + location', {'text': 'marketing', 'location': 'Nairobi'}),
+    ('filters only', {'type': 'attachment', 'source_platform': 'fuzu'}),
+]
+
+
+def make_jobs(n: int):
+    jobs = []
+    for i in range(n):
+        data = posting(i)
+        jobs.append(Opportunity(
+            title=data['title'],
+            company=data['company'],
+            location=data['location'],
+            description=data['description'],
+            source_url=f"https://example.com/jobs/{i}",
+            source_platform=('fuzu', 'myjobmag', 'brightermonday')[i % 3],
+            type=TYPES[i % len(TYPES)]
+        ))
+    return jobs
+
+
+def timed(call, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return result, statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def like_scan(index: SearchIndex, text: str = '', **filters):
+    """The frontend's query: substring match on the title, exact filters, newest first"""
+    clauses, params = [], []
+    if text:
+        clauses.append("title LIKE ?")
+        params.append(f"%{text}%")
+    for column, value in filters.items():
+        clauses.append(f"{column} LIKE ?" if column == 'location' else f"{column} = ?")
+        params.append(f"%{value}%" if column == 'location' else value)
+    where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    return index.conn.execute(
+        f"SELECT * FROM opportunities{where} ORDER BY id DESC LIMIT 20", params
+    ).fetchall()
+
+
+def bench_size(n: int, args):
+    jobs = make_jobs(n)
+    batches = [jobs[i:i + args.batch_size] for i in range(0, n, args.batch_size)]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, 'search.sqlite3'))
+
+        started = time.perf_counter()
+        for batch in batches:
+            index.upsert_many(batch)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        unchanged = sum(index.upsert_many(batch) for batch in batches)
+        again = time.perf_counter() - started
+
+        edited = jobs[::100]
+        for job in edited:
+            job.description += ' Updated.'
+        started = time.perf_counter()
+        changed = index.upsert_many(edited)
+        update = time.perf_counter() - started
+        index.optimize()
+        size = sum(os.path.getsize(path) for path in (index.path, index.path + '-wal') if os.path.exists(path))
+
+        print(
+            f"\n{n} postings: indexed {n / build:,.0f}/s, re-fed unchanged {n / again:,.0f}/s "
+            f"({unchanged} rewritten), {changed} edits in {update * 1000:.1f} ms, {size / 1e6:.1f} MB"
+        )
+        print(f"   {'query':<16} {'matches':>8} {'search p50':>11} {'p95':>8} {'+facets p50':>12} {'LIKE scan p50':>14}")
+        for label, query in QUERIES:
+            _, p50, p95 = timed(lambda: index.search(**query), args.repeat)
+            total, _, _ = timed(lambda: index.count(**query), 1)
+            _, facet_p50, _ = timed(lambda: index.facets(**query), args.repeat)
+            _, scan_p50, _ = timed(lambda: like_scan(index, **query), args.repeat)
+            print(
+                f"   {label:<16} {total:>8} {p50 * 1000:>9.2f}ms {p95 * 1000:>6.2f}ms "
+                f"{facet_p50 * 1000:>10.2f}ms {scan_p50 * 1000:>12.2f}ms"
+            )
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the local search index')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query')
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        bench_size(n, args)
+
+
+if __name__ == "__main__":
+    main()
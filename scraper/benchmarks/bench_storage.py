@@ -0,0 +1,60 @@
+"""
+Storage benchmark: per-row vs batched saves against the in-memory store
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from models import Opportunity
+from storage import InMemoryStore, opportunity_row, save_rows, save_rows_sequential
+
+
+def make_jobs(n: int):
+    return [
+        Opportunity(
+            title=f'Job {i}',
+            company='Bench Ltd',
+            type='job',
+            description='Benchmark posting',
+            location='Nairobi',
+            source_url=f'https://example.com/jobs/{i}',
+            source_platform='fuzu'
+        )
+        for i in range(n)
+    ]
+
+
+def bench(save, jobs, existing, latency, **kwargs):
+    store = InMemoryStore(latency=latency, rows=existing)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        counts = save(store, jobs, **kwargs)
+    elapsed = time.perf_counter() - start
+    return elapsed, store.round_trips, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark opportunity saves')
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Simulated round trip (default: 2ms)')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.jobs)
+    # Half the run is already stored, as on a typical repeat crawl
+    existing = [opportunity_row(job) for job in jobs[::2]]
+    latency = args.latency_ms / 1000
+
+    print(f"📦 {args.jobs} jobs, {len(existing)} already stored, {args.latency_ms}ms per round trip\n")
+    for label, save, kwargs in [
+        ('per-row', save_rows_sequential, {}),
+        (f'bulk (batch={args.batch_size})', save_rows, {'batch_size': args.batch_size}),
+    ]:
+        elapsed, trips, counts = bench(save, jobs, existing, latency, **kwargs)
+        print(f"{label:>22}: {elapsed:7.3f}s  {trips:6d} round trips  {counts}")
+
+
+if __name__ == "__main__":
+    main()
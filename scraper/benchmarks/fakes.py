@@ -0,0 +1,138 @@
+"""
+Local fakes for offline benchmarks
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Optional
+
+import httpx
+
+
+class FakeAPIError(Exception):
+    """Error carrying an HTTP status, like openai.APIStatusError"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"fake API error {status_code}")
+        self.status_code = status_code
+
+
+class FakeChatClient:
+    """
+    Stand-in for the OpenAI client's chat.completions endpoint.
+
+    Each call blocks for `latency` seconds and fails with a 429/500 with
+    probability `error_rate`. Answers are keyword guesses on the posting
+    title, which is all a throughput benchmark needs. Packed prompts get a
+    JSON answer in which each item is dropped with probability
+    `malformed_rate`.
+    """
+
+    TITLE = re.compile(r'^Title: (.*)$', re.MULTILINE)
+
+    def __init__(self, latency: float = 0.2, error_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model: str, messages: list, **kwargs):
+        prompt = '\n'.join(message['content'] for message in messages)
+        with self._lock:
+            self.calls += 1
+            failed = self._random.random() < self.error_rate
+            status = self._random.choice([429, 500, 503])
+
+        time.sleep(self.latency)
+        if failed:
+            raise FakeAPIError(status)
+
+        answers = [self._answer(title) for title in self.TITLE.findall(prompt)]
+        if 'JSON' in messages[0]['content']:
+            with self._lock:
+                kept = [self._random.random() >= self.malformed_rate for _ in answers]
+            content = json.dumps({
+                str(number): answer
+                for number, (answer, keep) in enumerate(zip(answers, kept), start=1) if keep
+            })
+        else:
+            content = ' '.join(answers)
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=max(1, len(content) // 4))
+        with self._lock:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=usage
+        )
+
+    @staticmethod
+    def _answer(title: str) -> str:
+        title = title.lower()
+        if 'attachment' in title:
+            return 'attachment'
+        if 'intern' in title or 'trainee' in title:
+            return 'internship'
+        return 'job'
+
+
+class FakeBrowserPool:
+    """
+    Stand-in for BrowserPool that "renders" pages with a plain HTTP GET.
+
+    Each navigation takes an extra `render_latency` seconds, roughly what
+    a headless browser adds. Enough for fixture pages, which need no
+    JavaScript, and it runs where Chromium is not installed.
+    """
+
+    def __init__(self, render_latency: float = 0.5):
+        self.render_latency = render_latency
+        self.pages_rendered = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        return self
+
+    async def close(self):
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @asynccontextmanager
+    async def page(self, site: str, host: Optional[str] = None):
+        if self._client is None:
+            self._client = httpx.AsyncClient(follow_redirects=True)
+        yield _FakePage(self)
+
+
+class _FakePage:
+    def __init__(self, pool: FakeBrowserPool):
+        self._pool = pool
+        self._html = ''
+
+    async def goto(self, url: str, **kwargs):
+        response = await self._pool._client.get(url)
+        await asyncio.sleep(self._pool.render_latency)
+        self._pool.pages_rendered += 1
+        self._html = response.text
+
+    async def content(self) -> str:
+        return self._html
@@ -0,0 +1,360 @@
+"""
+Local fixture server imitating the Fuzu, MyJobMag and BrighterMonday job boards
+
+Pages are rendered from templates that follow each site's markup closely
+enough for the scrapers' selectors, for `total_jobs` postings split into
+pages of `per_page`.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import multiprocessing
+import os
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+TITLES = [
+    'Industrial Attachment - Engineering',
+    'Graduate Trainee Program',
+    'Senior Software Engineer',
+    'Accounts Assistant',
+    'Marketing Intern',
+    'Sales Manager',
+    'Data Analyst',
+    'Field Attachment - Agriculture',
+]
+
+COMPANIES = ['Safaricom', 'KCB Group', 'Equity Bank', 'Twiga Foods', 'Kenya Power', 'Andela']
+
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Remote']
+
+# Words for each posting's own duties, so postings differ beyond their ids
+DUTIES = (
+    'reporting budgets clients suppliers audits payroll logistics research training '
+    'compliance inventory campaigns analytics recruitment procurement maintenance '
+    'scheduling partnerships fieldwork documentation'
+).split()
+
+
+def posting(job_id: int) -> dict:
+    """Deterministic fake posting; the same id gives the same posting on every site"""
+    title = TITLES[job_id % len(TITLES)]
+    duties = ' '.join(random.Random(job_id).choices(DUTIES, k=16))
+    return {
+        'id': job_id,
+        'title': f"{title} #{job_id}",
+        'company': COMPANIES[job_id % len(COMPANIES)],
+        'location': LOCATIONS[job_id % len(LOCATIONS)],
+        'description': f"Duties: {duties}. " + (
+            f"{title} opening at {COMPANIES[job_id % len(COMPANIES)]}. "
+            "Applicants should have 3 years experience and a degree in a relevant field. "
+            "Apply before 30th November 2026. "
+        ) * 3,
+    }
+
+
+# Site chrome around the listings, so pages weigh roughly what real ones do
+_HEAD = (
+    '<meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">'
+    + ''.join(f'<link rel="stylesheet" href="/assets/app-{i}.css">' for i in range(6))
+    + '<script>window.__STATE__ = ' + '{"filters": [' + ','.join(f'"f{i}"' for i in range(300)) + ']}</script>'
+)
+_NAV = '<header><nav><ul>' + ''.join(
+    f'<li class="nav-item"><a href="/category/{i}">Category {i}</a></li>' for i in range(80)
+) + '</ul></nav></header>'
+_FOOTER = '<footer>' + ''.join(
+    f'<div class="footer-col"><h4>Section {i}</h4><p>' + 'Find work across Kenya. ' * 10 + '</p></div>'
+    for i in range(8)
+) + '</footer>'
+
+
+def _page(body: str) -> str:
+    return (
+        f"<!DOCTYPE html><html><head><title>Jobs</title>{_HEAD}</head>"
+        f"<body>{_NAV}{body}{_FOOTER}</body></html>"
+    )
+
+
+def render_fuzu_listing(jobs: list, has_next: bool) -> str:
+    cards = ''.join(
+        f'<div class="job-card"><a href="/ke/jobs/job-{job["id"]}"><h3>{escape(job["title"])}</h3></a>'
+        f'<span class="company-name">{escape(job["company"])}</span>'
+        f'<span class="location">{escape(job["location"])}</span></div>'
+        for job in jobs
+    )
+    nav = '<a class="pagination" href="?page=next">Next</a>' if has_next else ''
+    return _page(f'<main><div class="jobs-list-wrapper">{cards}</div>{nav}</main>')
+
+
+def render_fuzu_detail(job: dict) -> str:
+    return _page(
+        f'<h1>{escape(job["title"])}</h1>'
+        f'<div class="job-description"><p>{escape(job["description"])}</p></div>'
+    )
+
+
+def render_myjobmag_listing(jobs: list, has_next: bool) -> str:
+    # Wrapper divs whose classes also contain "job", as on the real site
+    cards = ''.join(
+        f'<li class="job-list-li"><div class="job-info">'
+        f'<h2><a href="/job/job-{job["id"]}">{escape(job["title"])}</a></h2>'
+        f'<span class="job-company">{escape(job["company"])}</span>'
+        f'<span class="job-location">{escape(job["location"])}</span>'
+        f'<div class="job-desc">{escape(job["description"][:200])}</div>'
+        f'</div></li>'
+        for job in jobs
+    )
+    return _page(f'<div class="job-list-container"><ul class="job-list">{cards}</ul></div>')
+
+
+def render_brightermonday_listing(jobs: list, has_next: bool) -> str:
+    cards = ''.join(
+        f'<div class="search-result">'
+        f'<a href="/job-vacancies/job-{job["id"]}"><h3 class="search-result__job-title">{escape(job["title"])}</h3></a>'
+        f'<div class="search-result__company">{escape(job["company"])}</div>'
+        f'<span class="search-result__location">{escape(job["location"])}</span>'
+        f'<p class="search-result__job-snippet">{escape(job["description"][:200])}</p>'
+        f'</div>'
+        for job in jobs
+    )
+    return _page(f'<section class="search-results">{cards}</section>')
+
+
+def save_pages(directory: str, per_page: int = 20) -> list:
+    """
+    Write one listing page per site, and a Fuzu detail page, to `directory`.
+
+    Returns:
+        Paths written
+    """
+    os.makedirs(directory, exist_ok=True)
+    jobs = [posting(i) for i in range(per_page)]
+    pages = {
+        'fuzu_listing.html': render_fuzu_listing(jobs, has_next=True),
+        'fuzu_detail.html': render_fuzu_detail(jobs[0]),
+        'myjobmag_listing.html': render_myjobmag_listing(jobs, has_next=True),
+        'brightermonday_listing.html': render_brightermonday_listing(jobs, has_next=True),
+    }
+    paths = []
+    for name, body in pages.items():
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        paths.append(path)
+    return paths
+
+
+class FixtureServer:
+    """
+    Serves one fake job board on 127.0.0.1.
+
+    Routes follow the real sites' URL patterns, so a scraper only needs
+    its base_url pointed at `url`. Every response is delayed by `latency`
+    seconds. Pages carry an ETag and honour If-None-Match.
+
+    With `max_in_flight`, a request arriving while that many are already
+    being served is answered 429 with a `retry_after` second Retry-After,
+    like a site blocking aggressive crawlers.
+    """
+
+    def __init__(
+        self,
+        site: str,
+        total_jobs: int = 100,
+        per_page: int = 20,
+        latency: float = 0.0,
+        max_in_flight: Optional[int] = None,
+        retry_after: float = 1.0
+    ):
+        self.site = site
+        self.total_jobs = total_jobs
+        self.per_page = per_page
+        self.latency = latency
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.requests = 0
+        self.not_modified = 0
+        self.throttled = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total_jobs // self.per_page))
+
+    def listing(self, page_num: int) -> Optional[str]:
+        first = (page_num - 1) * self.per_page
+        if page_num < 1 or first >= self.total_jobs:
+            return None
+        jobs = [posting(i) for i in range(first, min(first + self.per_page, self.total_jobs))]
+        render = {
+            'fuzu': render_fuzu_listing,
+            'myjobmag': render_myjobmag_listing,
+            'brightermonday': render_brightermonday_listing,
+        }[self.site]
+        return render(jobs, page_num < self.pages)
+
+    def route(self, path: str, query: dict) -> Optional[str]:
+        page_num = int(query.get('page', ['1'])[0])
+        if self.site == 'fuzu':
+            if path == '/ke/jobs':
+                return self.listing(page_num)
+            if path.startswith('/ke/jobs/job-'):
+                job_id = int(path.rsplit('-', 1)[1])
+                return render_fuzu_detail(posting(job_id)) if job_id < self.total_jobs else None
+        elif self.site == 'myjobmag':
+            if path == '/jobs-by-country/kenya':
+                return self.listing(1)
+            if path.startswith('/jobs-by-country/kenya/page-'):
+                return self.listing(int(path.rsplit('-', 1)[1]))
+        elif self.site == 'brightermonday':
+            if path == '/jobs':
+                return self.listing(page_num)
+        return None
+
+    def start(self) -> 'FixtureServer':
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with fixture._lock:
+                    fixture.requests += 1
+                    busy = fixture.max_in_flight is not None and fixture._in_flight >= fixture.max_in_flight
+                    if busy:
+                        fixture.throttled += 1
+                    else:
+                        fixture._in_flight += 1
+                if busy:
+                    self.send_response(429)
+                    self.send_header('Retry-After', f"{fixture.retry_after:g}")
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                try:
+                    self._serve()
+                finally:
+                    with fixture._lock:
+                        fixture._in_flight -= 1
+
+            def _serve(self):
+                if fixture.latency:
+                    time.sleep(fixture.latency)
+                parsed = urlparse(self.path)
+                body = fixture.route(parsed.path, parse_qs(parsed.query))
+                status = 200 if body is not None else 404
+                payload = (body or '<html><body>Not found</body></html>').encode('utf-8')
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    fixture.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+SITES = ('fuzu', 'myjobmag', 'brightermonday')
+
+
+def _serve_all(total_jobs: int, per_page: int, latency: float, urls, stop):
+    with contextlib.ExitStack() as stack:
+        servers = [
+            stack.enter_context(FixtureServer(site, total_jobs, per_page, latency))
+            for site in SITES
+        ]
+        urls.put({server.site: (server.url, server.pages) for server in servers})
+        stop.wait()
+
+
+class FixtureProcess:
+    """
+    All three fixture boards, served from a child process.
+
+    Benchmarks measuring the scraper itself use this, so request handling
+    does not compete with the code under test for the interpreter.
+    `urls` and `pages` map each site to its base URL and listing pages.
+    """
+
+    def __init__(self, total_jobs: int = 100, per_page: int = 20, latency: float = 0.0):
+        self.total_jobs = total_jobs
+        self.per_page = per_page
+        self.latency = latency
+        self.urls: Dict[str, str] = {}
+        self.pages: Dict[str, int] = {}
+        self._stop = None
+        self._process = None
+
+    def start(self) -> 'FixtureProcess':
+        queue, self._stop = multiprocessing.Queue(), multiprocessing.Event()
+        self._process = multiprocessing.Process(
+            target=_serve_all,
+            args=(self.total_jobs, self.per_page, self.latency, queue, self._stop),
+            daemon=True
+        )
+        self._process.start()
+        for site, (url, pages) in queue.get().items():
+            self.urls[site] = url
+            self.pages[site] = pages
+        return self
+
+    def stop(self):
+        if self._process:
+            self._stop.set()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Save fixture pages for the parsing benchmark')
+    parser.add_argument('directory', nargs='?', default=os.path.join(os.path.dirname(__file__), 'fixtures'))
+    args = parser.parse_args()
+    for path in save_pages(args.directory):
+        print(path)
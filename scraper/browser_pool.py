@@ -0,0 +1,98 @@
+"""
+Shared Playwright browser pool for KaziLink
+One Chromium process per run; scrapers borrow pages instead of launching browsers
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+# Pages open at once for one site
+DEFAULT_PAGES_PER_SITE = 2
+
+# Pages open at once across all sites
+DEFAULT_MAX_PAGES = 6
+
+
+class BrowserPool:
+    """
+    One headless Chromium with a browser context per site.
+
+    Chromium is launched on the first borrow, so a run that never needs
+    it never pays for it. Pages are created lazily and reused between
+    borrows. Concurrency is bounded per site (`pages_per_site`), per host
+    (`per_host_limit`, for sites sharing a host) and globally
+    (`max_pages`).
+    """
+
+    def __init__(
+        self,
+        pages_per_site: int = DEFAULT_PAGES_PER_SITE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        per_host_limit: Optional[int] = None,
+        headless: bool = True
+    ):
+        self.pages_per_site = pages_per_site
+        self.per_host_limit = per_host_limit or pages_per_site
+        self.headless = headless
+        self._global = asyncio.Semaphore(max_pages)
+        self._site_limits: Dict[str, asyncio.Semaphore] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._contexts: Dict[str, BrowserContext] = {}
+        self._idle: Dict[str, List[Page]] = {}
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        return self
+
+    async def _launch(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @asynccontextmanager
+    async def page(self, site: str, host: Optional[str] = None):
+        """Borrow a page in `site`'s context, waiting for a free slot"""
+        host = host or site
+        site_limit = self._site_limits.setdefault(site, asyncio.Semaphore(self.pages_per_site))
+        host_limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+
+        async with self._global, site_limit, host_limit:
+            page = await self._checkout(site)
+            try:
+                yield page
+            finally:
+                if not page.is_closed():
+                    self._idle[site].append(page)
+
+    async def _checkout(self, site: str) -> Page:
+        idle = self._idle.setdefault(site, [])
+        while idle:
+            page = idle.pop()
+            if not page.is_closed():
+                return page
+
+        async with self._lock:
+            if self._browser is None:
+                await self._launch()
+            if site not in self._contexts:
+                self._contexts[site] = await self._browser.new_context()
+        return await self._contexts[site].new_page()
+
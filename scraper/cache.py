@@ -0,0 +1,118 @@
+"""
+Persistent categorization cache for KaziLink
+SQLite-backed, keyed on a normalized hash of each posting, with TTL and LRU eviction
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional
+
+DEFAULT_CACHE_PATH = '.cache/categories.sqlite3'
+
+# Entries older than this are treated as misses and evicted
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+# Least recently used entries beyond this are evicted
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Only the part of the description the model sees takes part in the key
+DESCRIPTION_CHARS = 1500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(' ', (text or '').lower()).strip()
+
+
+def posting_key(title: str, company: str, description: str) -> str:
+    """Content hash of a posting, stable across sources and whitespace/case changes"""
+    parts = (_normalize(title), _normalize(company), _normalize((description or '')[:DESCRIPTION_CHARS]))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class CategoryCache:
+    """Disk-backed map from posting key to category"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS categories (
+                key TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_categories_last_used ON categories(last_used)")
+        self.conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Return fresh cached categories for `keys`, marking them as used"""
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, category FROM categories WHERE key IN ({placeholders}) AND created_at >= ?",
+                (*chunk, now - self.ttl_seconds)
+            ).fetchall()
+            found.update(rows)
+
+        if found:
+            self.conn.executemany(
+                "UPDATE categories SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found]
+            )
+            self.conn.commit()
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, str]):
+        """Store categories and evict expired/least recently used entries"""
+        if not items:
+            return
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO categories (key, category, created_at, last_used) VALUES (?, ?, ?, ?)",
+            [(key, category, now, now) for key, category in items.items()]
+        )
+        self._evict(now)
+        self.conn.commit()
+
+    def put(self, key: str, category: str):
+        self.put_many({key: category})
+
+    def _evict(self, now: float):
+        self.conn.execute("DELETE FROM categories WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM categories").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM categories WHERE key IN "
+                "(SELECT key FROM categories ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
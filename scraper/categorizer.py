@@ -6,41 +6,36 @@ Uses OpenAI GPT-4 to intelligently categorize job postings into:
 - Job: Full-time employment opportunities
 """
 
+import asyncio
+import json
 import os
-from typing import Literal
-from openai import OpenAI
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Optional, get_args
+from openai import OpenAI, APIConnectionError, APITimeoutError
 from dotenv import load_dotenv
 
+from cache import posting_key
+from metrics import metrics
+from models import Opportunity
+from ratelimit import RateLimiter
+
 load_dotenv()
 
 OpportunityType = Literal['attachment', 'internship', 'job']
+OPPORTUNITY_TYPES = frozenset(get_args(OpportunityType))
 
-class OpportunityCategorizer:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
-    def categorize(
-        self,
-        title: str,
-        description: str,
-        company: str = ""
-    ) -> OpportunityType:
-        """
-        Categorize an opportunity using GPT-4.
-        
-        Args:
-            title: Job title
-            description: Full job description
-            company: Company name (optional)
-            
-        Returns:
-            'attachment', 'internship', or 'job'
-        """
-        
-        prompt = f"""You are an expert at categorizing job opportunities in Kenya. 
-Analyze the following job posting and categorize it into EXACTLY ONE category:
+SYSTEM_PROMPT = "You are a job classification expert. Respond with only: attachment, internship, or job"
+
+PACKED_SYSTEM_PROMPT = (
+    "You are a job classification expert. Respond with only a JSON object mapping "
+    "each posting number to attachment, internship, or job"
+)
 
-**Categories:**
+CATEGORY_RUBRIC = """**Categories:**
 1. **attachment** - Industrial/field attachments for CURRENT university/college students. These:
    - Require an introduction/attachment letter from the institution
    - Are typically 3-6 months duration
@@ -61,37 +56,201 @@ Analyze the following job posting and categorize it into EXACTLY ONE category:
    - Have competitive salaries
    - Expect immediate contribution
    - Keywords: "2+ years experience", "permanent position", "full-time", "senior", "manager"
+"""
+
+# Concurrent requests in flight during abatch_categorize
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Retries per opportunity on 429/5xx/connection errors before falling back to keywords
+DEFAULT_MAX_RETRIES = 4
+
+# Postings per request in packed mode (1 = one request per posting)
+DEFAULT_PACK_SIZE = 1
+
+# Threads the blocking OpenAI requests of every batch share; each batch's
+# max_concurrency still caps its own requests, and threads start only as needed
+DEFAULT_REQUEST_THREADS = 64
+
+# Completion budget per posting in a packed answer, e.g. `"12": "internship", `
+PACKED_TOKENS_PER_ITEM = 8
+
+_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def _parse_packed(content: str, count: int) -> list[Optional[OpportunityType]]:
+    """Parse a packed answer like {"1": "job", "2": "attachment"}"""
+    labels = [None] * count
+    match = _JSON_OBJECT.search(content or '')
+    if not match:
+        return labels
+    try:
+        answer = json.loads(match.group(0))
+    except ValueError:
+        return labels
+    if not isinstance(answer, dict):
+        return labels
+    
+    for number in range(1, count + 1):
+        label = answer.get(str(number))
+        if isinstance(label, str) and label.strip().lower() in OPPORTUNITY_TYPES:
+            labels[number - 1] = label.strip().lower()
+    return labels
 
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+class OpportunityCategorizer:
+    def __init__(
+        self,
+        client=None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        cache=None,
+        preclassifier=None
+    ):
+        """
+        Args:
+            client: OpenAI-compatible client (defaults to OpenAI with OPENAI_API_KEY)
+            cache: Optional CategoryCache consulted by the batch methods
+            preclassifier: Optional PreClassifier that labels obvious postings
+                in the batch methods without calling the model
+            requests_per_minute: Request budget for abatch_categorize
+                (defaults to OPENAI_REQUESTS_PER_MINUTE, unlimited if unset)
+            tokens_per_minute: Token budget for abatch_categorize
+                (defaults to OPENAI_TOKENS_PER_MINUTE, unlimited if unset)
+        """
+        self.client = client or OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.requests_per_minute = requests_per_minute or _env_float('OPENAI_REQUESTS_PER_MINUTE')
+        self.tokens_per_minute = tokens_per_minute or _env_float('OPENAI_TOKENS_PER_MINUTE')
+        self.cache = cache
+        self.preclassifier = preclassifier
+        self.last_stats = {}
+        # Cumulative API usage; requests may complete on worker threads
+        self.usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        self._usage_lock = threading.Lock()
+        # The OpenAI client is blocking, so requests run on a pool made on first use
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+    def categorize(
+        self,
+        title: str,
+        description: str,
+        company: str = ""
+    ) -> OpportunityType:
+        """
+        Categorize an opportunity using GPT-4.
+        
+        Args:
+            title: Job title
+            description: Full job description
+            company: Company name (optional)
+            
+        Returns:
+            'attachment', 'internship', or 'job'
+        """
+        try:
+            result = self._request_category(self._build_prompt(title, description, company))
+        except Exception as e:
+            print(f"Error categorizing with GPT-4: {e}")
+            return self._fallback_categorize(title, description)
+        
+        # Validate response, falling back to keyword-based classification
+        return result or self._fallback_categorize(title, description)
+    
+    def _build_prompt(self, title: str, description: str, company: str) -> str:
+        return f"""You are an expert at categorizing job opportunities in Kenya. 
+Analyze the following job posting and categorize it into EXACTLY ONE category:
+
+{CATEGORY_RUBRIC}
 **Job Posting:**
 Title: {title}
 Company: {company}
 Description: {description[:1500]}
 
 Respond with ONLY ONE WORD: attachment, internship, or job"""
+    
+    def _build_packed_prompt(self, opportunities: list[Opportunity]) -> str:
+        postings = "\n\n".join(
+            f"[{number}]\n"
+            f"Title: {opp.title}\n"
+            f"Company: {opp.company}\n"
+            f"Description: {(opp.description or '')[:1500]}"
+            for number, opp in enumerate(opportunities, start=1)
+        )
+        return f"""You are an expert at categorizing job opportunities in Kenya. 
+Analyze each of the following {len(opportunities)} job postings and categorize each into EXACTLY ONE category:
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a job classification expert. Respond with only: attachment, internship, or job"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=10
-            )
-            
-            result = response.choices[0].message.content.strip().lower()
-            
-            # Validate response
-            if result in ['attachment', 'internship', 'job']:
-                return result
-            else:
-                # Fallback to keyword-based classification
-                return self._fallback_categorize(title, description)
-                
-        except Exception as e:
-            print(f"Error categorizing with GPT-4: {e}")
-            return self._fallback_categorize(title, description)
+{CATEGORY_RUBRIC}
+**Job Postings:**
+{postings}
+
+Respond with ONLY a JSON object mapping each posting number to its category, for example: {{"1": "job", "2": "attachment"}}"""
+    
+    def _record_usage(self, response):
+        usage = getattr(response, 'usage', None)
+        with self._usage_lock:
+            self.usage['requests'] += 1
+            if usage is not None:
+                self.usage['prompt_tokens'] += usage.prompt_tokens or 0
+                self.usage['completion_tokens'] += usage.completion_tokens or 0
+        metrics.inc('llm_requests')
+        if usage is not None:
+            metrics.inc('llm_prompt_tokens', usage.prompt_tokens or 0)
+            metrics.inc('llm_completion_tokens', usage.completion_tokens or 0)
+    
+    def _request_category(self, prompt: str) -> Optional[OpportunityType]:
+        """
+        Send one categorization request (blocking).
+        
+        Returns:
+            The category, or None if the model answered something else.
+            API errors propagate to the caller.
+        """
+        response = self.client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=10
+        )
+        self._record_usage(response)
+        
+        result = response.choices[0].message.content.strip().lower()
+        return result if result in OPPORTUNITY_TYPES else None
+    
+    def _request_packed(self, prompt: str, count: int) -> list[Optional[OpportunityType]]:
+        """
+        Send one packed categorization request for `count` postings (blocking).
+        
+        Returns:
+            One category per posting, None where the answer was missing or
+            not a valid category. API errors propagate to the caller.
+        """
+        response = self.client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=PACKED_TOKENS_PER_ITEM * count + 10
+        )
+        self._record_usage(response)
+        
+        return _parse_packed(response.choices[0].message.content, count)
     
     def _fallback_categorize(self, title: str, description: str) -> OpportunityType:
         """
@@ -123,24 +282,206 @@ Respond with ONLY ONE WORD: attachment, internship, or job"""
         else:
             return 'job'
     
-    def batch_categorize(self, opportunities: list[dict]) -> list[dict]:
+    def batch_categorize(self, opportunities: list[Opportunity]) -> list[Opportunity]:
         """
         Categorize multiple opportunities.
         
+        Obvious postings (see PreClassifier) and postings found in the
+        cache are not sent to the model.
+        
         Args:
-            opportunities: List of dicts with 'title', 'description', 'company'
+            opportunities: Postings to categorize
             
         Returns:
-            Same list with 'type' field added
+            Same list with `type` filled in
         """
-        for opp in opportunities:
-            opp['type'] = self.categorize(
-                title=opp.get('title', ''),
-                description=opp.get('description', ''),
-                company=opp.get('company', '')
-            )
+        misses = self._resolve_locally(opportunities)
         
+        results = {}
+        for key, opp in misses:
+            try:
+                result = self._request_category(self._build_prompt(
+                    opp.title, opp.description or '', opp.company
+                ))
+            except Exception as e:
+                print(f"Error categorizing with GPT-4: {e}")
+                result = None
+            self._finish(opp, key, result, results)
+        
+        if self.cache is not None:
+            self.cache.put_many(results)
         return opportunities
+    
+    def rate_limiter(self) -> RateLimiter:
+        """A limiter enforcing this categorizer's requests/tokens-per-minute budgets"""
+        return RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+    
+    async def abatch_categorize(
+        self,
+        opportunities: list[Opportunity],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        pack_size: int = DEFAULT_PACK_SIZE,
+        limiter: Optional[RateLimiter] = None
+    ) -> list[Opportunity]:
+        """
+        Categorize multiple opportunities concurrently.
+        
+        Obvious postings (see PreClassifier) and postings found in the
+        cache are not sent to the model. For the rest, at most
+        `max_concurrency` requests are in flight, subject to the
+        requests/tokens-per-minute budgets. Rate-limited and failed
+        requests are retried with exponential backoff; an opportunity
+        that still fails falls back to keyword classification without
+        holding up the rest of the batch.
+        
+        With pack_size > 1, postings are sent `pack_size` per request with
+        the rubric included once. Postings whose packed answer is missing
+        or invalid are re-sent individually.
+        
+        Args:
+            opportunities: Postings to categorize
+            max_concurrency: Maximum requests in flight
+            max_retries: Retries per request before falling back
+            pack_size: Postings per request
+            limiter: Rate limiter shared with concurrent calls (a fresh one
+                built from the configured budgets if omitted)
+            
+        Returns:
+            Same list with `type` filled in
+        """
+        misses = self._resolve_locally(opportunities)
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=DEFAULT_REQUEST_THREADS, thread_name_prefix='categorize')
+        pool = _RequestPool(
+            limiter or self.rate_limiter(),
+            max_concurrency, self._executor, max_retries
+        )
+        if pack_size > 1:
+            packs = [misses[i:i + pack_size] for i in range(0, len(misses), pack_size)]
+            answers = await asyncio.gather(*(
+                self._categorize_pack([opp for _, opp in pack], pool) for pack in packs
+            ))
+            answers = [label for pack_answers in answers for label in pack_answers]
+        else:
+            answers = await asyncio.gather(*(
+                self._categorize_one(opp, pool) for _, opp in misses
+            ))
+        
+        results = {}
+        for (key, opp), result in zip(misses, answers):
+            self._finish(opp, key, result, results)
+        
+        if self.cache is not None:
+            self.cache.put_many(results)
+        return opportunities
+    
+    async def _categorize_one(self, opp: Opportunity, pool: '_RequestPool') -> Optional[OpportunityType]:
+        prompt = self._build_prompt(opp.title, opp.description or '', opp.company)
+        # Rough token cost: ~4 characters per prompt token, plus the completion
+        tokens = (len(SYSTEM_PROMPT) + len(prompt)) // 4 + 10
+        try:
+            return await pool.call(tokens, self._request_category, prompt)
+        except Exception as e:
+            print(f"Error categorizing with GPT-4: {e}")
+            return None
+    
+    async def _categorize_pack(self, opps: list[Opportunity], pool: '_RequestPool') -> list[Optional[OpportunityType]]:
+        prompt = self._build_packed_prompt(opps)
+        tokens = (len(PACKED_SYSTEM_PROMPT) + len(prompt)) // 4 + PACKED_TOKENS_PER_ITEM * len(opps) + 10
+        try:
+            labels = await pool.call(tokens, self._request_packed, prompt, len(opps))
+        except Exception as e:
+            print(f"Error categorizing with GPT-4: {e}")
+            return [None] * len(opps)
+        
+        # Re-send only the postings the packed answer got wrong
+        malformed = [i for i, label in enumerate(labels) if label is None]
+        retried = await asyncio.gather(*(self._categorize_one(opps[i], pool) for i in malformed))
+        for i, label in zip(malformed, retried):
+            labels[i] = label
+        return labels
+    
+    def _resolve_locally(self, opportunities: list[Opportunity]) -> list[tuple]:
+        """
+        Fill in `type` for obvious and cached postings.
+        
+        Returns:
+            (cache key, opportunity) pairs still needing the model
+        """
+        total = len(opportunities)
+        if self.preclassifier is not None:
+            opportunities = self.preclassifier.split(opportunities)
+            avoided = total - len(opportunities)
+            if total:
+                print(f"⚡ Pre-classified locally: {avoided}/{total} ({avoided / total:.0%}), LLM calls avoided")
+        
+        keys = [
+            posting_key(opp.title, opp.company, opp.description or '')
+            for opp in opportunities
+        ]
+        cached = self.cache.get_many(keys) if self.cache is not None else {}
+        
+        misses = []
+        for key, opp in zip(keys, opportunities):
+            if key in cached:
+                opp.type = cached[key]
+            else:
+                misses.append((key, opp))
+        
+        hits = len(opportunities) - len(misses)
+        metrics.inc('category_preclassified', total - len(opportunities))
+        if self.cache is not None:
+            metrics.inc('category_cache_hits', hits)
+            metrics.inc('category_cache_misses', len(misses))
+        self.last_stats = {
+            'preclassified': total - len(opportunities),
+            'cache_hits': hits,
+            'cache_misses': len(misses)
+        }
+        if self.cache is not None and opportunities:
+            print(f"🗃️  Category cache: {hits}/{len(opportunities)} hits ({hits / len(opportunities):.0%})")
+        return misses
+    
+    def _finish(self, opp: Opportunity, key: str, result: Optional[OpportunityType], results: dict):
+        """Record a model answer, or fall back to keywords (fallbacks are not cached)"""
+        if result:
+            opp.type = results[key] = result
+        else:
+            metrics.inc('category_fallbacks')
+            opp.type = self._fallback_categorize(opp.title, opp.description or '')
+
+
+class _RequestPool:
+    """Concurrency, rate limit and retry policy shared by one batch's requests"""
+    
+    def __init__(self, limiter: RateLimiter, max_concurrency: int, executor, max_retries: int):
+        self.limiter = limiter
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.executor = executor
+        self.max_retries = max_retries
+    
+    async def call(self, tokens: int, request, *args):
+        """Run a blocking request, retrying retryable errors with jittered backoff"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                await self.limiter.acquire(tokens)
+                started = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(self.executor, request, *args)
+                except Exception as e:
+                    retryable = _is_retryable(e)
+                    metrics.inc('llm_errors', retryable=retryable)
+                    if attempt == self.max_retries or not retryable:
+                        raise
+                    metrics.inc('llm_retries')
+                else:
+                    metrics.observe('llm_request_seconds', time.perf_counter() - started)
+                    return result
+            # Backing off outside the slot leaves it to requests that can go now
+            await asyncio.sleep(min(30, 2 ** attempt) * (0.5 + random.random()))
 
 
 # Example usage
@@ -0,0 +1,136 @@
+"""
+Crawl checkpoints for KaziLink
+An append-only journal of the run's progress, so a run that dies can be resumed
+"""
+
+import dataclasses
+import json
+import os
+from typing import Dict, Iterable, List, Set
+
+from models import Opportunity
+
+DEFAULT_CHECKPOINT_PATH = '.cache/crawl.journal'
+
+
+@dataclasses.dataclass
+class ResumeState:
+    """What an interrupted run had done, rebuilt from its journal"""
+    pages: Dict[str, int] = dataclasses.field(default_factory=dict)
+    sites_done: Set[str] = dataclasses.field(default_factory=set)
+    jobs: Dict[str, Opportunity] = dataclasses.field(default_factory=dict)
+    saved: Set[str] = dataclasses.field(default_factory=set)
+
+    def start_page(self, site: str) -> int:
+        """First listing page of `site` not yet fully processed"""
+        return self.pages.get(site, 0) + 1
+
+    def pending(self) -> List[Opportunity]:
+        """Jobs extracted but not stored, with their category where one was found"""
+        return [job for url, job in self.jobs.items() if url not in self.saved]
+
+    def urls(self) -> Set[str]:
+        """Every URL the run had seen, aliases included"""
+        urls = set(self.jobs)
+        for job in self.jobs.values():
+            urls.update(job.alias_urls)
+        return urls
+
+
+class CrawlJournal:
+    """
+    Append-only JSON-lines journal of a run's progress.
+
+    Records listing pages whose jobs have all been taken, sites finished,
+    jobs extracted (and near-duplicate aliases found), categories given
+    and rows stored. Each record is flushed as it is written, so a crash
+    loses at most the record being written; a torn last line is ignored
+    on load.
+
+    A fresh run truncates the journal; a resumed one loads it and keeps
+    appending. The journal is removed once a run completes cleanly.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._file = None
+
+    def open(self, resume: bool = False) -> ResumeState:
+        """
+        Start journaling.
+
+        Returns:
+            The interrupted run's state when resuming (empty otherwise)
+        """
+        state = self.load() if resume else ResumeState()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        return state
+
+    def load(self) -> ResumeState:
+        state = ResumeState()
+        if not os.path.exists(self.path):
+            return state
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from the crash that ended the run
+                    continue
+                event = record['e']
+                if event == 'page':
+                    state.pages[record['site']] = max(state.pages.get(record['site'], 0), record['page'])
+                elif event == 'site':
+                    state.sites_done.add(record['site'])
+                elif event == 'job':
+                    job = Opportunity(**record['job'])
+                    job.alias_urls = tuple(job.alias_urls)
+                    state.jobs[job.source_url] = job
+                elif event == 'alias':
+                    job = state.jobs.get(record['url'])
+                    if job is not None:
+                        job.alias_urls += (record['alias'],)
+                elif event == 'types':
+                    for url, category in record['types'].items():
+                        if url in state.jobs:
+                            state.jobs[url].type = category
+                elif event == 'saved':
+                    state.saved.update(record['urls'])
+        return state
+
+    def _write(self, record: Dict):
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def page_done(self, site: str, page: int):
+        self._write({'e': 'page', 'site': site, 'page': page})
+
+    def site_done(self, site: str):
+        self._write({'e': 'site', 'site': site})
+
+    def job(self, job: Opportunity):
+        self._write({'e': 'job', 'job': dataclasses.asdict(job)})
+
+    def alias(self, url: str, alias: str):
+        self._write({'e': 'alias', 'url': url, 'alias': alias})
+
+    def categorized(self, jobs: Iterable[Opportunity]):
+        self._write({'e': 'types', 'types': {job.source_url: job.type for job in jobs}})
+
+    def saved(self, urls: Iterable[str]):
+        self._write({'e': 'saved', 'urls': list(urls)})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """Close and remove the journal: the run it describes is complete"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
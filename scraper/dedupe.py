@@ -0,0 +1,186 @@
+"""
+Near-duplicate detection for KaziLink
+MinHash signatures with LSH banding, so cross-posted vacancies are categorized and stored once
+"""
+
+import re
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from models import Opportunity, UNKNOWN_TITLE, UNKNOWN_COMPANY, DEFAULT_LOCATION, NO_DESCRIPTION
+
+# Estimated Jaccard similarity of shingle sets above which two postings are the same vacancy
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+# MinHash bins per signature
+DEFAULT_NUM_PERM = 64
+
+# Words per shingle
+DEFAULT_SHINGLE_SIZE = 3
+
+# Leading description characters that count towards similarity: about a
+# listing snippet, so boards showing more or less of a posting still compare alike
+DESCRIPTION_CHARS = 200
+
+# Description words a posting needs before it can match another: a title,
+# company and location alone are shared by too many different vacancies
+MIN_DESCRIPTION_WORDS = 12
+
+# Scraper stand-ins, which say nothing about the vacancy and are left out of shingles
+PLACEHOLDERS = frozenset(value.lower() for value in (UNKNOWN_TITLE, UNKNOWN_COMPANY, DEFAULT_LOCATION, NO_DESCRIPTION))
+
+_WORD = re.compile(r'[a-z0-9]+')
+_EMPTY = 0xFFFFFFFF
+
+
+def _words(opp: Opportunity) -> Tuple[List[str], int]:
+    """
+    The words of `opp` that count towards similarity, and how many of them
+    come from its description. Placeholder values are skipped, and so is a
+    description that only repeats the title.
+    """
+    fields = [value.strip().lower() for value in (opp.title, opp.company, opp.location)]
+    description = (opp.description or '').strip().lower()
+    if description == fields[0]:
+        description = ''
+    words = [word for value in fields if value not in PLACEHOLDERS for word in _WORD.findall(value)]
+    described = _WORD.findall(description[:DESCRIPTION_CHARS]) if description not in PLACEHOLDERS else []
+    return words + described, len(described)
+
+
+def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm whose LSH S-curve
+    threshold, (1 / bands) ** (1 / rows), is the highest not above
+    `threshold`, so true duplicates are rarely missed.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    Finds postings that are near-duplicates of ones seen earlier in a run.
+
+    Each posting's normalized title, company, location and description is cut into
+    word shingles and summarized as a one-permutation MinHash signature
+    (one hash per shingle). Signatures are split into LSH bands, so a new
+    posting is only compared with postings sharing a band with it, and
+    each run stays close to linear in the number of postings.
+
+    Only postings from different boards match (a board lists each of its
+    vacancies once), and only postings with at least
+    MIN_DESCRIPTION_WORDS words of real description are indexed at all.
+    The first posting seen of a vacancy is its canonical record; later
+    copies become its alias URLs.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[array] = []
+        self._records: List[Opportunity] = []
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def signature(self, opp: Opportunity) -> Optional[array]:
+        """MinHash signature of `opp`, or None if it has too little description to compare"""
+        words, described = _words(opp)
+        if described < MIN_DESCRIPTION_WORDS:
+            return None
+        size = min(self.shingle_size, len(words))
+
+        k = self.num_perm
+        mins = [_EMPTY] * k
+        for i in range(len(words) - size + 1):
+            h = zlib.crc32(' '.join(words[i:i + size]).encode())
+            b = h % k
+            v = h // k
+            if v < mins[b]:
+                mins[b] = v
+
+        # Fill empty bins from the next filled one, so short postings still compare fairly
+        if _EMPTY in mins:
+            filled = mins[:]
+            for j in range(k):
+                if filled[j] == _EMPTY:
+                    d = 1
+                    while filled[(j + d) % k] == _EMPTY:
+                        d += 1
+                    mins[j] = (filled[(j + d) % k] + d * 0x9E3779B1) & 0xFFFFFFFF
+        return array('I', mins)
+
+    def similarity(self, a: array, b: array) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def add(self, opp: Opportunity) -> Optional[Opportunity]:
+        """
+        Index `opp`, unless it duplicates a posting already indexed.
+
+        Returns:
+            The canonical record `opp` duplicates, or None if it is new
+        """
+        signature = self.signature(opp)
+        if signature is None:
+            return None
+
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        keys = [raw[band * width:(band + 1) * width] for band in range(self.bands)]
+
+        best, best_similarity = None, self.threshold
+        seen = set()
+        for band, key in enumerate(keys):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if self._records[candidate].source_platform == opp.source_platform:
+                    continue
+                self.comparisons += 1
+                similarity = self.similarity(signature, self._signatures[candidate])
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+        if best is not None:
+            return self._records[best]
+
+        index = len(self._records)
+        self._records.append(opp)
+        self._signatures.append(signature)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(index)
+        return None
+
+    def dedupe(self, opportunities: List[Opportunity]) -> List[Opportunity]:
+        """
+        Drop near-duplicates, adding their URLs to the canonical records.
+
+        Returns:
+            The canonical records, in order
+        """
+        unique = []
+        for opp in opportunities:
+            canonical = self.add(opp)
+            if canonical is None:
+                unique.append(opp)
+            else:
+                canonical.alias_urls += (opp.source_url,)
+        return unique
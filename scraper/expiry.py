@@ -0,0 +1,93 @@
+"""
+Listing expiry for KaziLink
+Marks stored opportunities expired once boards stop listing them or their deadline passes
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from metrics import metrics
+from search_index import SearchIndex
+from storage import chunked, round_trip
+
+# Complete crawls of a board in a row that must miss a listing before it is expired
+DEFAULT_MISSED_RUNS = 3
+
+# URLs per sighting update
+DEFAULT_SEEN_BATCH_SIZE = 1000
+
+
+class Sightings:
+    """
+    The listings each board showed during one run.
+
+    A board counts as completely read only when its crawl ran out of
+    listings (see SiteScraper.iter_jobs) having listed at least one, so a
+    board that came back empty, e.g. blocked or redesigned, never makes
+    everything it had look gone.
+    """
+
+    def __init__(self):
+        self.urls: Set[str] = set()
+        self._listed: Dict[str, int] = {}
+        self._ended: Set[str] = set()
+
+    def listed(self, site: str, urls: List[str]):
+        self.urls.update(urls)
+        self._listed[site] = self._listed.get(site, 0) + len(urls)
+
+    def ended(self, site: str):
+        self._ended.add(site)
+
+    def complete_sites(self) -> List[str]:
+        """Boards every listing of which was seen this run"""
+        return sorted(site for site in self._ended if self._listed.get(site))
+
+
+def sweep(
+    store,
+    sightings: Sightings,
+    run_started: datetime,
+    max_missed_runs: int = DEFAULT_MISSED_RUNS,
+    batch_size: int = DEFAULT_SEEN_BATCH_SIZE,
+    search_index: Optional[SearchIndex] = None
+) -> Dict[str, int]:
+    """
+    Bring stored listings' status up to date after a run, in set-based updates.
+
+    Rows listed this run are marked seen `batch_size` URLs per request;
+    active rows of completely read boards that were not are charged a
+    missed run; then rows missing from `max_missed_runs` runs in a row (0
+    to never expire for that) or past their application deadline are
+    expired in one statement, and dropped from `search_index`.
+
+    Args:
+        run_started: When the run began, stored as each sighting's time (naive UTC)
+
+    Returns:
+        Dict with 'seen', 'missed', 'expired_unseen' and 'expired_deadline' row counts
+    """
+    started = time.perf_counter()
+    counts = {'seen': 0, 'missed': 0, 'expired_unseen': 0, 'expired_deadline': 0}
+
+    for batch in chunked(sorted(sightings.urls), batch_size):
+        counts['seen'] += round_trip('seen', store.mark_seen, batch, run_started)
+
+    platforms = sightings.complete_sites()
+    if platforms:
+        counts['missed'] = round_trip('missed', store.record_missed, platforms, run_started)
+
+    expired = round_trip('expire', store.expire_stale, max_missed_runs)
+    for row in expired:
+        counts[f"expired_{row['reason']}"] += 1
+    if search_index is not None and expired:
+        try:
+            search_index.remove([row['source_url'] for row in expired])
+        except Exception as e:
+            print(f"⚠️  Search index not updated for expired listings: {e}")
+
+    for action, count in counts.items():
+        metrics.set('expiry_rows', count, action=action)
+    metrics.set('expiry_seconds', time.perf_counter() - started)
+    return counts
@@ -0,0 +1,307 @@
+"""
+Rule-based field extraction for KaziLink
+Fills deadline, salary, experience, education, industry and remote flags from posting text, without LLM calls
+"""
+
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+from models import Opportunity
+
+# Characters scanned from each end of a very long description: requirements
+# and pay sit near the top of most postings, deadlines near the bottom
+DESCRIPTION_CHARS = 6000
+
+# Industry keyword matches in the title count this many times more than in the description
+TITLE_WEIGHT = 3.0
+
+# Score an industry needs; a lone mention in the description is not enough
+MIN_INDUSTRY_SCORE = 2.0
+
+_MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+_MONTH = r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)'
+_DAY = r'\d{1,2}(?:st|nd|rd|th)?'
+_DATE = (
+    rf'(?:{_DAY}(?:\s+of)?\s+{_MONTH}\.?,?\s+\d{{4}}'
+    rf'|{_MONTH}\.?\s+{_DAY},?\s+\d{{4}}'
+    r'|\d{1,2}[/.-]\d{1,2}[/.-]\d{4}'
+    r'|\d{4}-\d{2}-\d{2})'
+)
+_NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+_COUNT = r'(?:\d{1,2}|one|two|three|four|five|six|seven|eight|nine|ten)(?:\s*\(\d{1,2}\))?'
+_CURRENCY = r'(?:\bkshs?\.?|\bkes\b|\busd\b|\bus\$|\$)'
+_AMOUNT = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?\s?k\b|\d+(?:\.\d+)?'
+_PERIOD = r'(?:\s?(?:per|/|a)\s?(?:month|annum|year|hour|day|week)\b|\s?(?:monthly\b|annually\b|p\.?\s?m\b\.?))'
+
+# (field, triggers, lead, pattern). Every match of a pattern contains one
+# of its trigger words at most `lead` characters in, so it is only searched
+# for in postings containing one, from just before the first. A field
+# takes the first of its rules that matches.
+RULES = [
+    ('deadline', ('deadline', 'clos', 'apply', 'later than', 'before', 'reach us'), 14,
+     r'\b(?:deadline|closing date|closes? on|apply (?:on or )?(?:before|by)|not later than|on or before'
+     r'|applications? (?:close[sd]?|should reach us)(?: on| by)?)\b\W{0,5}(?:[a-z]+\W+){0,4}?' + _DATE),
+    ('salary', ('ksh', 'kes', 'usd', '$', 'salary'), 3,
+     rf'(?:{_CURRENCY}|\bsalary(?:\s+range)?(?:\s+of|\s+is|:|\s+-)?\s*{_CURRENCY}?)\s?(?:{_AMOUNT})'
+     rf'(?:\s?(?:-|–|to)\s?{_CURRENCY}?\s?(?:{_AMOUNT}))?{_PERIOD}?'),
+    ('salary_text', ('salary',), 0, r'\bsalary(?:\s+range)?(?:\s+is|:|\s+-)?\s*(?:negotiable|competitive|attractive)\b'),
+    ('experience', ('experience',), 80,
+     rf'\b(?:(?:a\s+)?(?:minimum|at least|over|more than)\s+(?:of\s+)?)?{_COUNT}'
+     rf'(?:\s*(?:-|–|to)\s*{_COUNT})?\s*\+?\s*years?\'?\s+(?:of\s+)?(?:[a-z\-]+\s+){{0,3}}?experience\b'),
+    ('no_experience', ('experience', 'entry'), 12,
+     r'\b(?:no (?:prior |previous |work )?experience (?:is )?(?:required|needed|necessary)|entry[- ]level)\b'),
+    ('education', ('ph', 'doctor', 'master', 'sc', 'mba', 'bachelor', 'com', 'degree', 'diploma', 'certificate', 'kcse', 'level'), 20,
+     r'\b(?:ph\.?\s?d|doctorate|masters?\'?s?\s+degree|masters\b|m\.?\s?sc|mba|bachelor\'?s?|b\.?\s?sc|b\.?\s?com'
+     r'|(?:university|undergraduate|first)\s+degree|degree\s+(?:in|holder)|higher\s+diploma|diploma'
+     r'|certificate\s+(?:in|course)|kcse|o[- ]level)\b'),
+    ('remote_no', ('remote', 'site only'), 14, r'\b(?:not (?:a )?remote|no remote|on[- ]site only)\b'),
+    ('remote', ('remote', 'from home', 'wfh'), 12,
+     r'\b(?:(?:fully |100% )?remote(?:ly)?(?!\s+(?:areas?|parts|locations?|regions?|sites?|field|villages?|counties|rural))'
+     r'|work(?:ing)? from home|wfh)\b'),
+]
+
+# (industry, keywords), in priority order for ties. Single words match
+# whole words; phrases match anywhere.
+INDUSTRIES = [
+    ('Technology', ('software', 'developer', 'programmer', 'ict', 'it support', 'data analyst', 'data scientist',
+                    'data engineer', 'network', 'cloud', 'devops', 'web', 'mobile app', 'cybersecurity',
+                    'cyber security', 'systems administrator')),
+    ('Banking & Finance', ('bank', 'banking', 'microfinance', 'sacco', 'insurance', 'accountant', 'accounting',
+                           'accounts', 'audit', 'auditor', 'finance', 'financial', 'credit', 'loan', 'loans', 'tax')),
+    ('Healthcare', ('hospital', 'clinic', 'clinical', 'nurse', 'nursing', 'medical', 'pharmacy', 'pharmacist',
+                    'health', 'healthcare', 'laboratory', 'doctor')),
+    ('Education', ('teacher', 'teachers', 'teaching', 'school', 'schools', 'tutor', 'tutors', 'lecturer',
+                   'education', 'educational', 'curriculum')),
+    ('NGO & Development', ('ngo', 'humanitarian', 'donor', 'monitoring and evaluation', 'm&e',
+                           'community development', 'programme officer', 'relief')),
+    ('Sales & Marketing', ('sales', 'marketing', 'brand', 'business development', 'customer acquisition',
+                           'merchandiser', 'merchandising')),
+    ('Engineering & Construction', ('civil', 'construction', 'mechanical', 'electrical', 'site engineer',
+                                    'quantity surveyor', 'architect', 'architecture', 'building')),
+    ('Agriculture', ('agriculture', 'agricultural', 'farm', 'farming', 'agronomy', 'agronomist', 'horticulture',
+                     'horticultural', 'livestock', 'agribusiness')),
+    ('Hospitality & Tourism', ('hotel', 'hospitality', 'chef', 'cook', 'tourism', 'restaurant', 'front office',
+                               'housekeeping')),
+    ('Logistics & Supply Chain', ('logistics', 'supply chain', 'procurement', 'warehouse', 'driver', 'drivers',
+                                  'transport', 'fleet', 'clearing and forwarding')),
+    ('Media & Communications', ('journalist', 'journalism', 'media', 'communications officer',
+                                'communications manager', 'content writer', 'content creator', 'editor',
+                                'public relations')),
+    ('Legal', ('legal', 'lawyer', 'advocate', 'paralegal', 'compliance', 'litigation')),
+    ('Human Resources', ('human resource', 'human resources', 'hr', 'recruitment', 'talent acquisition', 'payroll')),
+    ('Manufacturing', ('manufacturing', 'production', 'factory', 'quality control', 'quality assurance',
+                       'plant operator', 'machine operator')),
+]
+
+# Education levels by the words that name them, most advanced first
+_EDUCATION_LEVELS = [
+    (re.compile(r'ph\.?\s?d|doctorate', re.I), "PhD"),
+    (re.compile(r'master|m\.?\s?sc|mba', re.I), "Master's degree"),
+    (re.compile(r'higher\s+diploma', re.I), "Higher diploma"),
+    (re.compile(r'diploma', re.I), "Diploma"),
+    (re.compile(r'certificate', re.I), "Certificate"),
+    (re.compile(r'kcse|o[- ]level', re.I), "KCSE"),
+    (re.compile(r'.', re.I), "Bachelor's degree"),
+]
+
+_RULES = [(field, triggers, lead, re.compile(pattern, re.IGNORECASE)) for field, triggers, lead, pattern in RULES]
+_INDUSTRY_WORDS = {
+    keyword: i for i, (_, keywords) in enumerate(INDUSTRIES) for keyword in keywords if ' ' not in keyword
+}
+
+
+def _phrases_by_first_word() -> Dict[str, List]:
+    phrases = {}
+    for i, (_, keywords) in enumerate(INDUSTRIES):
+        for keyword in keywords:
+            if ' ' in keyword:
+                phrases.setdefault(keyword.split()[0], []).append((keyword, i))
+    return phrases
+
+
+# Phrases by their first word, only counted in postings that have it
+_INDUSTRY_PHRASES = _phrases_by_first_word()
+# Everything but letters, digits and '&' separates words
+_SEPARATORS = str.maketrans({chr(c): ' ' for c in range(128) if not (chr(c).isalnum() or chr(c) == '&')})
+_DATE_PATTERN = re.compile(_DATE, re.IGNORECASE)
+_AMOUNT_PATTERN = re.compile(_AMOUNT, re.IGNORECASE)
+_PERIOD_PATTERN = re.compile(_PERIOD, re.IGNORECASE)
+_COUNT_PATTERN = re.compile(_COUNT, re.IGNORECASE)
+
+
+def parse_date(text: str) -> Optional[str]:
+    """
+    The first date in `text` as YYYY-MM-DD (None if there is none, or it is invalid).
+
+    Numeric dates are read day first, as Kenyan postings write them,
+    unless only month first makes sense.
+    """
+    match = _DATE_PATTERN.search(text)
+    if match is None:
+        return None
+    value = match.group(0).lower()
+    try:
+        if '-' in value and value[:4].isdigit():
+            year, month, day = (int(part) for part in value.split('-'))
+        elif value[0].isdigit() and not re.search(r'[a-z]', value):
+            day, month, year = (int(part) for part in re.split(r'[/.-]', value))
+            if month > 12 >= day:
+                day, month = month, day
+        else:
+            words = re.findall(r'[a-z]+|\d+', value)
+            month = next(_MONTHS[word[:3]] for word in words if word[:3] in _MONTHS)
+            numbers = [int(word) for word in words if word.isdigit()]
+            day, year = (numbers[0], numbers[1]) if len(numbers) > 1 else (None, None)
+        return date(year, month, day).isoformat()
+    except (TypeError, ValueError, StopIteration):
+        return None
+
+
+def _amount(text: str) -> int:
+    text = text.lower().replace(',', '').replace(' ', '')
+    if text.endswith('k'):
+        return int(float(text[:-1]) * 1000)
+    return int(float(text))
+
+
+def parse_salary(text: str) -> Optional[str]:
+    """A salary mention normalized to e.g. 'KES 50,000 - 80,000 per month' (None if no amount)"""
+    amounts = [_amount(match.group(0)) for match in _AMOUNT_PATTERN.finditer(text)]
+    if not amounts:
+        return None
+    lowered = text.lower()
+    currency = 'USD' if ('usd' in lowered or '$' in lowered) else 'KES'
+    salary = f"{currency} " + ' - '.join(f"{amount:,}" for amount in amounts[:2])
+    period = _PERIOD_PATTERN.search(text)
+    if period:
+        word = re.sub(r'[^a-z]', '', period.group(0).lower())
+        unit = {'monthly': 'month', 'pm': 'month', 'annually': 'year', 'annum': 'year'}.get(word) \
+            or next((unit for unit in ('month', 'year', 'annum', 'week', 'day', 'hour') if unit in word), None)
+        if unit:
+            salary += f" per {'year' if unit == 'annum' else unit}"
+    return salary
+
+
+def parse_experience(text: str) -> Optional[str]:
+    """An experience requirement as 'N+ years' or 'N-M years'"""
+    counts = []
+    for match in _COUNT_PATTERN.finditer(text):
+        word = match.group(0).split('(')[0].strip().lower()
+        counts.append(int(word) if word.isdigit() else _NUMBER_WORDS[word])
+    if not counts:
+        return None
+    if len(counts) > 1 and counts[1] > counts[0]:
+        return f"{counts[0]}-{counts[1]} years"
+    return f"{counts[0]}+ years"
+
+
+def parse_education(text: str) -> str:
+    """The education level a qualification names"""
+    return next(level for pattern, level in _EDUCATION_LEVELS if pattern.search(text))
+
+
+class FieldExtractor:
+    """
+    Fills the structured columns of opportunities from their text.
+
+    Each field takes the first rule that matches a posting: the
+    application deadline (YYYY-MM-DD, only dates with a year), salary,
+    years of experience and the first education level named. Industry goes
+    to the best-scoring keyword group, title words counting most; remote
+    postings are the ones that say so in their title, location or
+    description, unless they also say they are not.
+    """
+
+    def extract(self, opp: Opportunity) -> Dict:
+        """
+        Returns:
+            The fields found in one posting (absent fields left out,
+            'is_remote' always present)
+        """
+        description = opp.description or ''
+        if len(description) > 2 * DESCRIPTION_CHARS:
+            description = f"{description[:DESCRIPTION_CHARS]}\n{description[-DESCRIPTION_CHARS:]}"
+        text = f"{opp.title or ''}\n{opp.location or ''}\n{description}"
+        lowered = text.lower()
+
+        found = {}
+        for rule, triggers, lead, pattern in _RULES:
+            field, parse = _PARSERS[rule]
+            if field in found:
+                continue
+            first = min((at for at in map(lowered.find, triggers) if at >= 0), default=-1)
+            if first < 0:
+                continue
+            match = pattern.search(text, max(0, first - lead))
+            if match is not None:
+                value = parse(match.group(0))
+                if value is not None:
+                    found[field] = value
+
+        fields = {name: value for name, value in found.items() if not name.startswith('remote')}
+        fields['is_remote'] = found.get('remote', False) and not found.get('remote_no', False)
+
+        scores = {}
+        _score_industries((opp.title or '').lower(), TITLE_WEIGHT, scores)
+        _score_industries(lowered[len(text) - len(description):], 1.0, scores)
+        if scores:
+            # Ties go to the industry listed first
+            industry, score = max(scores.items(), key=lambda item: (item[1], -item[0]))
+            if score >= MIN_INDUSTRY_SCORE:
+                fields['industry'] = INDUSTRIES[industry][0]
+        return fields
+
+    def extract_batch(self, opportunities: List[Opportunity]) -> List[Dict]:
+        """The fields found in each posting (see extract)"""
+        return [self.extract(opp) for opp in opportunities]
+
+    def apply(self, opportunities: List[Opportunity]) -> int:
+        """
+        Set the extracted fields on opportunities, leaving fields a scraper
+        already filled alone.
+
+        Returns:
+            Number of fields filled
+        """
+        filled = 0
+        for opp, fields in zip(opportunities, self.extract_batch(opportunities)):
+            for name, value in fields.items():
+                if name == 'is_remote':
+                    if value and not opp.is_remote:
+                        opp.is_remote = True
+                        filled += 1
+                elif getattr(opp, name) is None:
+                    setattr(opp, name, value)
+                    filled += 1
+        return filled
+
+
+_PARSERS = {
+    'deadline': ('application_deadline', parse_date),
+    'salary': ('salary_range', parse_salary),
+    'salary_text': ('salary_range', lambda text: text.split()[-1].capitalize()),
+    'experience': ('experience_required', parse_experience),
+    'no_experience': ('experience_required', lambda text: "Entry level"),
+    'education': ('education_level', parse_education),
+    'remote': ('remote', lambda text: True),
+    'remote_no': ('remote_no', lambda text: True),
+}
+
+
+def _score_industries(lowered: str, weight: float, scores: Dict[int, float]):
+    """Add `weight` to an industry's score for each of its keywords in `lowered`"""
+    words = lowered.translate(_SEPARATORS).split()
+    for industry in [_INDUSTRY_WORDS[word] for word in words if word in _INDUSTRY_WORDS]:
+        scores[industry] = scores.get(industry, 0.0) + weight
+    for first in _INDUSTRY_PHRASES.keys() & set(words):
+        for phrase, industry in _INDUSTRY_PHRASES[first]:
+            count = lowered.count(phrase)
+            if count:
+                scores[industry] = scores.get(industry, 0.0) + weight * count
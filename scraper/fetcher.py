@@ -0,0 +1,290 @@
+"""
+Page fetching for KaziLink
+Tries a pooled HTTP client first and escalates to the shared browser only when needed
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+import httpx
+
+from browser_pool import BrowserPool
+from http_cache import ResponseCache
+from metrics import metrics
+from scheduler import CrawlScheduler, DEFAULT_REQUESTS_PER_MINUTE, THROTTLE_STATUSES
+
+T = TypeVar('T')
+
+DEFAULT_STRATEGY_PATH = '.cache/fetch_strategies.json'
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Times a throttled (429/503) request is retried over HTTP, once its host allows
+DEFAULT_THROTTLE_RETRIES = 2
+
+# A site remembered as needing the browser is re-probed over HTTP after this long
+DEFAULT_REPROBE_SECONDS = 24 * 3600
+
+HTTP = 'http'
+BROWSER = 'browser'
+
+
+class ThrottledError(Exception):
+    """A host was still throttling a page after every retry; the browser would be turned away too"""
+
+
+class PageFetcher:
+    """
+    Fetches pages over HTTP, falling back to Playwright.
+
+    Each fetch is handed a `parse` function; if the HTTP response parses
+    to nothing usable (e.g. no job cards because the listing is rendered
+    by JavaScript) the page is fetched again in the browser. The strategy
+    that worked is remembered per site and kind of page, on disk, so later
+    runs go straight to it.
+
+    With a ResponseCache, HTTP fetches can be made conditional so pages
+    unchanged since the last committed run are not parsed at all.
+    
+    With parse_workers > 0, pages are parsed in that many worker processes
+    instead of on the event loop, which then keeps serving other fetches
+    while a large page is being parsed. `parse` functions must then be
+    picklable (see parsing.listing_parser).
+
+    Every request, over HTTP or in the browser, waits for its turn in a
+    CrawlScheduler, which keeps each host polite and adapts how many
+    requests go to it at once. A throttled request is retried after the
+    host's Retry-After rather than escalated to the browser.
+
+    Fetch and parse latency, pages by strategy and status, and skipped
+    pages are recorded per site in metrics.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[BrowserPool] = None,
+        strategy_path: Optional[str] = DEFAULT_STRATEGY_PATH,
+        user_agent: Optional[str] = None,
+        timeout: float = 20.0,
+        max_connections: int = 20,
+        rate_limits: Optional[Dict[str, float]] = None,
+        default_rate_limit: float = DEFAULT_REQUESTS_PER_MINUTE,
+        reprobe_seconds: float = DEFAULT_REPROBE_SECONDS,
+        response_cache: Optional[ResponseCache] = None,
+        parse_workers: int = 0,
+        scheduler: Optional[CrawlScheduler] = None,
+        throttle_retries: int = DEFAULT_THROTTLE_RETRIES
+    ):
+        """
+        Args:
+            pool: Browser pool for fallbacks (a private one is created if omitted)
+            strategy_path: JSON file remembering strategies (None to keep them in memory)
+            rate_limits: Requests per minute by site, overriding `default_rate_limit`
+            response_cache: Enables skipping unchanged pages (see fetch)
+            parse_workers: Parser worker processes (0 parses on the event loop)
+            scheduler: Request scheduler (one built from the rate limits if omitted)
+            throttle_retries: HTTP retries of a request answered 429/503
+        """
+        self.pool = pool or BrowserPool()
+        self._owns_pool = pool is None
+        self.strategy_path = strategy_path
+        self.user_agent = user_agent or os.getenv('SCRAPER_USER_AGENT') or DEFAULT_USER_AGENT
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.reprobe_seconds = reprobe_seconds
+        self.response_cache = response_cache
+        self.parse_workers = parse_workers
+        self.parse_executor: Optional[ProcessPoolExecutor] = None
+        self.scheduler = scheduler or CrawlScheduler(rate_limits, default_rate_limit)
+        self.throttle_retries = throttle_retries
+        self.strategies: Dict[str, Dict[str, Any]] = self._load_strategies()
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        # One keep-alive connection pool for every site; httpx negotiates
+        # gzip/deflate, and brotli when the brotli package is installed
+        self.client = httpx.AsyncClient(
+            headers={'User-Agent': self.user_agent},
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+        )
+        if self.parse_workers:
+            # Spawned, not forked: the run already has threads (model requests,
+            # storage writes) whose locks a forked child could inherit held
+            self.parse_executor = ProcessPoolExecutor(
+                self.parse_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        await self.pool.start()
+        return self
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        if self.parse_executor:
+            self.parse_executor.shutdown()
+            self.parse_executor = None
+        if self._owns_pool:
+            await self.pool.close()
+        self._save_strategies()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def fetch(
+        self,
+        site: str,
+        url: str,
+        parse: Callable[[str], T],
+        accept: Callable[[T], bool] = bool,
+        kind: str = 'listing',
+        wait_until: str = 'networkidle',
+        skip_unchanged: bool = False
+    ) -> Optional[T]:
+        """
+        Fetch `url` and return `parse(html)`.
+
+        Args:
+            site: Site name, for politeness and the browser context
+            parse: Turns page HTML into the caller's result
+            accept: Whether a parsed result is usable; unusable HTTP results
+                are retried in the browser
+            kind: Kind of page (e.g. 'listing', 'detail'); strategies are
+                remembered per site and kind
+            wait_until: Playwright load state to wait for in the browser
+            skip_unchanged: Return None without parsing when the page is
+                unchanged since it was last cached (needs a response cache)
+
+        Raises:
+            ThrottledError: The host still throttled the request after
+                `throttle_retries` retries over HTTP
+        """
+        key = f"{site}:{kind}"
+        strategy = self._strategy(key)
+        cache = self.response_cache if skip_unchanged else None
+        host = urlparse(url).netloc or site
+        if strategy == HTTP:
+            try:
+                headers = cache.conditional_headers(url) if cache else {}
+                for attempt in range(self.throttle_retries + 1):
+                    async with self.scheduler.slot(host, site, kind) as outcome:
+                        started = time.perf_counter()
+                        response = await self.client.get(url, headers=headers)
+                        outcome.record(response.status_code, response.headers.get('retry-after'))
+                    metrics.observe('fetch_seconds', time.perf_counter() - started, site=site, strategy=HTTP)
+                    metrics.inc('pages_fetched', site=site, strategy=HTTP, status=response.status_code)
+                    metrics.inc('bytes_fetched', len(response.content), site=site)
+                    if response.status_code not in THROTTLE_STATUSES or attempt == self.throttle_retries:
+                        break
+                    metrics.inc('fetch_retries', site=site)
+
+                if response.status_code in THROTTLE_STATUSES:
+                    metrics.inc('fetch_throttled', site=site)
+                    raise ThrottledError(f"{url} still throttled ({response.status_code}) after {self.throttle_retries} retries")
+                if cache and response.status_code == 304:
+                    cache.record_skip(url, not_modified=True)
+                    metrics.inc('pages_unchanged', site=site)
+                    return None
+                if response.status_code in (404, 410):
+                    # The page does not exist; a browser would not find it either
+                    return await self._parse(parse, '', site)
+                response.raise_for_status()
+                if cache and cache.is_unchanged(url, response.content):
+                    cache.record_skip(url, not_modified=False)
+                    metrics.inc('pages_unchanged', site=site)
+                    return None
+
+                result = await self._parse(parse, response.text, site)
+                if accept(result):
+                    self._remember(key, HTTP)
+                    if cache:
+                        cache.put(
+                            url, response.content,
+                            response.headers.get('etag'), response.headers.get('last-modified')
+                        )
+                    return result
+            except httpx.HTTPError as e:
+                print(f"⚠️  HTTP fetch failed for {url} ({e}), using browser")
+                metrics.inc('fetch_fallbacks', site=site)
+
+        async with self.scheduler.slot(host, site, kind):
+            started = time.perf_counter()
+            html = await self._fetch_browser(site, url, wait_until)
+        metrics.observe('fetch_seconds', time.perf_counter() - started, site=site, strategy=BROWSER)
+        metrics.inc('pages_fetched', site=site, strategy=BROWSER, status='ok')
+        result = await self._parse(parse, html, site)
+        if accept(result):
+            # Restart the re-probe clock only when HTTP was just tried and failed
+            self._remember(key, BROWSER, probed=strategy == HTTP)
+        return result
+
+    async def _parse(self, parse: Callable[[str], T], content: str, site: str = '') -> T:
+        started = time.perf_counter()
+        if self.parse_executor is None:
+            result = parse(content)
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(self.parse_executor, parse, content)
+        metrics.observe('parse_seconds', time.perf_counter() - started, site=site)
+        return result
+
+    async def _fetch_browser(self, site: str, url: str, wait_until: str) -> str:
+        async with self.pool.page(site) as page:
+            await page.goto(url, wait_until=wait_until, timeout=self.timeout * 1000)
+            return await page.content()
+
+    def _strategy(self, key: str) -> str:
+        entry = self.strategies.get(key)
+        if not entry:
+            return HTTP
+        if entry['strategy'] == BROWSER and time.time() - entry['updated'] > self.reprobe_seconds:
+            return HTTP
+        return entry['strategy']
+
+    def _remember(self, key: str, strategy: str, probed: bool = False):
+        entry = self.strategies.get(key)
+        changed = not entry or entry['strategy'] != strategy
+        if changed:
+            print(f"🧭 {key}: using {strategy} fetches")
+        if changed or probed:
+            self.strategies[key] = {'strategy': strategy, 'updated': time.time()}
+
+    def _load_strategies(self) -> Dict[str, Dict[str, Any]]:
+        if not self.strategy_path or not os.path.exists(self.strategy_path):
+            return {}
+        try:
+            with open(self.strategy_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_strategies(self):
+        if not self.strategy_path:
+            return
+        if os.path.dirname(self.strategy_path):
+            os.makedirs(os.path.dirname(self.strategy_path), exist_ok=True)
+        with open(self.strategy_path, 'w') as f:
+            json.dump(self.strategies, f, indent=2)
+
+
+@asynccontextmanager
+async def borrowed_fetcher(fetcher: Optional[PageFetcher] = None):
+    """Yield `fetcher`, or a private one for the duration when none is given"""
+    if fetcher is not None:
+        yield fetcher
+        return
+    async with PageFetcher() as own_fetcher:
+        yield own_fetcher
@@ -0,0 +1,129 @@
+"""
+HTTP response cache for KaziLink
+Remembers ETag/Last-Modified and a content hash per listing URL so unchanged pages can be skipped
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+DEFAULT_HTTP_CACHE_PATH = '.cache/http.sqlite3'
+
+# Least recently used entries beyond this are evicted
+DEFAULT_MAX_ENTRIES = 20_000
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache:
+    """
+    Validators and content hashes of previously processed pages.
+
+    New entries are held back until commit(), which the caller makes once
+    the jobs from those pages are safely stored; a run that dies before
+    that re-processes the pages next time instead of skipping them.
+    """
+
+    def __init__(self, path: str = DEFAULT_HTTP_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        self.conn.commit()
+        self._pending: Dict[str, tuple] = {}
+        self.stats = {'pages_skipped': 0, 'not_modified': 0, 'bytes_saved': 0}
+
+    def get(self, url: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_hash, size FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'content_hash': row[2], 'size': row[3]}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match/If-Modified-Since headers for `url`, if cached"""
+        entry = self.get(url)
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def is_unchanged(self, url: str, body: bytes) -> bool:
+        """Whether a full response body matches the cached content hash"""
+        entry = self.get(url)
+        return entry is not None and entry['content_hash'] == content_hash(body)
+
+    def record_skip(self, url: str, not_modified: bool):
+        """Count a skipped page; a 304 also saved the body's bytes"""
+        entry = self.get(url)
+        self.stats['pages_skipped'] += 1
+        if not_modified:
+            self.stats['not_modified'] += 1
+            self.stats['bytes_saved'] += entry['size'] if entry else 0
+        self._pending[url] = None
+
+    def put(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        """Stage a processed response; it takes effect on commit()"""
+        self._pending[url] = (etag, last_modified, content_hash(body), len(body))
+
+    def commit(self):
+        """Persist staged entries, refresh skipped ones, and evict beyond max_entries"""
+        now = time.time()
+        updates = [(url, *entry, now) for url, entry in self._pending.items() if entry is not None]
+        touched = [(now, url) for url, entry in self._pending.items() if entry is None]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO responses (url, etag, last_modified, content_hash, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            updates
+        )
+        self.conn.executemany("UPDATE responses SET last_used = ? WHERE url = ?", touched)
+
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM responses WHERE url IN "
+                "(SELECT url FROM responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self.conn.commit()
+        self._pending.clear()
+
+    def staged(self) -> Dict:
+        """Entries staged since the last commit, with the skip counters, for another process's cache to take over"""
+        return {'pending': dict(self._pending), 'stats': dict(self.stats)}
+
+    def stage(self, staged: Dict):
+        """Take over entries staged by another process's cache (see staged), to commit or discard with ours"""
+        for url, entry in staged['pending'].items():
+            # A skip only refreshes last_used; never let it drop a new entry
+            if entry is not None or url not in self._pending:
+                self._pending[url] = entry
+        for key, value in staged['stats'].items():
+            self.stats[key] = self.stats.get(key, 0) + value
+
+    def discard(self):
+        """Drop staged entries, e.g. after a dry run"""
+        self._pending.clear()
+
+    def close(self):
+        self.conn.close()
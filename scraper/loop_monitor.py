@@ -0,0 +1,65 @@
+"""
+Event-loop stall monitor for KaziLink
+Measures how long the asyncio loop is kept from running other tasks, e.g. by parsing
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+# How often the monitor asks to be woken up
+DEFAULT_INTERVAL = 0.01
+
+# Lateness below this is scheduling noise, not a stall
+DEFAULT_THRESHOLD = 0.005
+
+
+class LoopMonitor:
+    """
+    Wakes up every `interval` seconds and records how late it was.
+
+    Lateness is time some callback held the loop, during which no other
+    site's fetches or the pipeline's stages made progress.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, threshold: float = DEFAULT_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = 0
+        self.stalled = 0.0
+        self.max_stall = 0.0
+        self.elapsed = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _watch(self):
+        started = time.perf_counter()
+        try:
+            while True:
+                expected = time.perf_counter() + self.interval
+                await asyncio.sleep(self.interval)
+                late = time.perf_counter() - expected
+                if late > self.threshold:
+                    self.stalls += 1
+                    self.stalled += late
+                    self.max_stall = max(self.max_stall, late)
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._watch())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'stalls': self.stalls,
+            'stalled_seconds': self.stalled,
+            'max_stall_seconds': self.max_stall,
+            'stalled_fraction': self.stalled / self.elapsed if self.elapsed else 0.0,
+        }
@@ -0,0 +1,233 @@
+"""
+Run metrics for KaziLink
+Counters, gauges and histograms recorded during a run, reported as JSON or Prometheus text
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Upper bounds of histogram buckets for durations (names ending in _seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds of histogram buckets for sizes (rows per batch, cards per page)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# Prefix of every metric name in Prometheus output
+PROMETHEUS_PREFIX = 'kazilink_'
+
+_LE_INF = 'le="+Inf"'
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _number(value: float) -> str:
+    """Exact text for a sample value (`:g` would round large counters)"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Histogram:
+    __slots__ = ('bounds', 'buckets', 'count', 'sum', 'max')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max past the last bound)"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """
+    In-process metrics registry.
+
+    Every series is a name plus labels (e.g. site='fuzu'). Recording is a
+    dict lookup and a few additions under a lock, so instrumentation can
+    stay on in production; callers on worker threads (model requests,
+    storage writes) record safely. Histograms pick their buckets from the
+    name: durations (`*_seconds`) get LATENCY_BUCKETS, anything else
+    SIZE_BUCKETS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Key, float] = {}
+        self.gauges: Dict[Key, float] = {}
+        self.histograms: Dict[Key, _Histogram] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add `value` to a counter"""
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge"""
+        key = _key(name, labels)
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one value in a histogram"""
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                bounds = LATENCY_BUCKETS if name.endswith('_seconds') else SIZE_BUCKETS
+                histogram = self.histograms[key] = _Histogram(bounds)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the duration of the `with` block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def export(self) -> Dict:
+        """Raw series, picklable, for another process's registry to merge (see merge)"""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {
+                    key: (h.bounds, list(h.buckets), h.count, h.sum, h.max)
+                    for key, h in self.histograms.items()
+                },
+            }
+
+    def merge(self, state: Dict):
+        """Add series exported by another registry: counters and histograms add up, gauges are replaced"""
+        with self._lock:
+            for key, value in state['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.gauges.update(state['gauges'])
+            for key, (bounds, buckets, count, total, largest) in state['histograms'].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = _Histogram(bounds)
+                histogram.buckets = [a + b for a, b in zip(histogram.buckets, buckets)]
+                histogram.count += count
+                histogram.sum += total
+                histogram.max = max(histogram.max, largest)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Every series, keyed as in Prometheus (`name{label="value"}`).
+
+        Returns:
+            Dict with 'counters', 'gauges' and 'histograms'; histograms as
+            count, sum, mean, max and bucket-resolution p50/p95/p99
+        """
+        with self._lock:
+            counters = {name + _label_text(labels): value for (name, labels), value in self.counters.items()}
+            gauges = {name + _label_text(labels): value for (name, labels), value in self.gauges.items()}
+            histograms = {
+                name + _label_text(labels): {
+                    'count': h.count,
+                    'sum': h.sum,
+                    'mean': h.sum / h.count if h.count else 0.0,
+                    'max': h.max,
+                    'p50': h.quantile(0.5),
+                    'p95': h.quantile(0.95),
+                    'p99': h.quantile(0.99),
+                }
+                for (name, labels), h in self.histograms.items()
+            }
+        return {
+            'counters': dict(sorted(counters.items())),
+            'gauges': dict(sorted(gauges.items())),
+            'histograms': dict(sorted(histograms.items())),
+        }
+
+    def to_prometheus(self) -> str:
+        """Every series in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    full = PROMETHEUS_PREFIX + name + ('_total' if kind == 'counter' else '')
+                    lines.append(f"# TYPE {full} {kind}")
+                    for (n, labels), value in sorted(series.items()):
+                        if n == name:
+                            lines.append(f"{full}{_label_text(labels)} {_number(value)}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                full = PROMETHEUS_PREFIX + name
+                lines.append(f"# TYPE {full} histogram")
+                for (n, labels), h in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(h.bounds, h.buckets):
+                        cumulative += count
+                        le = f'le="{bound:g}"'
+                        lines.append(f"{full}_bucket{_label_text(labels, le)} {cumulative}")
+                    lines.append(f"{full}_bucket{_label_text(labels, _LE_INF)} {h.count}")
+                    lines.append(f"{full}_sum{_label_text(labels)} {_number(h.sum)}")
+                    lines.append(f"{full}_count{_label_text(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+
+def write_json(path: str, report: Dict):
+    """Write a run report as JSON"""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+
+def write_prometheus(path: str, registry: 'Metrics'):
+    """
+    Write `registry` in Prometheus text format, e.g. for node_exporter's
+    textfile collector. Written to a temporary file first, so a scrape
+    never sees half a file.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(registry.to_prometheus())
+    os.replace(tmp, path)
+
+
+# The registry every module records into
+metrics = Metrics()
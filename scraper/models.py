@@ -0,0 +1,61 @@
+"""
+Record types for KaziLink
+One compact Opportunity per posting, from scraping to storage
+"""
+
+import hashlib
+import sys
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Fields drawn from a handful of values; interned so every record shares one string
+_INTERNED = frozenset({'source_platform', 'type', 'experience_required', 'education_level', 'industry'})
+
+# Stand-ins scrapers store when a board does not give a value
+UNKNOWN_TITLE = "Unknown Title"
+UNKNOWN_COMPANY = "Unknown Company"
+DEFAULT_LOCATION = "Kenya"
+NO_DESCRIPTION = "Description not available"
+
+
+@dataclass(slots=True)
+class Opportunity:
+    """
+    A scraped posting.
+
+    Slotted, so a record carries no per-instance __dict__. `type` stays
+    None until the categorizer fills it in; `description` until a scraper
+    has fetched the detail page, where it has one. `alias_urls` collects
+    the URLs of near-duplicate copies found elsewhere (see dedupe). The
+    structured fields after it are filled from the text (see extractor).
+    """
+    title: str
+    company: str
+    location: str
+    description: Optional[str]
+    source_url: str
+    source_platform: str
+    type: Optional[str] = None
+    alias_urls: Tuple[str, ...] = ()
+    application_deadline: Optional[str] = None
+    salary_range: Optional[str] = None
+    experience_required: Optional[str] = None
+    education_level: Optional[str] = None
+    industry: Optional[str] = None
+    is_remote: bool = False
+
+    def content_hash(self) -> str:
+        """
+        Fingerprint of the scraped fields, blind to whitespace changes.
+
+        Stored with each row, so a posting edited on its board is told
+        apart from one that is merely listed again.
+        """
+        parts = (self.title, self.company, self.location, self.description or '')
+        text = '\x1f'.join(' '.join(part.split()) for part in parts)
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def __setattr__(self, name, value):
+        if name in _INTERNED and value is not None:
+            value = sys.intern(value)
+        object.__setattr__(self, name, value)
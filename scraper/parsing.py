@@ -0,0 +1,266 @@
+"""
+HTML parsing for KaziLink
+Sites describe their markup once as selectors; a backend compiles them and turns pages into plain card records
+"""
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+LXML = 'lxml'
+SOUP = 'soup'
+
+DEFAULT_BACKEND = os.getenv('SCRAPER_PARSER', LXML)
+
+
+@dataclass(frozen=True)
+class Select:
+    """
+    Matches elements by tag, class, id, href and text.
+
+    Each criterion is a tuple of alternatives and an element must satisfy
+    every non-empty one. Class, id, href and text alternatives are
+    substrings, like the `re.compile('a|b')` class matchers they replace.
+    """
+    tags: Tuple[str, ...] = ()
+    classes: Tuple[str, ...] = ()
+    ids: Tuple[str, ...] = ()
+    href: Tuple[str, ...] = ()
+    text: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SiteSelectors:
+    """
+    Where one site keeps its job cards and their fields.
+
+    Each list of selectors is tried in order and the first that matches
+    wins. Only the innermost card elements containing a `link` are kept,
+    so wrappers whose classes also look like cards never duplicate them.
+    """
+    cards: Tuple[Select, ...]
+    link: Select
+    fields: Dict[str, Tuple[Select, ...]] = field(default_factory=dict, hash=False)
+    next_page: Optional[Select] = None
+    detail: Tuple[Select, ...] = ()
+
+    def __hash__(self):
+        return hash((self.cards, self.link, tuple(sorted(self.fields.items())), self.next_page, self.detail))
+
+
+def _contains_any(expr: str, needles: Tuple[str, ...]) -> str:
+    return '(' + ' or '.join(f"contains({expr}, '{needle}')" for needle in needles) + ')'
+
+
+def _xpath_test(select: Select) -> str:
+    tests = []
+    if select.tags:
+        tests.append('(' + ' or '.join(f'self::{tag}' for tag in select.tags) + ')')
+    if select.classes:
+        tests.append(_contains_any('@class', select.classes))
+    if select.ids:
+        tests.append(_contains_any('@id', select.ids))
+    if select.href:
+        tests.append(_contains_any('@href', select.href))
+    if select.text:
+        tests.append(_contains_any('.', select.text))
+    return ' and '.join(tests) or 'true()'
+
+
+def _soup_test(select: Select):
+    def test(tag) -> bool:
+        if select.tags and tag.name not in select.tags:
+            return False
+        if select.classes and not any(c in ' '.join(tag.get('class', ())) for c in select.classes):
+            return False
+        if select.ids and not any(i in tag.get('id', '') for i in select.ids):
+            return False
+        if select.href and not any(h in tag.get('href', '') for h in select.href):
+            return False
+        if select.text and not any(t in tag.get_text() for t in select.text):
+            return False
+        return True
+    return test
+
+
+def _clean(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _lxml_text(element) -> str:
+    # Like get_text(' '): text nodes are separated, so "<b>A</b><i>B</i>" reads "A B"
+    return _clean(' '.join(element.itertext()))
+
+
+class LxmlParser:
+    """Parses with lxml, every selector precompiled to XPath"""
+
+    def __init__(self, selectors: SiteSelectors):
+        link = _xpath_test(selectors.link)
+        self._cards = [
+            etree.XPath(f"//*[{_xpath_test(card)}][descendant::*[{link}]]")
+            for card in selectors.cards
+        ]
+        self._link = etree.XPath(f"descendant::*[{link}][1]")
+        self._fields = {
+            name: [etree.XPath(f"descendant::*[{_xpath_test(select)}][1]") for select in selects]
+            for name, selects in selectors.fields.items()
+        }
+        self._next = (
+            etree.XPath(f"//*[{_xpath_test(selectors.next_page)}][1]") if selectors.next_page else None
+        )
+        self._detail = [etree.XPath(f"//*[{_xpath_test(select)}][1]") for select in selectors.detail]
+
+    @staticmethod
+    def _tree(content: str):
+        if not content or not content.strip():
+            return None
+        try:
+            return lxml_html.fromstring(content)
+        except (etree.ParserError, ValueError):
+            # e.g. a string carrying its own XML encoding declaration
+            return lxml_html.fromstring(content.encode('utf-8'))
+
+    def parse_listing(self, content: str) -> Tuple[List[Dict], bool]:
+        tree = self._tree(content)
+        if tree is None:
+            return [], False
+
+        cards = []
+        for xpath in self._cards:
+            cards = xpath(tree)
+            if cards:
+                break
+        records = [self._record(card) for card in _innermost(cards, _lxml_contains)]
+        has_next = bool(self._next(tree)) if self._next is not None else False
+        return records, has_next
+
+    def _record(self, card) -> Dict:
+        link = self._link(card)[0]
+        record = {'href': link.get('href') or '', 'link_text': _lxml_text(link)}
+        for name, xpaths in self._fields.items():
+            record[name] = None
+            for xpath in xpaths:
+                found = xpath(card)
+                if found:
+                    record[name] = _lxml_text(found[0])
+                    break
+        return record
+
+    def parse_detail(self, content: str) -> Optional[str]:
+        tree = self._tree(content)
+        if tree is None:
+            return None
+        for xpath in self._detail:
+            found = xpath(tree)
+            if found:
+                return _lxml_text(found[0])
+        return None
+
+
+class SoupParser:
+    """Parses with BeautifulSoup's html.parser; slower, kept for comparison"""
+
+    def __init__(self, selectors: SiteSelectors):
+        self._link = _soup_test(selectors.link)
+        self._cards = [_soup_test(card) for card in selectors.cards]
+        self._fields = {name: [_soup_test(s) for s in selects] for name, selects in selectors.fields.items()}
+        self._next = _soup_test(selectors.next_page) if selectors.next_page else None
+        self._detail = [_soup_test(select) for select in selectors.detail]
+
+    def parse_listing(self, content: str) -> Tuple[List[Dict], bool]:
+        soup = BeautifulSoup(content, 'html.parser')
+        cards = []
+        for test in self._cards:
+            cards = [tag for tag in soup.find_all(test) if tag.find(self._link)]
+            if cards:
+                break
+        records = [self._record(card) for card in _innermost(cards, _soup_contains)]
+        has_next = self._next is not None and soup.find(self._next) is not None
+        return records, has_next
+
+    def _record(self, card) -> Dict:
+        link = card.find(self._link)
+        record = {'href': link.get('href') or '', 'link_text': _clean(link.get_text(' '))}
+        for name, tests in self._fields.items():
+            record[name] = None
+            for test in tests:
+                found = card.find(test)
+                if found:
+                    record[name] = _clean(found.get_text(' '))
+                    break
+        return record
+
+    def parse_detail(self, content: str) -> Optional[str]:
+        soup = BeautifulSoup(content, 'html.parser')
+        for test in self._detail:
+            found = soup.find(test)
+            if found:
+                return _clean(found.get_text(' '))
+        return None
+
+
+BACKENDS = {LXML: LxmlParser, SOUP: SoupParser}
+
+
+@lru_cache(maxsize=None)
+def compile_selectors(selectors: SiteSelectors, backend: str = DEFAULT_BACKEND):
+    """Compiled parser for `selectors`, built once per site and backend"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[backend](selectors)
+
+
+def parse_listing(selectors: SiteSelectors, backend: str, content: str) -> Tuple[List[Dict], bool]:
+    return compile_selectors(selectors, backend).parse_listing(content)
+
+
+def parse_detail(selectors: SiteSelectors, backend: str, content: str) -> Optional[str]:
+    return compile_selectors(selectors, backend).parse_detail(content)
+
+
+def listing_parser(selectors: SiteSelectors, backend: str = DEFAULT_BACKEND) -> Callable[[str], Tuple[List[Dict], bool]]:
+    """
+    `parse(content) -> (card records, has_next)` for a site's listing pages.
+
+    Unlike a compiled parser this can be pickled, so it also runs in parser
+    worker processes (each compiles the selectors once on first use).
+    """
+    compile_selectors(selectors, backend)
+    return partial(parse_listing, selectors, backend)
+
+
+def detail_parser(selectors: SiteSelectors, backend: str = DEFAULT_BACKEND) -> Callable[[str], Optional[str]]:
+    """`parse(content) -> text` for a site's detail pages; picklable like listing_parser"""
+    compile_selectors(selectors, backend)
+    return partial(parse_detail, selectors, backend)
+
+
+def _lxml_contains(outer, inner) -> bool:
+    return any(parent is outer for parent in inner.iterancestors())
+
+
+def _soup_contains(outer, inner) -> bool:
+    return any(parent is outer for parent in inner.parents)
+
+
+def _innermost(cards: list, contains) -> list:
+    """
+    Drop cards that contain another card.
+
+    Cards come in document order, where an element's descendants directly
+    follow it, so a card contains another card exactly when it contains
+    the next one.
+    """
+    return [
+        card for card, following in zip(cards, cards[1:] + [None])
+        if following is None or not contains(card, following)
+    ]
+
+
+def absolute_url(href: str, base_url: str) -> str:
+    return href if href.startswith('http') else f"{base_url}{href}"
@@ -0,0 +1,434 @@
+"""
+Streaming pipeline for KaziLink
+Scraping, categorization and storage run side by side, connected by bounded queues
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from checkpoint import CrawlJournal, ResumeState
+from categorizer import OpportunityCategorizer, DEFAULT_MAX_CONCURRENCY, DEFAULT_PACK_SIZE
+from dedupe import NearDuplicateIndex
+from expiry import Sightings
+from extractor import FieldExtractor
+from fetcher import PageFetcher
+from metrics import metrics
+from models import Opportunity, NO_DESCRIPTION
+from search_index import SearchIndex
+from storage import save_rows, update_changed_rows, chunked, round_trip, DEFAULT_BATCH_SIZE
+from url_index import KnownUrlIndex, FingerprintIndex, fingerprint
+
+# Jobs held between two stages before the upstream stage is made to wait
+DEFAULT_QUEUE_SIZE = 200
+
+# Categorization batches in flight at once
+DEFAULT_CATEGORIZE_WORKERS = 2
+
+# Seconds a partly filled categorization batch waits for more jobs
+DEFAULT_LINGER = 0.5
+
+# Seconds a partly filled storage batch waits before it is written anyway
+DEFAULT_FLUSH_SECONDS = 5.0
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+class StageStats:
+    """Throughput and latency counters for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0        # seconds spent producing or processing batches
+        self.blocked = 0.0     # seconds spent waiting for room downstream
+        self.max_latency = 0.0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def record(self, items: int, seconds: float):
+        """Count a batch of `items` that took `seconds` to produce or process"""
+        now = time.perf_counter()
+        if self._first is None:
+            self._first = now - seconds
+        self._last = now
+        self.items += items
+        self.batches += 1
+        self.busy += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+    def summary(self) -> Dict[str, float]:
+        wall = (self._last - self._first) if self._first is not None else 0.0
+        return {
+            'items': self.items,
+            'batches': self.batches,
+            'items_per_second': self.items / wall if wall else 0.0,
+            'avg_latency': self.busy / self.batches if self.batches else 0.0,
+            'max_latency': self.max_latency,
+            'blocked_seconds': self.blocked,
+        }
+
+
+class Pipeline:
+    """
+    Scrape → deduplicate → categorize → save, streamed.
+
+    Each site is scraped by its own producer, so a slow site only delays
+    its own jobs. Jobs are deduplicated by URL as they arrive (and, given a
+    NearDuplicateIndex, by content, so a vacancy cross-posted on several
+    boards is kept once with the other URLs as aliases), categorized
+    in small batches by `categorize_workers` workers sharing one rate
+    limiter, and written `batch_size` rows at a time. The queues between
+    stages are bounded: when a later stage falls behind, the stages before
+    it wait, so memory stays flat however many pages are crawled.
+    """
+
+    def __init__(
+        self,
+        categorizer: OpportunityCategorizer,
+        store=None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        categorize_workers: int = DEFAULT_CATEGORIZE_WORKERS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        pack_size: int = DEFAULT_PACK_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        linger: float = DEFAULT_LINGER,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+        journal: Optional[CrawlJournal] = None,
+        search_index: Optional[SearchIndex] = None,
+        sightings: Optional[Sightings] = None,
+        extractor: Optional[FieldExtractor] = None,
+        fingerprints: Optional[FingerprintIndex] = None
+    ):
+        """
+        Args:
+            categorizer: Labels each job's 'type'
+            store: Storage backend (None for a dry run that saves nothing)
+            queue_size: Capacity of each queue between stages
+            categorize_workers: Categorization batches in flight
+            max_concurrency: Model requests in flight per batch
+            pack_size: Postings per model request
+            batch_size: Rows per storage write
+            near_duplicates: Index for dropping near-duplicate postings (None to keep them)
+            journal: Checkpoint journal the run's progress is recorded in (None for no checkpoints)
+            search_index: Local search index kept in step with storage (None for none)
+            sightings: Collects every listing the scrapers see, for the expiry sweep (None to skip)
+            extractor: Fills deadline, salary and the other structured fields before saving (None to skip)
+            fingerprints: Content fingerprints of stored postings; given these, postings stored
+                unchanged are dropped before categorization and changed ones rewritten (see _keep_stored)
+        """
+        self.categorizer = categorizer
+        self.store = store
+        self.queue_size = queue_size
+        self.categorize_workers = categorize_workers
+        self.max_concurrency = max_concurrency
+        self.pack_size = pack_size
+        self.batch_size = batch_size
+        self.linger = linger
+        self.flush_seconds = flush_seconds
+        self.near_duplicates = near_duplicates
+        self.journal = journal
+        self.search_index = search_index
+        self.sightings = sightings
+        self.extractor = extractor
+        self.fingerprints = fingerprints
+        self.stats: Dict[str, StageStats] = {}
+        self.counts = {
+            'scraped': 0, 'duplicates': 0, 'near_duplicates': 0, 'unchanged': 0,
+            'saved': 0, 'updated': 0, 'skipped': 0, 'errors': 0, 'resumed': 0
+        }
+        self.type_counts: Dict[str, int] = {}
+        # source_url of every job handed to storage, and the canonical jobs
+        # among them that gained an alias only afterwards
+        self._written = set()
+        self._late_aliases: Dict[str, Opportunity] = {}
+
+    async def run(
+        self,
+        scrapers: Dict,
+        fetcher: PageFetcher,
+        max_pages: int = 3,
+        known: Optional[KnownUrlIndex] = None,
+        resume: Optional[ResumeState] = None
+    ) -> Dict[str, int]:
+        """
+        Stream every site's jobs through to storage.
+
+        With `resume` (an interrupted run's journal), finished sites are
+        skipped, the rest restart after their last completed page, and jobs
+        extracted but not stored are fed back in, skipping categorization
+        when they already had a category.
+
+        Returns:
+            Dict with 'scraped', 'duplicates', 'near_duplicates', 'unchanged', 'saved', 'updated',
+            'skipped', 'errors' and 'resumed' counts
+        """
+        resume = resume or ResumeState()
+        jobs = asyncio.Queue(self.queue_size)
+        categorized = asyncio.Queue(self.queue_size)
+        seen = resume.urls()
+        # A journaled job may have been stored without its write being
+        # journaled, so aliases found for it now are stored separately
+        self._written.update(resume.jobs)
+        if self.near_duplicates is not None:
+            for job in resume.jobs.values():
+                self.near_duplicates.add(job)
+
+        # One limiter for every worker, so the per-minute budgets hold overall
+        limiter = self.categorizer.rate_limiter()
+        workers = [
+            asyncio.create_task(self._categorize(jobs, categorized, limiter))
+            for _ in range(self.categorize_workers)
+        ]
+        writer = asyncio.create_task(self._write(categorized))
+
+        await asyncio.gather(self._replay(resume.pending(), jobs, categorized), *(
+            self._scrape(name, scraper, fetcher, max_pages, known, seen, jobs, resume.start_page(name))
+            for name, scraper in scrapers.items()
+            if name not in resume.sites_done
+        ))
+        for _ in workers:
+            await jobs.put(_DONE)
+        await asyncio.gather(*workers)
+        await writer
+        await self._save_late_aliases()
+        return self.counts
+
+    def _stage(self, name: str) -> StageStats:
+        if name not in self.stats:
+            self.stats[name] = StageStats(name)
+        return self.stats[name]
+
+    async def _replay(self, pending: List[Opportunity], jobs: asyncio.Queue, categorized: asyncio.Queue):
+        """Feed the jobs an interrupted run never stored back into the pipeline"""
+        if pending:
+            print(f"♻️  Resuming {len(pending)} jobs from the last run")
+        for job in pending:
+            self.counts['resumed'] += 1
+            await (categorized if job.type else jobs).put(job)
+
+    async def _scrape(self, name, scraper, fetcher, max_pages, known, seen, jobs: asyncio.Queue, start_page: int = 1):
+        stats = self._stage(f"scrape:{name}")
+        print(f"📊 Launching {name} scraper...")
+        on_page_done = (lambda page: self.journal.page_done(name, page)) if self.journal else None
+        on_listed = on_end = None
+        if self.sightings is not None:
+            on_listed = lambda urls: self.sightings.listed(name, urls)
+            # A resumed site's earlier pages were listed in another run
+            if start_page == 1:
+                on_end = lambda: self.sightings.ended(name)
+        iterator = scraper.iter_jobs(
+            max_pages=max_pages, fetcher=fetcher, known=known,
+            start_page=start_page, on_page_done=on_page_done,
+            on_listed=on_listed, on_end=on_end
+        )
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    job = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                stats.record(1, time.perf_counter() - started)
+                self.counts['scraped'] += 1
+
+                if job.source_url in seen:
+                    self.counts['duplicates'] += 1
+                    continue
+                seen.add(job.source_url)
+
+                if self.near_duplicates is not None:
+                    canonical = self.near_duplicates.add(job)
+                    if canonical is not None:
+                        self.counts['near_duplicates'] += 1
+                        canonical.alias_urls += (job.source_url,)
+                        if self.journal:
+                            self.journal.alias(canonical.source_url, job.source_url)
+                        if canonical.source_url in self._written:
+                            self._late_aliases[canonical.source_url] = canonical
+                        continue
+
+                if self.fingerprints is not None and self._keep_stored(job):
+                    # Stored as is; aliases found for it later are stored separately
+                    self.counts['unchanged'] += 1
+                    self._written.add(job.source_url)
+                    continue
+
+                if self.journal:
+                    self.journal.job(job)
+                started = time.perf_counter()
+                await jobs.put(job)
+                stats.blocked += time.perf_counter() - started
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            self.counts['errors'] += 1
+            return
+        if self.journal:
+            self.journal.site_done(name)
+        print(f"✅ {name}: {stats.items} jobs")
+
+    async def _categorize(self, jobs: asyncio.Queue, categorized: asyncio.Queue, limiter):
+        stats = self._stage('categorize')
+        size = self.max_concurrency * self.pack_size
+        done = False
+        while not done:
+            batch, done = await _take_batch(jobs, size, self.linger)
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                await self.categorizer.abatch_categorize(
+                    batch, max_concurrency=self.max_concurrency,
+                    pack_size=self.pack_size, limiter=limiter
+                )
+            except Exception as e:
+                print(f"❌ Categorization failed for {len(batch)} jobs: {e}")
+                self.counts['errors'] += len(batch)
+                continue
+            stats.record(len(batch), time.perf_counter() - started)
+            if self.journal:
+                self.journal.categorized(batch)
+
+            started = time.perf_counter()
+            for job in batch:
+                await categorized.put(job)
+            stats.blocked += time.perf_counter() - started
+        await categorized.put(_DONE)
+
+    async def _write(self, categorized: asyncio.Queue):
+        stats = self._stage('save')
+        # Each categorize worker sends its own end marker
+        remaining = self.categorize_workers
+        while remaining:
+            batch, done = await _take_batch(categorized, self.batch_size, self.flush_seconds)
+            if done:
+                remaining -= 1
+            if not batch:
+                continue
+
+            for job in batch:
+                self.type_counts[job.type] = self.type_counts.get(job.type, 0) + 1
+            if self.store is None:
+                continue
+
+            if self.extractor is not None:
+                with metrics.timer('extract_seconds'):
+                    filled = await asyncio.to_thread(self.extractor.apply, batch)
+                metrics.inc('fields_extracted', filled)
+
+            self._written.update(job.source_url for job in batch)
+            started = time.perf_counter()
+            failed = set()
+            try:
+                counts = await asyncio.to_thread(self._save, batch, failed)
+            except Exception as e:
+                print(f"❌ Error saving batch of {len(batch)}: {e}")
+                self.counts['errors'] += len(batch)
+                continue
+            stats.record(len(batch), time.perf_counter() - started)
+            for key in ('saved', 'updated', 'skipped', 'errors'):
+                self.counts[key] += counts[key]
+            # A batch with failed rows is left pending, to be written again on resume
+            if self.journal and not counts['errors']:
+                self.journal.saved(job.source_url for job in batch)
+            # The search index mirrors storage, so rows that failed stay out of it
+            await self._index([job for job in batch if job.source_url not in failed])
+
+    def _keep_stored(self, job: Opportunity) -> bool:
+        """
+        Whether a stored job is left as it is: its content is unchanged, its
+        row predates fingerprints (so whether it changed is unknown), or its
+        detail page could not be read this time.
+        """
+        stored = self.fingerprints.get(job.source_url)
+        if stored is None:
+            return False
+        return not stored or job.description == NO_DESCRIPTION or stored == fingerprint(job.content_hash())
+
+    def _save(self, batch: List[Opportunity], failed: Set[str]) -> Dict[str, int]:
+        """
+        Insert the new jobs of a batch and rewrite the stored ones whose
+        content changed, adding the source_urls of rows that failed to `failed`
+        """
+        changed = []
+        if self.fingerprints is not None:
+            changed = [job for job in batch if self.fingerprints.get(job.source_url) is not None]
+        if changed:
+            stored = {job.source_url for job in changed}
+            batch = [job for job in batch if job.source_url not in stored]
+        counts = save_rows(self.store, batch, self.batch_size, failed=failed) if batch else {'saved': 0, 'skipped': 0, 'errors': 0}
+        updates = update_changed_rows(self.store, changed, self.batch_size, failed) if changed else {'updated': 0, 'errors': 0}
+        counts['updated'] = updates['updated']
+        counts['errors'] += updates['errors']
+        return counts
+
+    async def _save_late_aliases(self):
+        """Store aliases found for jobs that were written before their duplicates turned up"""
+        if self.store is None or not self._late_aliases:
+            return
+        for batch in chunked(list(self._late_aliases.items()), self.batch_size):
+            aliases = {url: list(job.alias_urls) for url, job in batch}
+            try:
+                await asyncio.to_thread(round_trip, 'aliases', self.store.add_alias_urls, aliases)
+            except Exception as e:
+                print(f"❌ Error saving aliases of {len(aliases)} jobs: {e}")
+                self.counts['errors'] += len(aliases)
+                continue
+            if self.search_index is not None:
+                await asyncio.to_thread(self.search_index.add_alias_urls, aliases)
+
+    async def _index(self, batch: List[Opportunity]):
+        """Add a stored batch to the search index; the store stays the source of truth, so failures only warn"""
+        if self.search_index is None or not batch:
+            return
+        try:
+            with metrics.timer('search_index_seconds'):
+                changed = await asyncio.to_thread(self.search_index.upsert_many, batch)
+        except Exception as e:
+            print(f"⚠️  Search index update failed for {len(batch)} jobs: {e}")
+            metrics.inc('search_index_errors')
+            return
+        metrics.inc('search_index_rows', changed)
+
+    def report(self):
+        """Print per-stage throughput and latency"""
+        print("\n📈 Pipeline stages:")
+        for name, stats in self.stats.items():
+            summary = stats.summary()
+            print(
+                f"   {name:<22} {summary['items']:6d} items  {summary['items_per_second']:7.1f}/s  "
+                f"avg {summary['avg_latency']:.3f}s  max {summary['max_latency']:.3f}s  "
+                f"blocked {summary['blocked_seconds']:.1f}s"
+            )
+
+
+async def _take_batch(queue: asyncio.Queue, size: int, linger: float) -> Tuple[List, bool]:
+    """
+    Take up to `size` items from `queue`: wait for the first, then for
+    more until `linger` seconds have passed.
+
+    Returns:
+        The items, and whether the end marker was reached
+    """
+    item = await queue.get()
+    if item is _DONE:
+        return [], True
+    batch = [item]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + linger
+    while len(batch) < size:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            item = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            break
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
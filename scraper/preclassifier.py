@@ -0,0 +1,129 @@
+"""
+Rule-based pre-classifier for KaziLink
+Labels obvious postings locally so only ambiguous ones are sent to GPT-4
+"""
+
+import math
+import re
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from models import Opportunity
+
+# (pattern, category, weight). Longer phrases come first so they win over
+# the words they contain, e.g. "industrial attachment" over "attachment".
+RULES = [
+    (r'industrial attachments?', 'attachment', 6),
+    (r'field attachments?', 'attachment', 6),
+    (r'student attachments?', 'attachment', 6),
+    (r'attachment (?:letter|programme|program)', 'attachment', 5),
+    (r'introduction letter', 'attachment', 4),
+    (r'attach(?:ee|ees)', 'attachment', 4),
+    (r'attachments?', 'attachment', 3),
+    (r'undergraduates?', 'attachment', 1.5),
+    (r'(?:current|continuing) students?', 'attachment', 2),
+
+    (r'graduate trainees?(?: program(?:me)?)?', 'internship', 6),
+    (r'management trainees?', 'internship', 5),
+    (r'graduate (?:program(?:me)?|internship)s?', 'internship', 5),
+    (r'internship program(?:me)?s?', 'internship', 5),
+    (r'internships?', 'internship', 4),
+    (r'interns?', 'internship', 4),
+    (r'(?:fresh|recent) graduates?', 'internship', 3),
+    (r'trainees?', 'internship', 2),
+
+    (r'\d+\s*\+?\s*years?(?: of)? (?:relevant |proven |professional |work )?experience', 'job', 4),
+    (r'senior', 'job', 4),
+    (r'(?:general |project |operations |sales |finance |country )?managers?', 'job', 3),
+    (r'head of', 'job', 3),
+    (r'director', 'job', 3),
+    (r'team lead(?:er)?', 'job', 3),
+    (r'supervisor', 'job', 2),
+    (r'permanent (?:position|role|contract|and pensionable)', 'job', 3),
+    (r'full[- ]time', 'job', 1.5),
+]
+
+# Matches in the title count this many times more than in the description
+TITLE_WEIGHT = 3.0
+
+# Score at which confidence saturates; a lone weak keyword is never enough
+SCORE_SCALE = 6.0
+
+# Only the head of long descriptions is scanned
+DESCRIPTION_CHARS = 3000
+
+DEFAULT_THRESHOLD = 0.85
+
+# First characters of every rule above. Checking them before trying the
+# alternatives roughly halves scan time; extend this when adding rules.
+_FIRST_CHARS = r'acdfghimoprstu\d'
+
+_PATTERN = re.compile(
+    r'\b(?=[' + _FIRST_CHARS + r'])(?:' + '|'.join(f'(?P<r{i}>{pattern})' for i, (pattern, _, _) in enumerate(RULES)) + r')\b',
+    re.IGNORECASE
+)
+_RULE_BY_GROUP = {f'r{i}': (category, weight) for i, (_, category, weight) in enumerate(RULES)}
+
+
+def _scan(texts: List[str], weight: float, scores: List[dict]):
+    """Run the combined pattern once over all texts, adding weighted matches to `scores`"""
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    # NUL never occurs in postings and no pattern can match across it
+    joined = '\x00'.join(texts)
+
+    for match in _PATTERN.finditer(joined):
+        category, rule_weight = _RULE_BY_GROUP[match.lastgroup]
+        doc = scores[bisect_right(starts, match.start()) - 1]
+        doc[category] = doc.get(category, 0.0) + rule_weight * weight
+
+
+class PreClassifier:
+    """
+    Weighted keyword classifier with a confidence score.
+
+    Confidence is the winning category's share of the total score, scaled
+    down when the evidence is thin. Postings at or above `threshold` are
+    labeled locally.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+
+    def classify_batch(self, opportunities: List[Opportunity]) -> List[Tuple[Optional[str], float]]:
+        """
+        Returns:
+            (category, confidence) per opportunity; category is None when
+            no rule matched
+        """
+        scores = [{} for _ in opportunities]
+        _scan([opp.title or '' for opp in opportunities], TITLE_WEIGHT, scores)
+        _scan([(opp.description or '')[:DESCRIPTION_CHARS] for opp in opportunities], 1.0, scores)
+
+        results = []
+        for doc in scores:
+            if not doc:
+                results.append((None, 0.0))
+                continue
+            category, top = max(doc.items(), key=lambda item: item[1])
+            share = top / sum(doc.values())
+            results.append((category, share * (1 - math.exp(-top / SCORE_SCALE))))
+        return results
+
+    def split(self, opportunities: List[Opportunity]) -> List[Opportunity]:
+        """
+        Set `type` on confidently classified opportunities.
+
+        Returns:
+            The opportunities left for the model, in order
+        """
+        remaining = []
+        for opp, (category, confidence) in zip(opportunities, self.classify_batch(opportunities)):
+            if category and confidence >= self.threshold:
+                opp.type = category
+            else:
+                remaining.append(opp)
+        return remaining
@@ -0,0 +1,281 @@
+"""
+Crawl scheduling for KaziLink
+One priority queue for every page request, with per-host politeness and adaptive concurrency
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from metrics import metrics
+from ratelimit import TokenBucket
+
+# Requests per minute to one host, and how many may go out back to back
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_BURST = 3
+
+# Requests in flight to one host: at the start, and at most
+DEFAULT_INITIAL_CONCURRENCY = 2
+DEFAULT_MAX_CONCURRENCY = 8
+
+# A response this many times slower than the host's best recent one means it is
+# struggling, if it is also at least MIN_SLOWDOWN seconds slower (less is noise)
+DEFAULT_LATENCY_FACTOR = 3.0
+MIN_SLOWDOWN = 0.5
+
+# Seconds a host is left alone after a 429/503 that gave no Retry-After
+DEFAULT_BACKOFF = 10.0
+
+# Successes at the learnt ceiling after which one more request in flight is tried
+DEFAULT_PROBE_AFTER = 100
+
+# Longest Retry-After honoured, so one bad header cannot stall a run
+MAX_RETRY_AFTER = 300.0
+
+# Statuses meaning "slow down"
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# Lower runs first: detail pages of jobs already found before further listing pages
+PRIORITIES = {'detail': 0, 'listing': 1}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Outcome:
+    """What became of one request, filled in by the caller holding the slot"""
+
+    __slots__ = ('status', 'retry_after', 'failed')
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self.failed = False
+
+    def record(self, status: int, retry_after: Optional[str] = None):
+        self.status = status
+        self.retry_after = parse_retry_after(retry_after)
+
+
+class _Host:
+    __slots__ = ('name', 'bucket', 'limit', 'maximum', 'ceiling', 'at_ceiling', 'in_flight',
+                 'blocked_until', 'best_latency', 'last_decrease')
+
+    def __init__(self, name: str, rate: Optional[float], burst: float, initial: int, maximum: int):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.ceiling = float(maximum)
+        self.at_ceiling = 0
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.best_latency: Optional[float] = None
+        self.last_decrease = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until another request may start (inf until one in flight finishes)"""
+        if self.in_flight >= int(self.limit):
+            return math.inf
+        wait = self.blocked_until - now
+        if self.bucket:
+            wait = max(wait, self.bucket.wait_time(1))
+        return max(wait, 0.0)
+
+
+class CrawlScheduler:
+    """
+    Decides which page request goes out next, across every site.
+
+    Requests wait in one queue ordered by priority (see PRIORITIES), then
+    arrival. A request starts once its host allows it: the host's token
+    bucket has a request to spare, no Retry-After is pending, and fewer
+    than the host's concurrency limit are in flight.
+
+    The limit adapts AIMD-style: it grows by one per limit's worth of
+    fast successful responses, and halves (at most once per round trip)
+    on a 429/503, a server error or a response much slower than the
+    host's best. A 429/503 also pauses the host for its Retry-After, or
+    DEFAULT_BACKOFF without one, and caps the limit at the number of
+    requests that were in flight, so the pauses are not hit again on
+    every climb; the cap is raised by one after `probe_after` successes.
+    With adaptive=False every host keeps `initial_concurrency`.
+    """
+
+    def __init__(
+        self,
+        rate_limits: Optional[Dict[str, float]] = None,
+        default_rate_limit: Optional[float] = DEFAULT_REQUESTS_PER_MINUTE,
+        burst: float = DEFAULT_BURST,
+        initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        latency_factor: float = DEFAULT_LATENCY_FACTOR,
+        backoff: float = DEFAULT_BACKOFF,
+        probe_after: int = DEFAULT_PROBE_AFTER,
+        adaptive: bool = True
+    ):
+        """
+        Args:
+            rate_limits: Requests per minute by site, overriding `default_rate_limit`
+            default_rate_limit: Requests per minute to any other host (None: unlimited)
+            initial_concurrency: Requests in flight to a host before it has been measured
+            max_concurrency: Most requests ever in flight to one host
+        """
+        self.rate_limits = rate_limits or {}
+        self.default_rate_limit = default_rate_limit
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_factor = latency_factor
+        self.backoff = backoff
+        self.probe_after = probe_after
+        self.adaptive = adaptive
+        self.hosts: Dict[str, _Host] = {}
+        self._queue = []
+        self._order = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._wake_at = math.inf
+
+    def _host(self, host: str, site: str) -> _Host:
+        state = self.hosts.get(host)
+        if state is None:
+            rate = self.rate_limits.get(site, self.default_rate_limit)
+            state = self.hosts[host] = _Host(
+                host, rate, self.burst, self.initial_concurrency, self.max_concurrency
+            )
+        return state
+
+    @asynccontextmanager
+    async def slot(self, host: str, site: str, kind: str = 'listing'):
+        """
+        Hold a request slot for `host` while the request is made.
+
+        Yields an Outcome for the caller to record the response status (and
+        Retry-After) in; an exception counts as a failure.
+        """
+        state = self._host(host, site)
+        await self._acquire(state, PRIORITIES.get(kind, max(PRIORITIES.values())))
+        outcome = Outcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.failed = True
+            raise
+        finally:
+            state.in_flight -= 1
+            self._adapt(state, time.monotonic() - started, outcome)
+            self._dispatch()
+
+    async def _acquire(self, state: _Host, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), state, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the waiter was cancelled: hand the slot back
+                state.in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _dispatch(self):
+        """Start every queued request whose host allows it, in priority order"""
+        now = time.monotonic()
+        waiting = []
+        wake = math.inf
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            _, _, state, future = item
+            if future.done():
+                continue
+            wait = state.wait_time(now)
+            if wait > 0:
+                waiting.append(item)
+                wake = min(wake, wait)
+                continue
+            state.in_flight += 1
+            if state.bucket:
+                state.bucket.take(1)
+            future.set_result(None)
+        for item in waiting:
+            heapq.heappush(self._queue, item)
+
+        # Requests held back only by time (rate, Retry-After) need a wake-up;
+        # ones held back by concurrency start when a slot is released
+        if wake < math.inf and now + wake < self._wake_at:
+            if self._timer:
+                self._timer.cancel()
+            self._wake_at = now + wake
+            self._timer = asyncio.get_running_loop().call_later(wake, self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._wake_at = math.inf
+        self._dispatch()
+
+    def _adapt(self, state: _Host, latency: float, outcome: Outcome):
+        now = time.monotonic()
+        if outcome.status in THROTTLE_STATUSES:
+            pause = outcome.retry_after if outcome.retry_after is not None else self.backoff
+            state.blocked_until = max(state.blocked_until, now + min(pause, MAX_RETRY_AFTER))
+            metrics.inc('throttled', host=state.name, status=outcome.status)
+            if not self.adaptive:
+                return
+            state.ceiling = max(1.0, min(state.ceiling, float(state.in_flight)))
+            state.at_ceiling = 0
+            self._decrease(state, now, latency, force=True)
+        elif not self.adaptive:
+            return
+        elif outcome.failed or (outcome.status or 0) >= 500:
+            self._decrease(state, now, latency)
+        else:
+            # Best latency drifts up slowly, so one lucky response is forgotten
+            best = latency if state.best_latency is None else min(latency, state.best_latency * 1.01)
+            state.best_latency = best
+            if latency > self.latency_factor * best and latency - best > MIN_SLOWDOWN:
+                self._decrease(state, now, latency)
+            elif state.limit < state.ceiling:
+                state.limit = min(state.ceiling, state.limit + 1 / state.limit)
+            else:
+                state.at_ceiling += 1
+                if state.at_ceiling >= self.probe_after and state.ceiling < state.maximum:
+                    state.ceiling += 1
+                    state.at_ceiling = 0
+        metrics.set('crawl_concurrency', state.limit, host=state.name)
+
+    def _decrease(self, state: _Host, now: float, latency: float, force: bool = False):
+        # Responses to requests sent before the last cut say nothing new
+        if not force and now - state.last_decrease < latency:
+            return
+        state.limit = max(1.0, state.limit / 2)
+        state.last_decrease = now
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Concurrency limit and pending pause per host"""
+        now = time.monotonic()
+        return {
+            name: {
+                'concurrency_limit': state.limit,
+                'best_latency': state.best_latency or 0.0,
+                'paused_seconds': max(0.0, state.blocked_until - now),
+            }
+            for name, state in self.hosts.items()
+        }
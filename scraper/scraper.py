@@ -5,155 +5,358 @@ Coordinates scraping from all sources, categorizes, and saves to Supabase
 
 import asyncio
 import os
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
-from scrapers.fuzu import FuzuScraper
-from scrapers.myjobmag import MyJobMagScraper
-from scrapers.brightermonday import BrighterMondayScraper
-from categorizer import OpportunityCategorizer
+from scrapers.registry import build_scrapers
+from categorizer import OpportunityCategorizer, DEFAULT_MAX_CONCURRENCY, DEFAULT_PACK_SIZE
+from dedupe import NearDuplicateIndex, DEFAULT_SIMILARITY_THRESHOLD
+from expiry import Sightings, sweep, DEFAULT_MISSED_RUNS
+from extractor import FieldExtractor
+from browser_pool import BrowserPool, DEFAULT_PAGES_PER_SITE, DEFAULT_MAX_PAGES
+from cache import CategoryCache, DEFAULT_CACHE_PATH
+from checkpoint import CrawlJournal, DEFAULT_CHECKPOINT_PATH
+from fetcher import PageFetcher, DEFAULT_STRATEGY_PATH, DEFAULT_REQUESTS_PER_MINUTE
+from http_cache import ResponseCache, DEFAULT_HTTP_CACHE_PATH
+from loop_monitor import LoopMonitor
+from metrics import metrics, write_json, write_prometheus
+from pipeline import Pipeline, DEFAULT_QUEUE_SIZE, DEFAULT_CATEGORIZE_WORKERS
+from preclassifier import PreClassifier
+from search_index import SearchIndex, DEFAULT_SEARCH_INDEX_PATH
+from sharding import ShardedCrawl, ShardSettings, DEFAULT_PAGES_PER_SHARD, DEFAULT_WORK_QUEUE_PATH
+from storage import SupabaseStore, utc_now, DEFAULT_BATCH_SIZE
+from url_index import KnownUrlIndex, FingerprintIndex
 
 load_dotenv()
 
 class KaziLinkScraper:
-    def __init__(self):
-        # Initialize Supabase
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-        self.supabase: Client = create_client(supabase_url, supabase_key)
-        
-        # Initialize categorizer
-        self.categorizer = OpportunityCategorizer()
-        
-        # Initialize site scrapers
-        self.scrapers = {
-            'fuzu': FuzuScraper(),
-            'myjobmag': MyJobMagScraper(),
-            'brightermonday': BrighterMondayScraper()
-        }
-    
-    async def scrape_all(self, max_pages_per_site: int = 3) -> Dict[str, List[Dict]]:
-        """Scrape all job boards concurrently"""
-        print("🚀 Starting KaziLink scraper...")
-        print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
-        # Run scrapers in parallel
-        tasks = []
-        for name, scraper in self.scrapers.items():
-            print(f"📊 Launching {name} scraper...")
-            tasks.append(scraper.scrape(max_pages=max_pages_per_site))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Organize results
-        all_jobs = {}
-        for i, name in enumerate(self.scrapers.keys()):
-            if isinstance(results[i], Exception):
-                print(f"❌ {name} failed: {results[i]}")
-                all_jobs[name] = []
-            else:
-                all_jobs[name] = results[i]
-                print(f"✅ {name}: {len(results[i])} jobs")
+    def __init__(
+        self,
+        store=None,
+        pages_per_site: int = DEFAULT_PAGES_PER_SITE,
+        max_browser_pages: int = DEFAULT_MAX_PAGES,
+        parse_workers: int = 0,
+        categorizer: Optional[OpportunityCategorizer] = None,
+        scrapers: Optional[Dict] = None,
+        response_cache: Optional[ResponseCache] = None,
+        browser_pool=None,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        search_index: Optional[SearchIndex] = None,
+        extractor: Optional[FieldExtractor] = None
+    ):
+        """
+        Every collaborator defaults to the production one; benchmarks
+        inject local fakes (see benchmarks/bench_end_to_end.py).
         
-        return all_jobs
-    
-    def categorize_jobs(self, all_jobs: Dict[str, List[Dict]]) -> List[Dict]:
-        """Categorize all scraped jobs using LLM"""
-        print("\n🤖 Categorizing opportunities with GPT-4...")
+        Args:
+            store: Storage backend (Supabase from the environment if omitted)
+            categorizer: Categorizer (OpenAI, with the category cache, if omitted)
+            scrapers: Site scrapers by name (every registered board if omitted, see scrapers.registry)
+            response_cache: HTTP response cache (HTTP_CACHE_PATH if omitted)
+            browser_pool: Browser for JavaScript pages (a BrowserPool per run if omitted)
+            requests_per_minute: Politeness limit per site
+            search_index: Local search index updated as jobs are saved (SEARCH_INDEX_PATH if omitted)
+            extractor: Fills deadline, salary and the other structured columns from posting text
+        """
+        # Initialize storage (Supabase unless a backend is injected)
+        if store is None:
+            supabase_url = os.getenv('SUPABASE_URL')
+            supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+            supabase: Client = create_client(supabase_url, supabase_key)
+            store = SupabaseStore(supabase)
+        self.store = store
         
-        # Flatten jobs from all sources
-        flat_jobs = []
-        for source, jobs in all_jobs.items():
-            flat_jobs.extend(jobs)
+        # Initialize categorizer, with obvious postings labeled locally
+        # and results cached across runs
+        if categorizer is None:
+            cache = CategoryCache(os.getenv('CATEGORY_CACHE_PATH', DEFAULT_CACHE_PATH))
+            categorizer = OpportunityCategorizer(cache=cache, preclassifier=PreClassifier())
+        self.categorizer = categorizer
         
-        # Remove duplicates by URL
-        unique_jobs = {job['source_url']: job for job in flat_jobs}.values()
-        unique_jobs = list(unique_jobs)
+        # Local full-text copy of what is stored, for serving search off
+        # the main table; an empty SEARCH_INDEX_PATH turns it off
+        if search_index is None:
+            search_path = os.getenv('SEARCH_INDEX_PATH', DEFAULT_SEARCH_INDEX_PATH)
+            search_index = SearchIndex(search_path) if search_path else None
+        self.search_index = search_index
         
-        print(f"📦 Found {len(unique_jobs)} unique opportunities")
+        # Deadline, salary, experience and the like, read from the text by rules
+        self.extractor = extractor or FieldExtractor()
         
-        # Categorize
-        categorized = self.categorizer.batch_categorize(unique_jobs)
+        # Initialize site scrapers, which share one HTTP client and
+        # (only if some page needs JavaScript) one browser per run
+        self.pages_per_site = pages_per_site
+        self.max_browser_pages = max_browser_pages
+        self.parse_workers = parse_workers
+        self.browser_pool = browser_pool
+        self.requests_per_minute = requests_per_minute
+        # An empty FETCH_STRATEGY_PATH keeps fetch strategies in memory
+        self.strategy_path = os.getenv('FETCH_STRATEGY_PATH', DEFAULT_STRATEGY_PATH) or None
+        self.response_cache = response_cache or ResponseCache(os.getenv('HTTP_CACHE_PATH', DEFAULT_HTTP_CACHE_PATH))
+        self.scrapers = scrapers or build_scrapers()
+    
+    def load_known_urls(self) -> KnownUrlIndex:
+        """Index every source_url already stored"""
+        started = time.perf_counter()
+        known = KnownUrlIndex.from_store(self.store)
+        elapsed = time.perf_counter() - started
+        metrics.set('known_urls', len(known))
+        metrics.set('known_urls_load_seconds', elapsed)
+        print(f"🗃️  Loaded {len(known)} known URLs in {elapsed:.2f}s")
+        return known
+    
+    def load_fingerprints(self) -> FingerprintIndex:
+        """Index the content fingerprint of every stored posting"""
+        started = time.perf_counter()
+        fingerprints = FingerprintIndex.from_store(self.store)
+        elapsed = time.perf_counter() - started
+        metrics.set('stored_fingerprints', len(fingerprints))
+        metrics.set('fingerprints_load_seconds', elapsed)
+        print(f"🧬 Loaded {len(fingerprints)} content fingerprints in {elapsed:.2f}s")
+        return fingerprints
+    
+    def _browser(self):
+        return self.browser_pool or BrowserPool(
+            pages_per_site=self.pages_per_site,
+            max_pages=self.max_browser_pages
+        )
+    
+    def _fetcher(self, pool) -> PageFetcher:
+        return PageFetcher(
+            pool=pool,
+            strategy_path=self.strategy_path,
+            default_rate_limit=self.requests_per_minute,
+            response_cache=self.response_cache,
+            parse_workers=self.parse_workers
+        )
+    
+    def _sharded(self, workers: int, max_pages: int, pages_per_shard: int, known) -> ShardedCrawl:
+        settings = ShardSettings(
+            scrapers=self.scrapers,
+            queue_path=os.getenv('WORK_QUEUE_PATH', DEFAULT_WORK_QUEUE_PATH),
+            known=known,
+            workers=workers,
+            requests_per_minute=self.requests_per_minute,
+            strategy_path=self.strategy_path,
+            http_cache_path=self.response_cache.path,
+            parse_workers=self.parse_workers,
+            browser_pool=self.browser_pool,
+            pages_per_site=self.pages_per_site,
+            max_browser_pages=self.max_browser_pages
+        )
+        return ShardedCrawl(settings, max_pages, pages_per_shard, response_cache=self.response_cache)
+    
+    def _report_skipped_pages(self):
+        stats = self.response_cache.stats
+        if stats['pages_skipped']:
+            print(
+                f"🗂️  Unchanged pages skipped: {stats['pages_skipped']} "
+                f"({stats['not_modified']} not modified, {stats['bytes_saved'] / 1024:.0f} KB saved)"
+            )
+    
+    async def run(
+        self,
+        dry_run: bool = False,
+        max_pages: int = 3,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        llm_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        pack_size: int = DEFAULT_PACK_SIZE,
+        full_crawl: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        similarity_threshold: Optional[float] = DEFAULT_SIMILARITY_THRESHOLD,
+        report_path: Optional[str] = None,
+        prometheus_path: Optional[str] = None,
+        resume: bool = False,
+        workers: int = 1,
+        pages_per_shard: int = DEFAULT_PAGES_PER_SHARD,
+        expire_after_runs: int = DEFAULT_MISSED_RUNS
+    ) -> Dict:
+        """
+        Main execution flow.
         
-        # Count by type
-        counts = {'attachment': 0, 'internship': 0, 'job': 0}
-        for job in categorized:
-            counts[job['type']] += 1
+        Jobs stream from the scrapers through categorization into storage
+        as they are found (see Pipeline), rather than each step waiting for
+        the previous one to finish. Near-duplicates (postings at least
+        `similarity_threshold` alike, across sites) are stored once, with
+        the other URLs as aliases; None keeps them all.
         
-        print(f"📎 Attachments: {counts['attachment']}")
-        print(f"🎓 Internships: {counts['internship']}")
-        print(f"💼 Jobs: {counts['job']}")
+        A `full_crawl` sees every stored posting again: each is compared
+        with the content fingerprint stored alongside it, and only those
+        edited since are categorized again and rewritten, in batches.
         
-        return categorized
-    
-    def save_to_supabase(self, jobs: List[Dict], dry_run: bool = False):
-        """Save categorized jobs to Supabase"""
-        if dry_run:
-            print("\n🔍 DRY RUN - Not saving to database")
-            return
-        
-        print("\n💾 Saving to Supabase...")
-        
-        saved = 0
-        skipped = 0
-        errors = 0
-        
-        for job in jobs:
-            try:
-                # Check if job already exists
-                existing = self.supabase.table('opportunities')\
-                    .select('id')\
-                    .eq('source_url', job['source_url'])\
-                    .execute()
-                
-                if existing.data:
-                    print(f"⏭️  Skipping duplicate: {job['title']}")
-                    skipped += 1
-                    continue
-                
-                # Insert new opportunity
-                data = {
-                    'title': job['title'],
-                    'company': job['company'],
-                    'type': job['type'],
-                    'description': job['description'],
-                    'location': job['location'],
-                    'source_url': job['source_url'],
-                    'source_platform': job['source_platform'],
-                    'status': 'active'
-                }
-                
-                self.supabase.table('opportunities').insert(data).execute()
-                print(f"✅ Saved: {job['title']} ({job['type']})")
-                saved += 1
-                
-            except Exception as e:
-                print(f"❌ Error saving {job['title']}: {e}")
-                errors += 1
+        Progress is journaled to CHECKPOINT_PATH as the run goes. With
+        `resume`, a run that died picks up from its journal instead of
+        starting over; the journal is removed once a run finishes cleanly.
         
-        print(f"\n📊 Summary:")
-        print(f"   ✅ Saved: {saved}")
-        print(f"   ⏭️  Skipped: {skipped}")
-        print(f"   ❌ Errors: {errors}")
-    
-    async def run(self, dry_run: bool = False, max_pages: int = 3):
-        """Main execution flow"""
+        With `workers` > 1 the crawl is sharded: each site's listing pages
+        are split into ranges of `pages_per_shard`, fetched and parsed by
+        that many worker processes (see ShardedCrawl), while this process
+        dedupes, categorizes and saves everything they find. Sharded runs
+        are not journaled; they cannot be resumed.
+        
+        Afterwards stored listings are swept (see expiry.sweep): the ones
+        seen are marked so, and those past their deadline, or missing from
+        `expire_after_runs` complete crawls of their board in a row (0 for
+        never), expired. Only single-process crawls report what they saw.
+        
+        Returns:
+            The run report (see run_report), also written as JSON to
+            `report_path` and as Prometheus text to `prometheus_path` if given
+        """
         start_time = datetime.now()
+        run_started = utc_now()
+        print("🚀 Starting KaziLink scraper...")
+        print(f"📅 {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        if dry_run:
+            print("🔍 DRY RUN - Not saving to database\n")
+        
+        # A dry run stores nothing, so there is nothing to resume from; a
+        # sharded crawl's pages are tracked by its work queue instead
+        journal = None if dry_run or workers > 1 else CrawlJournal(os.getenv('CHECKPOINT_PATH', DEFAULT_CHECKPOINT_PATH))
+        state = journal.open(resume) if journal else None
+        if resume and state is not None:
+            print(
+                f"♻️  Resuming: {len(state.sites_done)} sites done, {len(state.jobs)} jobs journaled, "
+                f"{len(state.saved)} already stored"
+            )
         
-        # Step 1: Scrape
-        all_jobs = await self.scrape_all(max_pages_per_site=max_pages)
+        known = None if full_crawl else self.load_known_urls()
+        fingerprints = self.load_fingerprints() if full_crawl else None
+        sightings = None if dry_run else Sightings()
+        pipeline = Pipeline(
+            self.categorizer,
+            store=None if dry_run else self.store,
+            queue_size=queue_size,
+            max_concurrency=llm_concurrency,
+            pack_size=pack_size,
+            batch_size=batch_size,
+            near_duplicates=None if similarity_threshold is None else NearDuplicateIndex(similarity_threshold),
+            journal=journal,
+            search_index=self.search_index,
+            sightings=sightings,
+            extractor=self.extractor,
+            fingerprints=fingerprints
+        )
         
-        # Step 2: Categorize
-        categorized_jobs = self.categorize_jobs(all_jobs)
+        # Scrape, categorize and save, all at once on one shared fetcher and browser
+        try:
+            if workers > 1:
+                print(f"🧵 Sharded crawl: {workers} workers, {pages_per_shard} pages per shard")
+                async with self._sharded(workers, max_pages, pages_per_shard, known) as crawl:
+                    async with LoopMonitor() as monitor:
+                        counts = await pipeline.run(crawl.feeds, None, max_pages=max_pages, known=known)
+                counts['errors'] += crawl.errors
+                print(
+                    f"🧵 Shards: {crawl.summary.get('done', 0)} done, {crawl.summary.get('skipped', 0)} skipped "
+                    f"past a site's end, {crawl.summary.get('failed', 0)} failed; {crawl.summary['pages']} pages"
+                )
+            else:
+                async with self._browser() as pool, self._fetcher(pool) as fetcher:
+                    async with LoopMonitor() as monitor:
+                        counts = await pipeline.run(
+                            self.scrapers, fetcher, max_pages=max_pages, known=known, resume=state
+                        )
+        finally:
+            if journal:
+                journal.close()
+        if journal and not counts['errors']:
+            journal.clear()
+        elif journal:
+            print(f"💾 Progress kept in {journal.path}; rerun with --resume to retry what failed")
         
-        # Step 3: Save
-        self.save_to_supabase(categorized_jobs, dry_run=dry_run)
+        self._report_skipped_pages()
+        print(f"\n📦 Found {counts['scraped'] - counts['duplicates'] - counts['near_duplicates']} unique opportunities")
+        if counts['resumed']:
+            print(f"♻️  Resumed from the last run: {counts['resumed']}")
+        if counts['near_duplicates']:
+            print(f"🪞 Near-duplicates merged: {counts['near_duplicates']}")
+        if counts['unchanged']:
+            print(f"🧬 Unchanged since stored: {counts['unchanged']}")
+        print(f"📎 Attachments: {pipeline.type_counts.get('attachment', 0)}")
+        print(f"🎓 Internships: {pipeline.type_counts.get('internship', 0)}")
+        print(f"💼 Jobs: {pipeline.type_counts.get('job', 0)}")
+        
+        print(f"\n📊 Summary:")
+        print(f"   ✅ Saved: {counts['saved']}")
+        if fingerprints is not None:
+            print(f"   🔄 Updated: {counts['updated']}")
+        print(f"   ⏭️  Skipped: {counts['skipped']}")
+        print(f"   ❌ Errors: {counts['errors']}")
+        pipeline.report()
+        stalls = monitor.summary()
+        print(
+            f"   event loop stalled {stalls['stalled_seconds']:.2f}s "
+            f"({stalls['stalled_fraction']:.0%} of the run, longest {stalls['max_stall_seconds'] * 1000:.0f} ms)"
+        )
+        
+        # Pages are only skipped next time once all their jobs are stored
+        if dry_run or counts['errors']:
+            self.response_cache.discard()
+        else:
+            self.response_cache.commit()
+        
+        expiry = None if dry_run else self.expire_listings(sightings, run_started, expire_after_runs)
         
         elapsed = (datetime.now() - start_time).total_seconds()
         print(f"\n⏱️  Total time: {elapsed:.2f} seconds")
+        
+        report = self.run_report(start_time, elapsed, counts, pipeline, stalls, dry_run, expiry)
+        if report_path:
+            write_json(report_path, report)
+            print(f"📝 Run report written to {report_path}")
+        if prometheus_path:
+            write_prometheus(prometheus_path, metrics)
+            print(f"📝 Metrics written to {prometheus_path}")
         print("🎉 Scraping complete!")
+        return report
+    
+    def expire_listings(self, sightings: Sightings, run_started: datetime, max_missed_runs: int) -> Optional[Dict[str, int]]:
+        """Run the expiry sweep, reporting the rows it touched (None if it failed)"""
+        complete = sightings.complete_sites()
+        print(f"\n🧹 Sweeping stale listings ({', '.join(complete) or 'no board'} read to the end)...")
+        try:
+            counts = sweep(self.store, sightings, run_started, max_missed_runs, search_index=self.search_index)
+        except Exception as e:
+            print(f"⚠️  Expiry sweep failed: {e}")
+            return None
+        print(
+            f"   👀 Seen: {counts['seen']}, 📉 missed a run: {counts['missed']}, "
+            f"🗑️  expired: {counts['expired_unseen']} unlisted + {counts['expired_deadline']} past deadline"
+        )
+        return counts
+    
+    def run_report(
+        self,
+        start_time: datetime,
+        elapsed: float,
+        counts: Dict[str, int],
+        pipeline: Pipeline,
+        stalls: Dict[str, float],
+        dry_run: bool,
+        expiry: Optional[Dict[str, int]] = None
+    ) -> Dict:
+        """Everything measured in one run, as plain JSON-serializable data"""
+        metrics.set('run_duration_seconds', elapsed)
+        metrics.set('run_timestamp_seconds', start_time.timestamp())
+        for outcome, count in counts.items():
+            metrics.set('run_jobs', count, outcome=outcome)
+        metrics.set('event_loop_stalled_seconds', stalls['stalled_seconds'])
+        return {
+            'started_at': start_time.isoformat(),
+            'elapsed_seconds': elapsed,
+            'dry_run': dry_run,
+            'counts': counts,
+            'types': pipeline.type_counts,
+            'stages': {name: stats.summary() for name, stats in pipeline.stats.items()},
+            'event_loop': stalls,
+            'http_cache': self.response_cache.stats,
+            'expiry': expiry,
+            'llm_usage': self.categorizer.usage,
+            'metrics': metrics.snapshot(),
+        }
 
 
 # Entry point
@@ -163,11 +366,73 @@ async def main():
     parser = argparse.ArgumentParser(description='KaziLink Opportunity Scraper')
     parser.add_argument('--dry-run', action='store_true', help='Run without saving to database')
     parser.add_argument('--pages', type=int, default=3, help='Max pages per site (default: 3)')
+    parser.add_argument('--browser-pages', type=int, default=DEFAULT_PAGES_PER_SITE,
+                        help=f'Concurrent browser pages per site (default: {DEFAULT_PAGES_PER_SITE})')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Processes parsing pages off the event loop (default: 0, parse inline)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Rows per database write (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--llm-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f'Categorization requests in flight per batch; {DEFAULT_CATEGORIZE_WORKERS} batches run at once, '
+                             f'so up to {DEFAULT_CATEGORIZE_WORKERS}x this many in all (default: {DEFAULT_MAX_CONCURRENCY})')
+    parser.add_argument('--pack-size', type=int, default=DEFAULT_PACK_SIZE,
+                        help=f'Postings per categorization request (default: {DEFAULT_PACK_SIZE})')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Jobs buffered between pipeline stages (default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--full-crawl', action='store_true',
+                        help='Crawl every page, updating stored jobs edited since (default: stop at known jobs)')
+    parser.add_argument('--similarity-threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                        help=f'Similarity at which postings count as near-duplicates (default: {DEFAULT_SIMILARITY_THRESHOLD})')
+    parser.add_argument('--keep-near-duplicates', action='store_true',
+                        help='Store near-duplicate postings separately (default: merge them)')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help='Write a JSON run report with per-stage timings and metrics')
+    parser.add_argument('--metrics-prom', metavar='PATH',
+                        help='Write metrics in Prometheus text format (e.g. for a textfile collector)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its checkpoint journal (default: start over)')
+    parser.add_argument('--sites', nargs='+', metavar='SITE',
+                        help='Boards to scrape, by registered name (default: all, built-in and plugins)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Crawl worker processes, each taking ranges of listing pages (default: 1, no sharding)')
+    parser.add_argument('--shard-pages', type=int, default=DEFAULT_PAGES_PER_SHARD,
+                        help=f'Listing pages per unit of sharded work (default: {DEFAULT_PAGES_PER_SHARD})')
+    expire_after = int(os.getenv('EXPIRE_AFTER_RUNS', DEFAULT_MISSED_RUNS))
+    parser.add_argument('--expire-after', type=int, default=expire_after, metavar='RUNS',
+                        help=f'Expire listings missing from this many complete crawls of their board in a row, '
+                             f'0 for never (default: {expire_after}, EXPIRE_AFTER_RUNS). A crawl is complete only '
+                             f'when it runs out of listings, which a small --pages rarely does; deadlines expire regardless')
     
     args = parser.parse_args()
+    if args.resume and args.workers > 1:
+        parser.error('--resume cannot be combined with --workers: sharded runs are not journaled')
+    try:
+        scrapers = build_scrapers(args.sites) if args.sites else None
+    except ValueError as e:
+        parser.error(str(e))
     
-    scraper = KaziLinkScraper()
-    await scraper.run(dry_run=args.dry_run, max_pages=args.pages)
+    scraper = KaziLinkScraper(
+        pages_per_site=args.browser_pages,
+        max_browser_pages=max(DEFAULT_MAX_PAGES, 3 * args.browser_pages),
+        parse_workers=args.parse_workers,
+        scrapers=scrapers
+    )
+    await scraper.run(
+        dry_run=args.dry_run,
+        max_pages=args.pages,
+        batch_size=args.batch_size,
+        llm_concurrency=args.llm_concurrency,
+        pack_size=args.pack_size,
+        full_crawl=args.full_crawl,
+        queue_size=args.queue_size,
+        similarity_threshold=None if args.keep_near_duplicates else args.similarity_threshold,
+        report_path=args.metrics_json,
+        prometheus_path=args.metrics_prom,
+        resume=args.resume,
+        workers=args.workers,
+        pages_per_shard=args.shard_pages,
+        expire_after_runs=args.expire_after
+    )
 
 
 if __name__ == "__main__":
@@ -2,8 +2,13 @@
 Scrapers package initialization
 """
 
+from .engine import SiteConfig, SiteScraper
 from .fuzu import FuzuScraper
 from .myjobmag import MyJobMagScraper
 from .brightermonday import BrighterMondayScraper
+from .registry import ENTRY_POINT_GROUP, available_sites, build_scrapers, register
 
-__all__ = ['FuzuScraper', 'MyJobMagScraper', 'BrighterMondayScraper']
+__all__ = [
+    'SiteConfig', 'SiteScraper', 'FuzuScraper', 'MyJobMagScraper', 'BrighterMondayScraper',
+    'ENTRY_POINT_GROUP', 'available_sites', 'build_scrapers', 'register',
+]
@@ -0,0 +1,206 @@
+"""
+Generic job board scraper
+One crawl loop for every board, driven by a declarative SiteConfig
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fetcher import PageFetcher, borrowed_fetcher
+from metrics import metrics
+from models import Opportunity, UNKNOWN_TITLE, UNKNOWN_COMPANY, DEFAULT_LOCATION, NO_DESCRIPTION
+from parsing import SiteSelectors, listing_parser, detail_parser, absolute_url, DEFAULT_BACKEND
+from url_index import KnownUrlIndex
+
+
+def _listing_with_cards(listing: Tuple[List[Dict], bool]) -> bool:
+    return bool(listing[0])
+
+
+def _any_listing(listing: Tuple[List[Dict], bool]) -> bool:
+    return True
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    """
+    Everything that sets one job board apart from the others.
+
+    URLs are templates over `{base}` (the board's base URL, overridable
+    per scraper, e.g. for fixture servers) and `{page}`. Boards whose
+    first listing page has its own address give it as `first_page_url`.
+
+    Pagination stops at the first page without cards, and after the page
+    that has no next-page link when `selectors.next_page` is set. When
+    `selectors.detail` is set each job's detail page is fetched for its
+    description; otherwise the card's description (or the title) is used.
+    """
+    name: str
+    display_name: str
+    base_url: str
+    listing_url: str
+    selectors: SiteSelectors
+    first_page_url: Optional[str] = None
+    default_company: str = UNKNOWN_COMPANY
+    default_location: str = DEFAULT_LOCATION
+
+    def page_url(self, base: str, page: int) -> str:
+        if page == 1 and self.first_page_url:
+            return self.first_page_url.format(base=base, page=page)
+        return self.listing_url.format(base=base, page=page)
+
+
+class SiteScraper:
+    """
+    Scrapes one board described by a SiteConfig.
+
+    The selectors are compiled once, when the scraper is built (see
+    parsing.compile_selectors), so a board added as configuration costs
+    nothing more per page than a hand-written one.
+    """
+
+    def __init__(self, config: SiteConfig, base_url: Optional[str] = None, parser_backend: str = DEFAULT_BACKEND):
+        self.config = config
+        self.base_url = base_url or config.base_url
+        # Plain functions of the page HTML, so parser worker processes can run them
+        self._parse_listing = listing_parser(config.selectors, parser_backend)
+        self._parse_description = detail_parser(config.selectors, parser_backend) if config.selectors.detail else None
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    async def scrape(
+        self,
+        max_pages: int = 5,
+        fetcher: Optional[PageFetcher] = None,
+        known: Optional[KnownUrlIndex] = None
+    ) -> List[Opportunity]:
+        """Scrape jobs from the board into a list (see iter_jobs)"""
+        return [job async for job in self.iter_jobs(max_pages=max_pages, fetcher=fetcher, known=known)]
+
+    async def iter_jobs(
+        self,
+        max_pages: int = 5,
+        fetcher: Optional[PageFetcher] = None,
+        known: Optional[KnownUrlIndex] = None,
+        start_page: int = 1,
+        on_page_done: Optional[Callable[[int], None]] = None,
+        on_listed: Optional[Callable[[List[str]], None]] = None,
+        on_end: Optional[Callable[[], None]] = None
+    ) -> AsyncIterator[Opportunity]:
+        """
+        Yield jobs from the board as each listing page is processed,
+        through `fetcher` when given.
+
+        Detail pages for a listing page are fetched concurrently, as many
+        at a time as the fetcher's politeness limits allow.
+
+        With a `known` index the crawl is incremental: jobs already stored
+        are dropped (their detail pages are never fetched), and pagination
+        stops at the first listing page holding nothing new, or unchanged
+        since the last run.
+
+        A resumed crawl starts at `start_page`. `on_page_done(page_num)` is
+        called once every job of a page has been taken from the iterator.
+
+        `on_listed(urls)` gets the URL of every job on each listing page,
+        stored or not, and `on_end()` is called if the crawl runs out of
+        listings rather than pages. A full crawl given `on_listed` reads
+        unchanged pages too, so that every listing is reported.
+
+        A listing page without cards is taken as the end of the board once
+        an earlier page of the crawl had some; before that it is retried in
+        the browser, as its markup may need rendering.
+        """
+        site, label = self.config.name, self.config.display_name
+        skip_unchanged = known is not None or on_listed is None
+        listed_any = False
+        async with borrowed_fetcher(fetcher) as fetcher:
+            for page_num in range(start_page, max_pages + 1):
+                url = self.config.page_url(self.base_url, page_num)
+                print(f"Scraping {label} page {page_num}: {url}")
+
+                listing = await fetcher.fetch(
+                    site, url, self._parse_listing,
+                    accept=_any_listing if listed_any else _listing_with_cards,
+                    skip_unchanged=skip_unchanged
+                )
+                # An unchanged page had cards when it was cached
+                listed_any = listed_any or listing is None or bool(listing[0])
+                if listing is None:
+                    print(f"⏭️  {label} page {page_num} unchanged since last run")
+                    if known is not None:
+                        break
+                    if on_page_done:
+                        on_page_done(page_num)
+                    continue
+                job_cards, has_next = listing
+                if not job_cards:
+                    print(f"🛑 {label} page {page_num} is empty, stopping")
+                    if on_end:
+                        on_end()
+                    break
+
+                print(f"Found {len(job_cards)} listings on page {page_num}")
+
+                page_jobs = []
+                for card in job_cards:
+                    try:
+                        page_jobs.append(self._extract_job(card))
+                    except Exception as e:
+                        print(f"Error extracting job: {e}")
+                        metrics.inc('extract_errors', site=site)
+                metrics.observe('cards_per_page', len(job_cards), site=site)
+                metrics.inc('cards_found', len(job_cards), site=site)
+                metrics.inc('jobs_extracted', len(page_jobs), site=site)
+                if on_listed:
+                    on_listed([job.source_url for job in page_jobs])
+
+                if known is not None:
+                    if known.covers(job.source_url for job in page_jobs):
+                        print(f"🛑 {label} page {page_num} has no new jobs, stopping")
+                        break
+                    page_jobs = [job for job in page_jobs if job.source_url not in known]
+                    metrics.inc('jobs_new', len(page_jobs), site=site)
+
+                if self._parse_description is not None:
+                    # Full descriptions from the job pages (gather keeps listing order)
+                    descriptions = await asyncio.gather(*(
+                        self._get_full_description(fetcher, job.source_url) for job in page_jobs
+                    ))
+                    for job, description in zip(page_jobs, descriptions):
+                        job.description = description or job.description or NO_DESCRIPTION
+                for job in page_jobs:
+                    yield job
+                if on_page_done:
+                    on_page_done(page_num)
+
+                if self.config.selectors.next_page is not None and not has_next:
+                    if on_end:
+                        on_end()
+                    break
+
+    def _extract_job(self, card: Dict) -> Opportunity:
+        """Build a job from a card record (the description may be filled in from the detail page later)"""
+        title = card.get('title') or card['link_text'] or UNKNOWN_TITLE
+        description = card.get('description')
+        return Opportunity(
+            title=title,
+            company=card.get('company') or self.config.default_company,
+            location=card.get('location') or self.config.default_location,
+            description=description if self._parse_description is not None else (description or title),
+            source_url=absolute_url(card['href'], self.base_url),
+            source_platform=self.config.name
+        )
+
+    async def _get_full_description(self, fetcher: PageFetcher, url: str) -> Optional[str]:
+        """Visit a job page for its description (None if it has none or cannot be fetched)"""
+        try:
+            return await fetcher.fetch(
+                self.config.name, url, self._parse_description, kind='detail', wait_until='load'
+            )
+        except Exception as e:
+            print(f"Error getting description from {url}: {e}")
+            return None
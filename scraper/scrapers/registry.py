@@ -0,0 +1,78 @@
+"""
+Site registry for KaziLink
+The built-in job boards plus any installed as plugins through the 'kazilink.sites' entry point group
+"""
+
+from importlib.metadata import entry_points
+from typing import Dict, Iterable, Optional
+
+from parsing import DEFAULT_BACKEND
+from scrapers.engine import SiteConfig, SiteScraper
+from scrapers import fuzu, myjobmag, brightermonday
+
+# Entry point group a package declares its boards under, e.g. in pyproject.toml:
+#   [project.entry-points."kazilink.sites"]
+#   jobwebkenya = "kazilink_jobwebkenya:SITE"
+# An entry point names a SiteConfig, a list of them, or a function returning either.
+ENTRY_POINT_GROUP = 'kazilink.sites'
+
+BUILTIN_SITES = (fuzu.SITE, myjobmag.SITE, brightermonday.SITE)
+
+_registered: Dict[str, SiteConfig] = {}
+
+
+def register(config: SiteConfig):
+    """Add a board (or replace the one of the same name) for this process"""
+    _registered[config.name] = config
+
+
+def _configs(loaded) -> Iterable[SiteConfig]:
+    if callable(loaded) and not isinstance(loaded, SiteConfig):
+        loaded = loaded()
+    configs = [loaded] if isinstance(loaded, SiteConfig) else list(loaded)
+    for config in configs:
+        if not isinstance(config, SiteConfig):
+            raise TypeError(f"expected a SiteConfig, got {type(config).__name__}")
+    return configs
+
+
+def available_sites() -> Dict[str, SiteConfig]:
+    """
+    Every known board by name: built-ins, then plugins, then ones
+    registered in this process, later ones replacing earlier namesakes.
+
+    A plugin that fails to load is reported and left out.
+    """
+    sites = {config.name: config for config in BUILTIN_SITES}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            configs = _configs(entry_point.load())
+        except Exception as e:
+            print(f"⚠️  Skipping site plugin {entry_point.name!r}: {e}")
+            continue
+        for config in configs:
+            sites[config.name] = config
+    sites.update(_registered)
+    return sites
+
+
+def build_scrapers(
+    names: Optional[Iterable[str]] = None,
+    parser_backend: str = DEFAULT_BACKEND
+) -> Dict[str, SiteScraper]:
+    """
+    One scraper per board, its selectors compiled once here.
+
+    Args:
+        names: Boards to scrape (every available board if omitted)
+
+    Raises:
+        ValueError: For a name no board is registered under
+    """
+    sites = available_sites()
+    if names is None:
+        names = list(sites)
+    unknown = [name for name in names if name not in sites]
+    if unknown:
+        raise ValueError(f"Unknown site(s) {', '.join(unknown)} (available: {', '.join(sites)})")
+    return {name: SiteScraper(sites[name], parser_backend=parser_backend) for name in names}
@@ -0,0 +1,335 @@
+"""
+Local search index for KaziLink
+A SQLite FTS5 copy of the stored opportunities, for serving search and filters off the main table
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from models import Opportunity
+
+DEFAULT_SEARCH_INDEX_PATH = '.cache/search.sqlite3'
+
+# Results per page of a search
+DEFAULT_LIMIT = 20
+
+# Columns that can be filtered on, with the number of matches for each value
+FACETS = ('type', 'location', 'source_platform')
+
+# Relevance weights of the searched columns, as in the schema's search_vector
+# (title, description, company), with the title counting most
+_WEIGHTS = (10.0, 1.0, 3.0)
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def _passes(value: Optional[str], column: str, wanted: Optional[str]) -> bool:
+    """Whether a facet value satisfies a filter, as the SQL filters in SearchIndex._where do"""
+    if wanted is None:
+        return True
+    if value is None:
+        return False
+    if column == 'location':
+        return wanted.lower() in value.lower()
+    return value == wanted
+
+
+def match_expression(text: str) -> Optional[str]:
+    """
+    FTS5 query for free text: every word must match, the last one as a
+    prefix (so results follow the user typing). Words are quoted, so
+    FTS5 syntax in the input is taken literally.
+
+    Returns:
+        The expression, or None when `text` holds no words
+    """
+    terms = _TERM.findall(text or '')
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+class SearchIndex:
+    """
+    Full-text index of opportunities with type, location and platform facets.
+
+    Rows live in a plain table keyed on source_url; an external-content
+    FTS5 table over title, description and company is kept in step by
+    triggers. Upserting a posting that has not changed writes nothing,
+    so the index can be fed every saved batch.
+
+    The connection may be used from a worker thread (the pipeline writes
+    through asyncio.to_thread), one caller at a time.
+    """
+
+    def __init__(self, path: str = DEFAULT_SEARCH_INDEX_PATH):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        weights = ', '.join(str(weight) for weight in _WEIGHTS)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS opportunities (
+                id INTEGER PRIMARY KEY,
+                source_url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                company TEXT,
+                location TEXT,
+                description TEXT,
+                type TEXT,
+                source_platform TEXT,
+                alias_urls TEXT NOT NULL DEFAULT '[]',
+                indexed_at REAL NOT NULL
+            );
+            -- Covers facet counting (grouped on all three) as well as filtering by type
+            CREATE INDEX IF NOT EXISTS idx_search_facets ON opportunities(type, location, source_platform);
+            CREATE INDEX IF NOT EXISTS idx_search_location ON opportunities(location);
+            CREATE INDEX IF NOT EXISTS idx_search_platform ON opportunities(source_platform);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS opportunities_fts USING fts5(
+                title, description, company,
+                content='opportunities', content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            INSERT INTO opportunities_fts(opportunities_fts, rank) VALUES ('rank', 'bm25({weights})');
+            CREATE TRIGGER IF NOT EXISTS opportunities_ai AFTER INSERT ON opportunities BEGIN
+                INSERT INTO opportunities_fts(rowid, title, description, company)
+                VALUES (new.id, new.title, new.description, new.company);
+            END;
+            CREATE TRIGGER IF NOT EXISTS opportunities_ad AFTER DELETE ON opportunities BEGIN
+                INSERT INTO opportunities_fts(opportunities_fts, rowid, title, description, company)
+                VALUES ('delete', old.id, old.title, old.description, old.company);
+            END;
+            CREATE TRIGGER IF NOT EXISTS opportunities_au AFTER UPDATE OF title, description, company ON opportunities BEGIN
+                INSERT INTO opportunities_fts(opportunities_fts, rowid, title, description, company)
+                VALUES ('delete', old.id, old.title, old.description, old.company);
+                INSERT INTO opportunities_fts(rowid, title, description, company)
+                VALUES (new.id, new.title, new.description, new.company);
+            END;
+        """)
+        self.conn.commit()
+
+    def upsert_many(self, jobs: Iterable[Opportunity]) -> int:
+        """
+        Add or update categorized jobs. A job indexed already keeps its
+        alias URLs, with any new ones added, as add_alias_urls does.
+
+        Returns:
+            Rows inserted or changed
+        """
+        now = time.time()
+        cursor = self.conn.executemany(
+            """
+            INSERT INTO opportunities
+                (source_url, title, company, location, description, type, source_platform, alias_urls, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source_url) DO UPDATE SET
+                title = excluded.title, company = excluded.company, location = excluded.location,
+                description = excluded.description, type = excluded.type,
+                source_platform = excluded.source_platform,
+                alias_urls = (
+                    SELECT json_group_array(value) FROM (
+                        SELECT value FROM json_each(opportunities.alias_urls)
+                        UNION SELECT value FROM json_each(excluded.alias_urls)
+                    )
+                ),
+                indexed_at = excluded.indexed_at
+            WHERE (title, company, location, description, type, source_platform)
+                IS NOT (excluded.title, excluded.company, excluded.location, excluded.description,
+                        excluded.type, excluded.source_platform)
+            """,
+            [
+                (job.source_url, job.title, job.company, job.location, job.description, job.type,
+                 job.source_platform, json.dumps(list(job.alias_urls)), now)
+                for job in jobs
+            ]
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def add_alias_urls(self, aliases: Dict[str, List[str]]):
+        """Add alias URLs to indexed jobs, keyed by source_url, keeping the ones they have"""
+        self.conn.executemany(
+            "UPDATE opportunities SET alias_urls = ("
+            "SELECT json_group_array(value) FROM ("
+            "SELECT value FROM json_each(opportunities.alias_urls) UNION SELECT value FROM json_each(?))"
+            ") WHERE source_url = ?",
+            [(json.dumps(urls), url) for url, urls in aliases.items()]
+        )
+        self.conn.commit()
+
+    def remove(self, urls: Iterable[str]) -> int:
+        """Drop jobs by source_url; returns the number removed"""
+        cursor = self.conn.executemany("DELETE FROM opportunities WHERE source_url = ?", [(url,) for url in urls])
+        self.conn.commit()
+        return cursor.rowcount
+
+    def _where(self, text: Optional[str], filters: Dict[str, Optional[str]], skip: Optional[str] = None):
+        """WHERE clause and parameters for a query, optionally leaving out one facet's filter"""
+        clauses, params = [], []
+        expression = match_expression(text)
+        if expression:
+            clauses.append("opportunities.id IN (SELECT rowid FROM opportunities_fts WHERE opportunities_fts MATCH ?)")
+            params.append(expression)
+        for column, value in filters.items():
+            if value is None or column == skip:
+                continue
+            if column == 'location':
+                # Substring match, as the frontend's location filter does
+                clauses.append("location LIKE ?")
+                params.append(f"%{value}%")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def search(
+        self,
+        text: str = '',
+        type: Optional[str] = None,
+        location: Optional[str] = None,
+        source_platform: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Find jobs matching every word of `text` and the given filters.
+
+        Results are ranked by relevance when there is text to match, most
+        recently added first otherwise.
+
+        Returns:
+            One dict per job: the stored columns, with alias_urls as a list
+        """
+        expression = match_expression(text)
+        where, params = self._where(None, {'type': type, 'location': location, 'source_platform': source_platform})
+        if expression and not where:
+            # FTS5 can stop at the top `limit` when nothing else filters the matches
+            sql = """
+                SELECT opportunities.* FROM (
+                    SELECT rowid, rank FROM opportunities_fts WHERE opportunities_fts MATCH ?
+                    ORDER BY rank LIMIT ? OFFSET ?
+                ) AS matches JOIN opportunities ON opportunities.id = matches.rowid
+                ORDER BY matches.rank
+            """
+            params = [expression, limit, offset]
+        elif expression:
+            sql = f"""
+                SELECT opportunities.* FROM opportunities_fts
+                JOIN opportunities ON opportunities.id = opportunities_fts.rowid
+                {where} AND opportunities_fts MATCH ?
+                ORDER BY opportunities_fts.rank LIMIT ? OFFSET ?
+            """
+            params = [*params, expression, limit, offset]
+        else:
+            sql = f"SELECT * FROM opportunities{where} ORDER BY id DESC LIMIT ? OFFSET ?"
+            params = [*params, limit, offset]
+        rows = self.conn.execute(sql, params).fetchall()
+        return [self._row(row) for row in rows]
+
+    def count(
+        self,
+        text: str = '',
+        type: Optional[str] = None,
+        location: Optional[str] = None,
+        source_platform: Optional[str] = None
+    ) -> int:
+        """Number of jobs a search would find in total"""
+        filters = {'type': type, 'location': location, 'source_platform': source_platform}
+        where, params = self._where(text, filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM opportunities{where}", params).fetchone()[0]
+
+    def facets(
+        self,
+        text: str = '',
+        type: Optional[str] = None,
+        location: Optional[str] = None,
+        source_platform: Optional[str] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Matches per value of each facet column.
+
+        Each facet is counted with every filter but its own applied, so
+        the counts show what choosing another value would give. The text
+        is matched once: matches are grouped by their combination of facet
+        values (a few hundred at most) and the filters applied to those.
+        """
+        filters = {'type': type, 'location': location, 'source_platform': source_platform}
+        where, params = self._where(text, {})
+        columns = ', '.join(FACETS)
+        groups = self.conn.execute(
+            f"SELECT {columns}, COUNT(*) FROM opportunities{where} GROUP BY {columns}", params
+        ).fetchall()
+
+        counts = {column: {} for column in FACETS}
+        for *values, count in groups:
+            row = dict(zip(FACETS, values))
+            failed = [column for column in FACETS if not _passes(row[column], column, filters[column])]
+            for column in FACETS:
+                # A facet ignores its own filter only
+                if row[column] is None or any(other != column for other in failed):
+                    continue
+                counts[column][row[column]] = counts[column].get(row[column], 0) + count
+        return {
+            column: dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+            for column, values in counts.items()
+        }
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        result = dict(row)
+        result.pop('id')
+        result['alias_urls'] = json.loads(result['alias_urls'])
+        return result
+
+    def optimize(self):
+        """Merge the FTS5 index segments, e.g. after a large import"""
+        self.conn.execute("INSERT INTO opportunities_fts(opportunities_fts) VALUES ('optimize')")
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM opportunities").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Search the local opportunity index')
+    parser.add_argument('text', nargs='?', default='', help='Words to search for')
+    parser.add_argument('--type', choices=['attachment', 'internship', 'job'])
+    parser.add_argument('--location')
+    parser.add_argument('--platform')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    parser.add_argument('--index', default=os.getenv('SEARCH_INDEX_PATH') or DEFAULT_SEARCH_INDEX_PATH,
+                        help='Index file (default: SEARCH_INDEX_PATH or .cache/search.sqlite3)')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    query = {'type': args.type, 'location': args.location, 'source_platform': args.platform}
+    started = time.perf_counter()
+    results = index.search(args.text, limit=args.limit, **query)
+    total = index.count(args.text, **query)
+    facets = index.facets(args.text, **query)
+    elapsed = time.perf_counter() - started
+
+    print(f"🔎 {total} matches ({elapsed * 1000:.1f} ms)")
+    for job in results:
+        print(f"   [{job['type']}] {job['title']} - {job['company']}, {job['location']}  {job['source_url']}")
+    for column, values in facets.items():
+        print(f"   {column}: " + ', '.join(f"{value} ({count})" for value, count in list(values.items())[:10]))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
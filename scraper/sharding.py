@@ -0,0 +1,354 @@
+"""
+Sharded crawling for KaziLink
+Each site's listing pages split into ranges that worker processes take from a SQLite work queue
+"""
+
+import asyncio
+import dataclasses
+import multiprocessing
+import os
+import queue
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from browser_pool import BrowserPool, DEFAULT_PAGES_PER_SITE, DEFAULT_MAX_PAGES
+from fetcher import PageFetcher, DEFAULT_REQUESTS_PER_MINUTE
+from http_cache import ResponseCache
+from metrics import metrics
+from models import Opportunity
+from scheduler import CrawlScheduler, DEFAULT_INITIAL_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+from url_index import KnownUrlIndex
+
+DEFAULT_WORK_QUEUE_PATH = '.cache/work_queue.sqlite3'
+
+# Listing pages per unit of work: fewer spreads a site over more workers,
+# more wastes fewer requests past the end of a site
+DEFAULT_PAGES_PER_SHARD = 2
+
+# A shard claimed this long ago and never finished is handed out again
+DEFAULT_LEASE_SECONDS = 600.0
+
+# Pages of jobs in transit from the workers to the writer before workers wait
+DEFAULT_TRANSIT_PAGES = 64
+
+# Seconds the writer waits for a message before checking its workers are alive
+_POLL_SECONDS = 1.0
+
+# End-of-stream marker for a site feed
+_END = object()
+
+
+class WorkQueue:
+    """
+    Page ranges ("shards") of every site, handed out to crawl workers.
+
+    A SQLite table each worker process opens; a claim is one IMMEDIATE
+    transaction, so no shard goes to two workers. Shards are handed out
+    in page order across sites, every site's first pages before any
+    site's later ones. A worker that reaches a site's end (an empty page,
+    the last page, or in an incremental crawl a page with nothing new)
+    ends the site, and its shards not yet claimed are skipped.
+    """
+
+    def __init__(self, path: str = DEFAULT_WORK_QUEUE_PATH, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # Autocommit, with explicit transactions around claims
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                site TEXT NOT NULL,
+                first_page INTEGER NOT NULL,
+                last_page INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker INTEGER,
+                claimed_at REAL,
+                pages_done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (site, first_page)
+            )
+        """)
+
+    def fill(self, sites: List[str], max_pages: int, pages_per_shard: int = DEFAULT_PAGES_PER_SHARD):
+        """Replace the queue with shards covering pages 1..max_pages of each site"""
+        shards = [
+            (site, first, min(first + pages_per_shard - 1, max_pages))
+            for site in sites
+            for first in range(1, max_pages + 1, pages_per_shard)
+        ]
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("DELETE FROM shards")
+        self.conn.executemany("INSERT INTO shards (site, first_page, last_page) VALUES (?, ?, ?)", shards)
+        self.conn.execute("COMMIT")
+
+    def claim(self, worker: int) -> Optional[Tuple[str, int, int]]:
+        """
+        Take the next shard for `worker`.
+
+        Returns:
+            (site, first_page, last_page), or None once every shard is taken
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT site, first_page, last_page FROM shards "
+                "WHERE status = 'pending' OR (status = 'claimed' AND claimed_at < ?) "
+                "ORDER BY first_page, site LIMIT 1",
+                (now - self.lease_seconds,)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE shards SET status = 'claimed', worker = ?, claimed_at = ? "
+                    "WHERE site = ? AND first_page = ?",
+                    (worker, now, row[0], row[1])
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def finish(self, site: str, first_page: int, pages_done: int, site_ended: bool = False, failed: bool = False):
+        """Record a shard's outcome; if the site ended there, skip its shards not yet claimed"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute(
+            "UPDATE shards SET status = ?, pages_done = ? WHERE site = ? AND first_page = ?",
+            ('failed' if failed else 'done', pages_done, site, first_page)
+        )
+        if site_ended:
+            self.conn.execute(
+                "UPDATE shards SET status = 'skipped' WHERE site = ? AND first_page > ? AND status = 'pending'",
+                (site, first_page)
+            )
+        self.conn.execute("COMMIT")
+
+    def summary(self) -> Dict[str, int]:
+        """Shards by status, and listing pages crawled"""
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+        counts['pages'] = self.conn.execute("SELECT COALESCE(SUM(pages_done), 0) FROM shards").fetchone()[0]
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+@dataclasses.dataclass
+class ShardSettings:
+    """What a crawl worker process needs to fetch pages; pickled into each worker"""
+    scrapers: Dict
+    queue_path: str = DEFAULT_WORK_QUEUE_PATH
+    known: Optional[KnownUrlIndex] = None
+    workers: int = 1
+    requests_per_minute: Optional[float] = DEFAULT_REQUESTS_PER_MINUTE
+    strategy_path: Optional[str] = None
+    http_cache_path: str = ':memory:'
+    parse_workers: int = 0
+    browser_pool: object = None
+    pages_per_site: int = DEFAULT_PAGES_PER_SITE
+    max_browser_pages: int = DEFAULT_MAX_PAGES
+
+
+async def _send(out, message):
+    # A full transit queue means the writer is behind: wait off the event loop
+    await asyncio.to_thread(out.put, message)
+
+
+async def _crawl_shard(settings: ShardSettings, work: WorkQueue, fetcher: PageFetcher, shard, out) -> bool:
+    """Crawl one shard, sending its jobs a page at a time; returns whether it succeeded"""
+    site, first, last = shard
+    pages_done = first - 1
+    ready: List[List[Opportunity]] = []
+    buffer: List[Opportunity] = []
+
+    def page_done(page: int):
+        nonlocal pages_done
+        pages_done = page
+        ready.append(buffer[:])
+        buffer.clear()
+
+    iterator = settings.scrapers[site].iter_jobs(
+        max_pages=last, fetcher=fetcher, known=settings.known, start_page=first, on_page_done=page_done
+    )
+    failed = False
+    try:
+        async for job in iterator:
+            while ready:
+                await _send(out, ('jobs', site, ready.pop(0)))
+            buffer.append(job)
+    except Exception as e:
+        print(f"❌ {site} pages {first}-{last} failed: {e}")
+        failed = True
+    # Jobs taken before a failure are still good
+    for jobs in ready + [buffer]:
+        if jobs:
+            await _send(out, ('jobs', site, jobs))
+
+    pages = pages_done - first + 1
+    work.finish(site, first, pages, site_ended=not failed and pages_done < last, failed=failed)
+    metrics.inc('shards', status='failed' if failed else 'done')
+    return not failed
+
+
+async def _crawl(worker: int, settings: ShardSettings, out) -> Dict:
+    work = WorkQueue(settings.queue_path)
+    cache = ResponseCache(settings.http_cache_path)
+    # Every worker schedules its own requests, so each gets an equal share of
+    # a host's politeness budget and concurrency
+    share = max(1, settings.workers)
+    scheduler = CrawlScheduler(
+        default_rate_limit=settings.requests_per_minute / share if settings.requests_per_minute else None,
+        initial_concurrency=max(1, DEFAULT_INITIAL_CONCURRENCY // share),
+        max_concurrency=max(1, DEFAULT_MAX_CONCURRENCY // share)
+    )
+    pool = settings.browser_pool or BrowserPool(
+        pages_per_site=settings.pages_per_site, max_pages=settings.max_browser_pages
+    )
+    errors = 0
+    async with pool, PageFetcher(
+        pool=pool,
+        strategy_path=settings.strategy_path,
+        response_cache=cache,
+        parse_workers=settings.parse_workers,
+        scheduler=scheduler
+    ) as fetcher:
+        while (shard := work.claim(worker)) is not None:
+            if not await _crawl_shard(settings, work, fetcher, shard, out):
+                errors += 1
+    work.close()
+    return {'errors': errors, 'cache': cache.staged(), 'metrics': metrics.export()}
+
+
+def crawl_worker(worker: int, settings: ShardSettings, out):
+    """Worker process: crawl shards until the queue is empty, then report to the writer"""
+    summary = {'errors': 1}
+    try:
+        summary = asyncio.run(_crawl(worker, settings, out))
+    except Exception as e:
+        print(f"❌ Crawl worker {worker} failed: {e}")
+    finally:
+        out.put(('done', worker, summary))
+
+
+class SiteFeed:
+    """Stands in for a site's scraper in the pipeline, yielding the jobs workers found on the site"""
+
+    def __init__(self, size: int):
+        self.queue = asyncio.Queue(size)
+
+    async def iter_jobs(self, **_):
+        # Pagination, known URLs and fetching were all handled by the workers
+        while True:
+            job = await self.queue.get()
+            if job is _END:
+                return
+            yield job
+
+
+class ShardedCrawl:
+    """
+    Crawls with `workers` processes, feeding their jobs to one writer.
+
+    The site scrapers run in the workers, which take shards from a
+    WorkQueue and send each page's jobs back over one bounded queue. In
+    this process, `feeds` takes the place of the scrapers in a Pipeline,
+    so URL and near-duplicate dedupe, categorization and storage stay in
+    one place (and under one model rate limit):
+
+        async with ShardedCrawl(settings, max_pages) as crawl:
+            counts = await pipeline.run(crawl.feeds, None)
+
+    Unchanged-page records and metrics from the workers are merged into
+    `response_cache` and this process's registry as each worker finishes.
+    """
+
+    def __init__(
+        self,
+        settings: ShardSettings,
+        max_pages: int,
+        pages_per_shard: int = DEFAULT_PAGES_PER_SHARD,
+        response_cache: Optional[ResponseCache] = None,
+        feed_size: int = 200,
+        transit_pages: int = DEFAULT_TRANSIT_PAGES
+    ):
+        self.settings = settings
+        self.max_pages = max_pages
+        self.pages_per_shard = pages_per_shard
+        self.response_cache = response_cache
+        self.feeds = {site: SiteFeed(feed_size) for site in settings.scrapers}
+        self.errors = 0
+        self.summary: Dict[str, int] = {}
+        context = multiprocessing.get_context('spawn')
+        self._out = context.Queue(transit_pages)
+        self._processes = [
+            # Not daemonic: a worker may start parser processes of its own
+            context.Process(target=crawl_worker, args=(worker, settings, self._out))
+            for worker in range(settings.workers)
+        ]
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        work = WorkQueue(self.settings.queue_path)
+        work.fill(list(self.settings.scrapers), self.max_pages, self.pages_per_shard)
+        work.close()
+        for process in self._processes:
+            process.start()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is not None:
+            for process in self._processes:
+                process.terminate()
+            self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            if exc_type is None:
+                raise
+        for process in self._processes:
+            await asyncio.to_thread(process.join)
+        work = WorkQueue(self.settings.queue_path)
+        self.summary = work.summary()
+        work.close()
+
+    async def _dispatch(self):
+        """Route worker messages to the site feeds until every worker has finished"""
+        remaining = set(range(len(self._processes)))
+        try:
+            while remaining:
+                try:
+                    message = await asyncio.to_thread(self._out.get, True, _POLL_SECONDS)
+                except queue.Empty:
+                    for worker in list(remaining):
+                        if not self._processes[worker].is_alive():
+                            print(f"❌ Crawl worker {worker} exited without finishing")
+                            self.errors += 1
+                            remaining.discard(worker)
+                    continue
+
+                if message[0] == 'jobs':
+                    _, site, jobs = message
+                    feed = self.feeds[site]
+                    for job in jobs:
+                        await feed.queue.put(job)
+                elif message[0] == 'done':
+                    _, worker, summary = message
+                    remaining.discard(worker)
+                    self.errors += summary['errors']
+                    if 'cache' in summary and self.response_cache is not None:
+                        self.response_cache.stage(summary['cache'])
+                    if 'metrics' in summary:
+                        metrics.merge(summary['metrics'])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Sharded crawl failed: {e}")
+            self.errors += 1
+            for process in self._processes:
+                process.terminate()
+        for feed in self.feeds.values():
+            await feed.queue.put(_END)
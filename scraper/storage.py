@@ -0,0 +1,444 @@
+"""
+Storage backends for KaziLink
+Persists categorized opportunities in batches, against Supabase or an in-memory stand-in
+"""
+
+import time
+from datetime import date, datetime, timezone
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from metrics import metrics
+from models import Opportunity
+
+TABLE = 'opportunities'
+
+# Rows per insert/upsert request
+DEFAULT_BATCH_SIZE = 500
+
+# URLs per existence lookup (kept small: PostgREST puts the IN list in the query string)
+DEFAULT_LOOKUP_CHUNK_SIZE = 100
+
+# Rows per page when reading every source_url
+DEFAULT_SCAN_PAGE_SIZE = 1000
+
+
+def chunked(items: List, size: int) -> Iterator[List]:
+    """Yield successive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def round_trip(op: str, call, *args):
+    """Make one store request, recording its latency as db_seconds{op=...}"""
+    started = time.perf_counter()
+    try:
+        return call(*args)
+    finally:
+        metrics.observe('db_seconds', time.perf_counter() - started, op=op)
+
+
+def utc_now() -> datetime:
+    """The current time as the naive UTC timestamp the table's TIMESTAMP columns hold"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def opportunity_row(job: Opportunity) -> Dict:
+    """Build the `opportunities` row for a categorized job (the only place records become dicts)"""
+    return {
+        'title': job.title,
+        'company': job.company,
+        'type': job.type,
+        'description': job.description,
+        'location': job.location,
+        'source_url': job.source_url,
+        'source_platform': job.source_platform,
+        'alias_urls': list(job.alias_urls),
+        'application_deadline': job.application_deadline,
+        'salary_range': job.salary_range,
+        'experience_required': job.experience_required,
+        'education_level': job.education_level,
+        'industry': job.industry,
+        'is_remote': job.is_remote,
+        'content_hash': job.content_hash(),
+        'status': 'active'
+    }
+
+
+def refreshed_row(job: Opportunity) -> Dict:
+    """
+    The columns rewritten when a stored posting has changed: everything
+    scraped, categorized or extracted, but not its aliases or status
+    """
+    row = opportunity_row(job)
+    del row['alias_urls'], row['status']
+    return row
+
+
+class SupabaseStore:
+    """Opportunity storage backed by the Supabase `opportunities` table"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def fetch_existing_urls(self, urls: List[str]) -> Set[str]:
+        """Return the subset of `urls` already stored"""
+        response = self.client.table(TABLE)\
+            .select('source_url')\
+            .in_('source_url', urls)\
+            .execute()
+        return {row['source_url'] for row in response.data}
+
+    def iter_source_urls(self, page_size: int = DEFAULT_SCAN_PAGE_SIZE) -> Iterator[str]:
+        """Yield every stored source_url and alias URL, one page of rows per request"""
+        for row in self._scan('source_url, alias_urls', page_size):
+            yield row['source_url']
+            yield from row.get('alias_urls') or ()
+
+    def iter_content_hashes(self, page_size: int = DEFAULT_SCAN_PAGE_SIZE) -> Iterator[Tuple[str, Optional[str]]]:
+        """Yield (source_url, content_hash) for every stored row, one page of rows per request"""
+        for row in self._scan('source_url, content_hash', page_size):
+            yield row['source_url'], row.get('content_hash')
+
+    def _scan(self, columns: str, page_size: int) -> Iterator[Dict]:
+        """
+        Yield every row's `columns`, paging by id from the last row seen
+        (not by offset), so rows written during the scan never make it skip
+        or repeat others.
+        """
+        last_id = None
+        while True:
+            query = self.client.table(TABLE).select(f'id, {columns}')
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            response = query.order('id').limit(page_size).execute()
+            yield from response.data
+            if len(response.data) < page_size:
+                return
+            last_id = response.data[-1]['id']
+
+    def upsert_rows(self, rows: List[Dict]) -> int:
+        """
+        Insert rows, ignoring any whose source_url already exists.
+
+        Relies on the UNIQUE constraint on `opportunities.source_url`, so a
+        concurrent writer can never cause a duplicate.
+
+        Returns:
+            Number of rows actually inserted
+        """
+        response = self.client.table(TABLE)\
+            .upsert(rows, on_conflict='source_url', ignore_duplicates=True)\
+            .execute()
+        return len(response.data)
+
+    def update_rows(self, rows: List[Dict]) -> int:
+        """
+        Overwrite the given columns of rows matched by source_url, in one
+        request (a row deleted meanwhile is inserted again).
+
+        Returns:
+            Number of rows written
+        """
+        response = self.client.table(TABLE)\
+            .upsert(rows, on_conflict='source_url')\
+            .execute()
+        return len(response.data)
+
+    def add_alias_urls(self, aliases: Dict[str, List[str]]) -> int:
+        """
+        Add alias URLs to the rows keyed by source_url, in one request,
+        keeping the aliases they already have.
+
+        Returns:
+            Number of rows touched
+        """
+        pairs = [(url, alias) for url, alias_urls in aliases.items() for alias in alias_urls]
+        response = self.client.rpc('add_opportunity_aliases', {
+            'sources': [url for url, _ in pairs],
+            'aliases': [alias for _, alias in pairs]
+        }).execute()
+        return response.data or 0
+
+    def mark_seen(self, urls: List[str], seen_at: datetime) -> int:
+        """
+        Record rows as listed at `seen_at`, matching `urls` against source
+        and alias URLs, and reactivate any that had expired for going missing.
+
+        Returns:
+            Number of rows touched
+        """
+        response = self.client.rpc(
+            'mark_opportunities_seen', {'urls': urls, 'seen_at': seen_at.isoformat()}
+        ).execute()
+        return response.data or 0
+
+    def record_missed(self, platforms: List[str], run_started: datetime) -> int:
+        """Count a missed run against the active rows of `platforms` not seen since `run_started`"""
+        response = self.client.rpc(
+            'record_missed_opportunities', {'platforms': platforms, 'run_started': run_started.isoformat()}
+        ).execute()
+        return response.data or 0
+
+    def expire_stale(self, max_missed_runs: int) -> List[Dict]:
+        """
+        Mark active rows expired once missed `max_missed_runs` runs in a row
+        (0 for never) or past their application deadline.
+
+        Returns:
+            A {'source_url', 'reason'} dict per expired row, the reason being 'unseen' or 'deadline'
+        """
+        response = self.client.rpc(
+            'expire_stale_opportunities', {'max_missed_runs': max_missed_runs}
+        ).execute()
+        return response.data or []
+
+
+class InMemoryStore:
+    """
+    Dict-backed stand-in for SupabaseStore.
+
+    Each call sleeps for `latency` seconds to model a network round trip,
+    so the batched and per-row save paths can be compared offline.
+    """
+
+    def __init__(self, latency: float = 0.0, rows: Iterable[Dict] = ()):
+        self.latency = latency
+        self.rows: Dict[str, Dict] = {row['source_url']: row for row in rows}
+        self.round_trips = 0
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fetch_existing_urls(self, urls: List[str]) -> Set[str]:
+        self._round_trip()
+        return {url for url in urls if url in self.rows}
+
+    def iter_source_urls(self, page_size: int = DEFAULT_SCAN_PAGE_SIZE) -> Iterator[str]:
+        rows = list(self.rows.values())
+        for start in range(0, len(rows), page_size):
+            self._round_trip()
+            for row in rows[start:start + page_size]:
+                yield row['source_url']
+                yield from row.get('alias_urls') or ()
+
+    def iter_content_hashes(self, page_size: int = DEFAULT_SCAN_PAGE_SIZE) -> Iterator[Tuple[str, Optional[str]]]:
+        rows = list(self.rows.values())
+        for start in range(0, len(rows), page_size):
+            self._round_trip()
+            for row in rows[start:start + page_size]:
+                yield row['source_url'], row.get('content_hash')
+
+    def upsert_rows(self, rows: List[Dict]) -> int:
+        self._round_trip()
+        inserted = 0
+        for row in rows:
+            if row['source_url'] not in self.rows:
+                # With the table's column defaults
+                self.rows[row['source_url']] = {'last_seen_at': utc_now(), 'missed_runs': 0, **row}
+                inserted += 1
+        return inserted
+
+    def update_rows(self, rows: List[Dict]) -> int:
+        self._round_trip()
+        for row in rows:
+            if row['source_url'] not in self.rows:
+                self.rows[row['source_url']] = {
+                    'last_seen_at': utc_now(), 'missed_runs': 0, 'alias_urls': [], 'status': 'active'
+                }
+            self.rows[row['source_url']].update(row)
+        return len(rows)
+
+    def add_alias_urls(self, aliases: Dict[str, List[str]]) -> int:
+        self._round_trip()
+        touched = 0
+        for url, alias_urls in aliases.items():
+            row = self.rows.get(url)
+            if row is not None:
+                row['alias_urls'] = list(dict.fromkeys(list(row.get('alias_urls') or ()) + list(alias_urls)))
+                touched += 1
+        return touched
+
+    def mark_seen(self, urls: List[str], seen_at: datetime) -> int:
+        self._round_trip()
+        urls = set(urls)
+        touched = 0
+        for row in self.rows.values():
+            if row['source_url'] in urls or urls.intersection(row.get('alias_urls') or ()):
+                row['last_seen_at'] = seen_at
+                row['missed_runs'] = 0
+                if row['status'] == 'expired' and not _past_deadline(row):
+                    row['status'] = 'active'
+                touched += 1
+        return touched
+
+    def record_missed(self, platforms: List[str], run_started: datetime) -> int:
+        self._round_trip()
+        touched = 0
+        for row in self.rows.values():
+            if row['status'] == 'active' and row['source_platform'] in platforms and row['last_seen_at'] < run_started:
+                row['missed_runs'] += 1
+                touched += 1
+        return touched
+
+    def expire_stale(self, max_missed_runs: int) -> List[Dict]:
+        self._round_trip()
+        expired = []
+        for row in self.rows.values():
+            if row['status'] != 'active':
+                continue
+            if _past_deadline(row):
+                reason = 'deadline'
+            elif max_missed_runs and row['missed_runs'] >= max_missed_runs:
+                reason = 'unseen'
+            else:
+                continue
+            row['status'] = 'expired'
+            expired.append({'source_url': row['source_url'], 'reason': reason})
+        return expired
+
+
+def _past_deadline(row: Dict) -> bool:
+    """Whether the row's deadline day is over (deadlines are dates, as in expire_stale_opportunities)"""
+    deadline = row.get('application_deadline')
+    if isinstance(deadline, str):
+        deadline = date.fromisoformat(deadline[:10])
+    elif isinstance(deadline, datetime):
+        deadline = deadline.date()
+    return deadline is not None and deadline < utc_now().date()
+
+
+def save_rows(
+    store,
+    jobs: List[Opportunity],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    lookup_chunk_size: int = DEFAULT_LOOKUP_CHUNK_SIZE,
+    failed: Optional[Set[str]] = None
+) -> Dict[str, int]:
+    """
+    Save jobs in bulk.
+
+    Existing source_urls are pre-fetched in chunks, then new rows are
+    written `batch_size` at a time. A lookup chunk that fails leaves its
+    URLs to be written anyway, where the upsert skips the stored ones. A
+    batch that fails is retried row by row so one bad record only costs
+    itself; the source_urls of rows that could not be saved are added to
+    `failed`, if given.
+
+    Returns:
+        Dict with 'saved', 'skipped' and 'errors' counts
+    """
+    counts = {'saved': 0, 'skipped': 0, 'errors': 0}
+
+    # Duplicates within the run itself never reach the store
+    by_url = {}
+    for job in jobs:
+        if job.source_url in by_url:
+            counts['skipped'] += 1
+        else:
+            by_url[job.source_url] = job
+
+    urls = list(by_url)
+    existing = set()
+    for chunk in chunked(urls, lookup_chunk_size):
+        try:
+            existing |= round_trip('lookup', store.fetch_existing_urls, chunk)
+        except Exception as e:
+            print(f"⚠️  Lookup of {len(chunk)} URLs failed ({e}), leaving duplicates to the upsert")
+    counts['skipped'] += len(existing)
+
+    new_rows = [opportunity_row(by_url[url]) for url in urls if url not in existing]
+
+    for batch in chunked(new_rows, batch_size):
+        metrics.observe('db_batch_rows', len(batch), op='upsert')
+        try:
+            inserted = round_trip('upsert', store.upsert_rows, batch)
+        except Exception as e:
+            print(f"⚠️  Batch of {len(batch)} failed ({e}), retrying row by row")
+            for row in batch:
+                _save_one(store, row, counts, failed)
+            continue
+
+        counts['saved'] += inserted
+        # Rows inserted by someone else since the lookup
+        counts['skipped'] += len(batch) - inserted
+        print(f"✅ Saved batch: {inserted}/{len(batch)}")
+
+    return counts
+
+
+def update_changed_rows(
+    store,
+    jobs: List[Opportunity],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    failed: Optional[Set[str]] = None
+) -> Dict[str, int]:
+    """
+    Rewrite stored postings whose content changed, `batch_size` rows per request.
+
+    A batch that fails is retried row by row, and rows that still fail
+    are added to `failed`, as in save_rows.
+
+    Returns:
+        Dict with 'updated' and 'errors' counts
+    """
+    counts = {'updated': 0, 'errors': 0}
+    rows = [refreshed_row(job) for job in {job.source_url: job for job in jobs}.values()]
+
+    for batch in chunked(rows, batch_size):
+        metrics.observe('db_batch_rows', len(batch), op='update')
+        try:
+            counts['updated'] += round_trip('update', store.update_rows, batch)
+            print(f"🔄 Updated batch: {len(batch)}")
+            continue
+        except Exception as e:
+            print(f"⚠️  Update of {len(batch)} rows failed ({e}), retrying row by row")
+        for row in batch:
+            try:
+                counts['updated'] += round_trip('update', store.update_rows, [row])
+            except Exception as e:
+                print(f"❌ Error updating {row['title']}: {e}")
+                counts['errors'] += 1
+                if failed is not None:
+                    failed.add(row['source_url'])
+
+    return counts
+
+
+def save_rows_sequential(store, jobs: List[Opportunity]) -> Dict[str, int]:
+    """
+    Save jobs one at a time: one existence check and one write per job.
+
+    Kept as the baseline the bulk path is benchmarked against.
+    """
+    counts = {'saved': 0, 'skipped': 0, 'errors': 0}
+
+    for job in jobs:
+        try:
+            if round_trip('lookup', store.fetch_existing_urls, [job.source_url]):
+                print(f"⏭️  Skipping duplicate: {job.title}")
+                counts['skipped'] += 1
+                continue
+        except Exception as e:
+            print(f"❌ Error saving {job.title}: {e}")
+            counts['errors'] += 1
+            continue
+
+        _save_one(store, opportunity_row(job), counts)
+
+    return counts
+
+
+def _save_one(store, row: Dict, counts: Dict[str, int], failed: Optional[Set[str]] = None):
+    try:
+        if round_trip('upsert', store.upsert_rows, [row]):
+            print(f"✅ Saved: {row['title']} ({row['type']})")
+            counts['saved'] += 1
+        else:
+            counts['skipped'] += 1
+    except Exception as e:
+        print(f"❌ Error saving {row['title']}: {e}")
+        counts['errors'] += 1
+        if failed is not None:
+            failed.add(row['source_url'])
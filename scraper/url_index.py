@@ -0,0 +1,84 @@
+"""
+Known-URL index for KaziLink
+Compact sorted set of 64-bit URL hashes, used to stop crawling once pages hold nothing new
+"""
+
+import hashlib
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional, Tuple
+
+
+def url_hash(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class KnownUrlIndex:
+    """
+    Set of source_urls stored as a sorted array of 8-byte hashes.
+
+    Roughly 8 bytes per URL instead of a full string set; a false
+    positive needs a 64-bit hash collision.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._hashes = array('Q', sorted({url_hash(url) for url in urls}))
+        self._added = set()
+
+    @classmethod
+    def from_store(cls, store) -> 'KnownUrlIndex':
+        """Build the index from every source_url in `store`"""
+        return cls(store.iter_source_urls())
+
+    def __contains__(self, url: str) -> bool:
+        h = url_hash(url)
+        i = bisect_left(self._hashes, h)
+        return (i < len(self._hashes) and self._hashes[i] == h) or h in self._added
+
+    def __len__(self) -> int:
+        return len(self._hashes) + len(self._added)
+
+    def add(self, url: str):
+        if url not in self:
+            self._added.add(url_hash(url))
+
+    def covers(self, urls: Iterable[str]) -> bool:
+        """Whether `urls` is non-empty and every URL in it is known"""
+        urls = list(urls)
+        return bool(urls) and all(url in self for url in urls)
+
+
+def fingerprint(content_hash: Optional[str]) -> int:
+    """The 64-bit fingerprint of a stored content_hash (0 for rows stored without one)"""
+    return int(content_hash[:16], 16) if content_hash else 0
+
+
+class FingerprintIndex:
+    """
+    Content fingerprint of every stored posting, by source_url.
+
+    Two parallel arrays of 8-byte hashes sorted by URL hash, so about 16
+    bytes per posting. Rows stored before fingerprints existed have 0:
+    their content is unknown, so it is never compared.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, Optional[str]]] = ()):
+        pairs = sorted({url_hash(url): fingerprint(content_hash) for url, content_hash in rows}.items())
+        self._hashes = array('Q', (h for h, _ in pairs))
+        self._fingerprints = array('Q', (f for _, f in pairs))
+
+    @classmethod
+    def from_store(cls, store) -> 'FingerprintIndex':
+        """Build the index from every (source_url, content_hash) in `store`"""
+        return cls(store.iter_content_hashes())
+
+    def get(self, url: str) -> Optional[int]:
+        """The stored fingerprint of `url` (None if it is not stored)"""
+        h = url_hash(url)
+        i = bisect_left(self._hashes, h)
+        if i < len(self._hashes) and self._hashes[i] == h:
+            return self._fingerprints[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._hashes)
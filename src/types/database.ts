@@ -21,6 +21,10 @@ export interface Opportunity {
     education_level: string | null
     industry: string | null
     is_remote: boolean
+    alias_urls: string[]
+    last_seen_at: string
+    missed_runs: number
+    content_hash: string | null
 }
 
 export interface UserSavedOpportunity {
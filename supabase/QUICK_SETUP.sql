@@ -24,7 +24,7 @@ CREATE TABLE opportunities (
   salary_range TEXT,
   application_deadline TIMESTAMP,
   source_url TEXT UNIQUE NOT NULL,
-  source_platform TEXT CHECK (source_platform IN ('fuzu', 'myjobmag', 'brightermonday')),
+  source_platform TEXT,
   status opportunity_status DEFAULT 'active',
   scraped_at TIMESTAMP DEFAULT NOW(),
   created_at TIMESTAMP DEFAULT NOW(),
@@ -37,6 +37,16 @@ CREATE TABLE opportunities (
   company_size TEXT,
   is_remote BOOLEAN DEFAULT false,
   
+  -- Near-duplicate postings of this opportunity
+  alias_urls TEXT[] NOT NULL DEFAULT '{}',
+  
+  -- Expiry of listings boards stop showing
+  last_seen_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  missed_runs INTEGER NOT NULL DEFAULT 0,
+  
+  -- Change detection
+  content_hash TEXT,
+  
   -- For search optimization
   search_vector tsvector GENERATED ALWAYS AS (
     to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(company, ''))
@@ -112,6 +122,9 @@ CREATE INDEX idx_opportunities_created ON opportunities(created_at DESC);
 CREATE INDEX idx_opportunities_deadline ON opportunities(application_deadline);
 CREATE INDEX idx_opportunities_search ON opportunities USING GIN(search_vector);
 CREATE INDEX idx_opportunities_source ON opportunities(source_platform, scraped_at DESC);
+CREATE INDEX idx_opportunities_alias_urls ON opportunities USING GIN(alias_urls);
+CREATE INDEX idx_opportunities_active_platform ON opportunities(source_platform, last_seen_at)
+  WHERE status = 'active';
 
 CREATE INDEX idx_user_saved_user ON user_saved_opportunities(user_id);
 CREATE INDEX idx_applications_user ON applications(user_id, applied_at DESC);
@@ -146,10 +159,88 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Record that the given URLs (source or alias) were listed at `seen_at`;
+-- a listing expired for going missing that is back is active again
+CREATE OR REPLACE FUNCTION mark_opportunities_seen(urls TEXT[], seen_at TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+  touched INTEGER;
+BEGIN
+  UPDATE opportunities
+  SET last_seen_at = seen_at,
+      missed_runs = 0,
+      status = CASE
+        WHEN status = 'expired' AND (application_deadline IS NULL OR application_deadline::date >= CURRENT_DATE) THEN 'active'
+        ELSE status
+      END
+  WHERE source_url = ANY(urls) OR alias_urls && urls;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+  RETURN touched;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Count a missed run against every active listing of the given boards
+-- not seen since `run_started` (boards whose listings were all read that run)
+CREATE OR REPLACE FUNCTION record_missed_opportunities(platforms TEXT[], run_started TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+  touched INTEGER;
+BEGIN
+  UPDATE opportunities
+  SET missed_runs = missed_runs + 1
+  WHERE status = 'active'
+    AND source_platform = ANY(platforms)
+    AND last_seen_at < run_started;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+  RETURN touched;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Expire active listings missing from `max_missed_runs` runs in a row
+-- (0 for none) or past their deadline, returning each with its reason;
+-- deadlines are dates, so one passes only once its day is over
+CREATE OR REPLACE FUNCTION expire_stale_opportunities(max_missed_runs INTEGER)
+RETURNS TABLE(source_url TEXT, reason TEXT) AS $$
+BEGIN
+  RETURN QUERY
+  UPDATE opportunities AS o
+  SET status = 'expired'
+  WHERE o.status = 'active'
+    AND (o.application_deadline::date < CURRENT_DATE OR (max_missed_runs > 0 AND o.missed_runs >= max_missed_runs))
+  RETURNING o.source_url,
+    CASE WHEN o.application_deadline::date < CURRENT_DATE THEN 'deadline' ELSE 'unseen' END;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Append each alias in `aliases` to the row whose source_url is at the same
+-- position in `sources`, without repeating URLs the row already has
+CREATE OR REPLACE FUNCTION add_opportunity_aliases(sources TEXT[], aliases TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  touched INTEGER;
+BEGIN
+  UPDATE opportunities AS o
+  SET alias_urls = ARRAY(SELECT DISTINCT unnest(o.alias_urls || a.urls))
+  FROM (
+    SELECT pair.source_url, array_agg(pair.alias_url) AS urls
+    FROM unnest(sources, aliases) AS pair(source_url, alias_url)
+    GROUP BY pair.source_url
+  ) AS a
+  WHERE o.source_url = a.source_url;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+  RETURN touched;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Comments for documentation
 COMMENT ON TABLE opportunities IS 'Main table storing all job opportunities from various sources';
 COMMENT ON COLUMN opportunities.type IS 'Category: attachment (student), internship (graduate), or job (professional)';
 COMMENT ON COLUMN opportunities.search_vector IS 'Full-text search index for title, description, and company';
+COMMENT ON COLUMN opportunities.alias_urls IS 'source_urls of near-duplicate postings of this opportunity on other pages or sites';
+COMMENT ON COLUMN opportunities.last_seen_at IS 'When a crawl last found this opportunity (or one of its aliases) listed';
+COMMENT ON COLUMN opportunities.missed_runs IS 'Complete crawls of its board in a row that did not list this opportunity';
+COMMENT ON COLUMN opportunities.content_hash IS 'Hash of the scraped title, company, location and description; NULL for rows stored before it existed';
+COMMENT ON COLUMN opportunities.source_platform IS 'Name of the board the opportunity was scraped from (see scrapers/registry.py)';
 
 
 -- ============================================================================
@@ -0,0 +1,7 @@
+-- KaziLink Schema Update
+-- Version: 1.1
+-- Description: Remember the URLs of cross-posted copies of an opportunity on its canonical row
+
+ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS alias_urls TEXT[] NOT NULL DEFAULT '{}';
+
+COMMENT ON COLUMN opportunities.alias_urls IS 'source_urls of near-duplicate postings of this opportunity on other pages or sites';
@@ -0,0 +1,68 @@
+-- KaziLink Schema Update
+-- Version: 1.2
+-- Description: Track when each opportunity was last listed, and expire the ones boards stop listing or whose deadline passed
+
+ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS missed_runs INTEGER NOT NULL DEFAULT 0;
+
+-- Sightings match copies by alias too
+CREATE INDEX IF NOT EXISTS idx_opportunities_alias_urls ON opportunities USING GIN(alias_urls);
+-- Only active rows are ever swept
+CREATE INDEX IF NOT EXISTS idx_opportunities_active_platform ON opportunities(source_platform, last_seen_at)
+  WHERE status = 'active';
+
+-- Record that the given URLs (source or alias) were listed at `seen_at`;
+-- a listing expired for going missing that is back is active again
+CREATE OR REPLACE FUNCTION mark_opportunities_seen(urls TEXT[], seen_at TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+  touched INTEGER;
+BEGIN
+  UPDATE opportunities
+  SET last_seen_at = seen_at,
+      missed_runs = 0,
+      status = CASE
+        WHEN status = 'expired' AND (application_deadline IS NULL OR application_deadline::date >= CURRENT_DATE) THEN 'active'
+        ELSE status
+      END
+  WHERE source_url = ANY(urls) OR alias_urls && urls;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+  RETURN touched;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Count a missed run against every active listing of the given boards
+-- not seen since `run_started` (boards whose listings were all read that run)
+CREATE OR REPLACE FUNCTION record_missed_opportunities(platforms TEXT[], run_started TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+  touched INTEGER;
+BEGIN
+  UPDATE opportunities
+  SET missed_runs = missed_runs + 1
+  WHERE status = 'active'
+    AND source_platform = ANY(platforms)
+    AND last_seen_at < run_started;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+  RETURN touched;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Expire active listings missing from `max_missed_runs` runs in a row
+-- (0 for none) or past their deadline, returning each with its reason;
+-- deadlines are dates, so one passes only once its day is over
+CREATE OR REPLACE FUNCTION expire_stale_opportunities(max_missed_runs INTEGER)
+RETURNS TABLE(source_url TEXT, reason TEXT) AS $$
+BEGIN
+  RETURN QUERY
+  UPDATE opportunities AS o
+  SET status = 'expired'
+  WHERE o.status = 'active'
+    AND (o.application_deadline::date < CURRENT_DATE OR (max_missed_runs > 0 AND o.missed_runs >= max_missed_runs))
+  RETURNING o.source_url,
+    CASE WHEN o.application_deadline::date < CURRENT_DATE THEN 'deadline' ELSE 'unseen' END;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON COLUMN opportunities.last_seen_at IS 'When a crawl last found this opportunity (or one of its aliases) listed';
+COMMENT ON COLUMN opportunities.missed_runs IS 'Complete crawls of its board in a row that did not list this opportunity';
@@ -0,0 +1,7 @@
+-- KaziLink Schema Update
+-- Version: 1.3
+-- Description: Fingerprint each opportunity's scraped content, so edited postings are rewritten and unchanged ones left alone
+
+ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+COMMENT ON COLUMN opportunities.content_hash IS 'Hash of the scraped title, company, location and description; NULL for rows stored before it existed';
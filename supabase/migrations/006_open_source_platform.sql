@@ -0,0 +1,7 @@
+-- KaziLink Schema Update
+-- Version: 1.4
+-- Description: Accept any board name as source_platform, so boards added as plugins can be stored
+
+ALTER TABLE opportunities DROP CONSTRAINT IF EXISTS opportunities_source_platform_check;
+
+COMMENT ON COLUMN opportunities.source_platform IS 'Name of the board the opportunity was scraped from (see scrapers/registry.py)';
@@ -0,0 +1,23 @@
+-- KaziLink Schema Update
+-- Version: 1.5
+-- Description: Add alias URLs to many opportunities in one call, keeping the ones already stored
+
+-- Append each alias in `aliases` to the row whose source_url is at the same
+-- position in `sources`, without repeating URLs the row already has
+CREATE OR REPLACE FUNCTION add_opportunity_aliases(sources TEXT[], aliases TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  touched INTEGER;
+BEGIN
+  UPDATE opportunities AS o
+  SET alias_urls = ARRAY(SELECT DISTINCT unnest(o.alias_urls || a.urls))
+  FROM (
+    SELECT pair.source_url, array_agg(pair.alias_url) AS urls
+    FROM unnest(sources, aliases) AS pair(source_url, alias_url)
+    GROUP BY pair.source_url
+  ) AS a
+  WHERE o.source_url = a.source_url;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+  RETURN touched;
+END;
+$$ LANGUAGE plpgsql;